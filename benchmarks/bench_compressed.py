@@ -0,0 +1,59 @@
+"""
+Compares reading the lines of generated multi-member gzip and bzip2 logs with
+`gzip.open`/`bz2.open` and with `it.from_compressed` on a growing number of
+processes.
+
+Run from the repository root with:
+`python -m benchmarks.bench_compressed [lines]`
+"""
+
+import bz2, gzip, os, sys, tempfile, time
+from chemical import it
+
+
+def generate(directory, lines, compress, suffix):
+    "Writes a log made of one member for every 10,000 lines."
+    path = os.path.join(directory, 'access.log' + suffix)
+    with open(path, 'wb') as f:
+        for start in range(0, lines, 10000):
+            block = ''.join(
+                f'10.0.{i % 256}.{i % 97} - - "GET /page/{i % 1013} HTTP/1.1" '
+                f'200 {i * 7 % 50000}\n'
+                for i in range(start, min(lines, start + 10000))
+            )
+            f.write(compress(block.encode()))
+    return path
+
+
+def report(name, lines, make):
+    start = time.perf_counter()
+    count = make().count()
+    elapsed = time.perf_counter() - start
+    assert count == lines, (name, count)
+    print(f'{name:<36} {lines / elapsed:>12,.0f} lines/s')
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    cpus = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        for opener, compress, suffix in (
+            (gzip.open, gzip.compress, '.gz'), (bz2.open, bz2.compress, '.bz2')
+        ):
+            path = generate(directory, lines, compress, suffix)
+
+            def baseline():
+                with opener(path, 'rt') as f:
+                    yield from f
+
+            report(f'{opener.__module__}.open', lines, lambda: it(baseline()))
+            for processes in sorted({1, 2, 4, cpus}):
+                report(
+                    f'from_compressed {suffix}, processes={processes}', lines,
+                    lambda: it.from_compressed(path, processes=processes)
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Reports how long `import chemical` takes and how much more it costs to use the
+first trait from each built-in trait module, as measured by
+`python -X importtime`.
+
+Run from the repository root with:
+`python -m benchmarks.bench_import [runs]`
+"""
+
+import subprocess, sys
+
+
+def import_time(statement, runs):
+    """
+    Returns the smallest time in microseconds spent importing `chemical` and
+    every module imported after it while running `statement`.
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            stderr=subprocess.PIPE, universal_newlines=True, check=True
+        )
+        # NOTE(pebaz): Skip the modules imported during interpreter startup
+        lines = result.stderr.splitlines()
+        lines = lines[[l.endswith('| chemical') for l in lines].index(True):]
+        total = sum(
+            int(line.split('|')[1])
+            for line in lines
+            if not line.split('|')[2].startswith('  ')
+        )
+        best = total if best is None else min(best, total)
+    return best
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for label, statement in (
+        ('import chemical', 'import chemical'),
+        ('then map() (iterators)', 'import chemical; chemical.it().map'),
+        ('then count() (aggregators)', 'import chemical; chemical.it().count'),
+        (
+            'then both',
+            'import chemical; chemical.it().map; chemical.it().count'
+        ),
+    ):
+        elapsed = import_time(statement, runs)
+        print(f'{label:<28} {elapsed / 1000:8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
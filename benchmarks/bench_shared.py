@@ -0,0 +1,48 @@
+"""
+Reports how quickly several threads can drain one `shared()` iterator for a
+range of thread counts and batch sizes, showing the cost of lock contention.
+
+Run from the repository root with:
+`python -m benchmarks.bench_shared [elements]`
+"""
+
+import sys, threading, time
+from chemical import it
+
+
+def drain(elements, threads, batch):
+    shared = it(range(elements)).map(lambda x: x + 1).shared(batch=batch)
+
+    def worker():
+        for _ in shared:
+            pass
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    start = time.perf_counter()
+    it(range(elements)).map(lambda x: x + 1).count()
+    baseline = time.perf_counter() - start
+    rate = elements / baseline
+    print(f'{"unshared, 1 thread":<28} {rate:>12,.0f} elements/s')
+
+    for threads in (1, 2, 4, 8):
+        for batch in (1, 16, 256):
+            elapsed = drain(elements, threads, batch)
+            print(
+                f'{threads} threads, batch={batch:<10} '
+                f'{elements / elapsed:>12,.0f} elements/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
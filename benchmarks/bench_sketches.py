@@ -0,0 +1,59 @@
+"""
+Compares the sketch aggregators against exact computation on a skewed stream,
+reporting time, error and memory for each.
+
+Run from the repository root with:
+`python -m benchmarks.bench_sketches [elements]`
+"""
+
+import random, sys, time, tracemalloc
+from bisect import bisect
+from collections import Counter
+from chemical import it
+
+
+def measure(label, compute):
+    start = time.perf_counter()
+    result = compute()
+    elapsed = time.perf_counter() - start
+
+    # Traced separately since tracemalloc slows down every allocation
+    tracemalloc.start()
+    compute()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'  {label:<8} {elapsed:8.3f}s  {peak / 1024:10.1f} KiB peak')
+    return result
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(0)
+    data = [int(rng.paretovariate(1.2) * 100) for _ in range(size)]
+
+    print('count_distinct')
+    exact = measure('exact', lambda: it(data).count_distinct())
+    approx = measure('approx', lambda: it(data).count_distinct(approx=True))
+    print(f'  relative error: {abs(approx - exact) / exact:.4%}')
+
+    print('quantiles [0.5, 0.99]')
+    fractions = [0.5, 0.99]
+    ordered = sorted(data)
+    exact = [ordered[int(f * (len(ordered) - 1))] for f in fractions]
+    measure('exact', lambda: sorted(data))
+    approx = measure('approx', lambda: it(data).quantiles(fractions))
+    for fraction, right, value in zip(fractions, exact, approx):
+        rank = bisect(ordered, value) / len(ordered)
+        print(f'  q={fraction}: exact {right}, approx {value}, '
+              f'rank error {abs(rank - fraction):.4f}')
+
+    print('heavy_hitters(10)')
+    exact = measure('exact', lambda: Counter(data).most_common(10))
+    approx = measure('approx', lambda: it(data).heavy_hitters(10))
+    overlap = len({x for x, _ in exact} & {x for x, _ in approx})
+    print(f'  top-10 overlap: {overlap}/10')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares reading generated JSON Lines and CSV files one line at a time with
+`it.from_jsonl` and `it.from_csv`, parsing on one process and in a pool, with
+and without projecting fields.
+
+Run from the repository root with:
+`python -m benchmarks.bench_sources [records]`
+"""
+
+import csv, json, os, sys, tempfile, time
+from chemical import it
+
+
+def generate(directory, records):
+    jsonl = os.path.join(directory, 'events.jsonl')
+    with open(jsonl, 'w') as f:
+        for i in range(records):
+            record = {
+                'id': i, 'user': f'user{i % 1000}', 'score': i * 0.5,
+                'tags': ['a', 'b', 'c'], 'active': bool(i % 2)
+            }
+            f.write(json.dumps(record) + '\n')
+
+    table = os.path.join(directory, 'events.csv')
+    with open(table, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'user', 'score', 'tags', 'active'])
+        for i in range(records):
+            writer.writerow([i, f'user{i % 1000}', i * 0.5, 'a,b,c', i % 2])
+
+    return jsonl, table
+
+
+def report(name, records, make):
+    start = time.perf_counter()
+    count = make().count()
+    elapsed = time.perf_counter() - start
+    assert count == records, (name, count)
+    print(f'{name:<36} {records / elapsed:>12,.0f} records/s')
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    cpus = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        jsonl, table = generate(directory, records)
+
+        def lines():
+            with open(jsonl) as f:
+                yield from map(json.loads, f)
+
+        report('json.loads per line', records, lambda: it(lines()))
+        for processes in sorted({1, 2, 4, cpus}):
+            report(
+                f'from_jsonl, processes={processes}', records,
+                lambda: it.from_jsonl(jsonl, processes=processes)
+            )
+            report(
+                f'from_jsonl, processes={processes}, 1 field', records,
+                lambda: it.from_jsonl(
+                    jsonl, fields=['user'], processes=processes
+                )
+            )
+
+        def rows():
+            with open(table, newline='') as f:
+                next(f)
+                yield from csv.reader(f)
+
+        report('csv.reader per line', records, lambda: it(rows()))
+        for processes in sorted({1, 2, 4, cpus}):
+            report(
+                f'from_csv, processes={processes}', records,
+                lambda: it.from_csv(table, processes=processes)
+            )
+            report(
+                f'from_csv, processes={processes}, 1 field', records,
+                lambda: it.from_csv(
+                    table, fields=['user'], processes=processes
+                )
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Reports the throughput and memory per distinct key of `dedup()`,
+`unique()` and `unique(approx=True)`.
+
+Run from the repository root with:
+`python -m benchmarks.bench_unique [distinct_keys]`
+"""
+
+import sys, time, tracemalloc
+from chemical import it
+
+
+def measure(label, build, distinct):
+    start = time.perf_counter()
+    count = build().count()
+    elapsed = time.perf_counter() - start
+
+    # Traced separately since tracemalloc slows down every allocation
+    tracemalloc.start()
+    build().count()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f'{label:<28} {count:>10} kept  {elapsed:8.3f}s  '
+        f'{peak / distinct:8.2f} bytes/key'
+    )
+
+
+def main():
+    distinct = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    data = [i % distinct for i in range(distinct * 3)]
+    runs = sorted(data)
+
+    measure('dedup (sorted input)', lambda: it(runs).dedup(), distinct)
+    measure('unique', lambda: it(data).unique(), distinct)
+    for error_rate in (0.01, 0.001):
+        measure(
+            f'unique(approx, p={error_rate})',
+            lambda: it(data).unique(
+                approx=True, capacity=distinct, error_rate=error_rate
+            ),
+            distinct
+        )
+
+
+if __name__ == '__main__':
+    main()
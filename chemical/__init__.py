@@ -14,23 +14,144 @@ class NothingToPeek(ChemicalException):
     "Raised when a call to .peek() cannot yield another element"
 
 
+ENTRY_POINT_GROUP = 'chemical.traits'
+
+
+def _entry_points(group):
+    "Returns the installed entry points in `group` without loading them."
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        try:
+            from pkg_resources import iter_entry_points
+        except ImportError:
+            return []
+        return list(iter_entry_points(group))
+
+    found = entry_points()
+    if hasattr(found, 'select'):
+        return list(found.select(group=group))
+    return list(found.get(group, []))
+
+
+class Traits(dict):
+    """
+    Maps trait names to the classes and functions that implement them.
+
+    Trait modules are only imported the first time one of their traits is
+    looked up. Modules are registered up front with `provide()`, or by other
+    packages through the `chemical.traits` entry point group, whose entries
+    name a trait and point at the module, class or function implementing it:
+
+        :::toml
+
+        [project.entry-points."chemical.traits"]
+        rolling_median = "my_package.traits:rolling_median"
+    """
+    def __init__(self):
+        dict.__init__(self)
+        self.providers = {}
+        self.plugins = None
+
+    def provide(self, module, names):
+        "Registers `module` as the provider of the traits in `names`."
+        for name in names:
+            self.providers.setdefault(name, module)
+
+    def names(self):
+        "Returns the names of all known traits, loaded or not."
+        from itertools import chain
+        return set(chain(self.keys(), self.providers, self._plugins()))
+
+    def _plugins(self):
+        if self.plugins is None:
+            self.plugins = {
+                entry.name: entry for entry in _entry_points(ENTRY_POINT_GROUP)
+            }
+        return self.plugins
+
+    def _load(self, name):
+        "Imports whatever provides `name`, returning True if it was found."
+        from importlib import import_module
+
+        if name in self.providers:
+            # NOTE(pebaz): Traits registered by hand win over lazily loaded
+            # ones
+            registered = dict(self)
+            import_module(self.providers.pop(name))
+            self.update(registered)
+
+        elif name in self._plugins():
+            implementation = self.plugins.pop(name).load()
+            if name not in self and callable(implementation):
+                self[name] = implementation
+
+        return dict.__contains__(self, name)
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or self._load(name)
+
+    def __missing__(self, name):
+        if self._load(name):
+            return dict.__getitem__(self, name)
+        raise KeyError(name)
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+
 class it:
     """
     You can extend `it` with methods that produce iterators and methods that
     produce a value. Decorate a class or a function with `trait` respectively to
     get this to work.
     """
-    traits = {}
+    traits = Traits()
+
+    # NOTE(pebaz): Stages that hold on to elements point `_buffer` at whatever
+    # holds them so that `buffered()` can report on it. `_trait` is the name
+    # the stage was created with and `_arguments` the arguments it was given.
+    _buffer = None
+    _trait = None
+    _arguments = None
+
+    # NOTE(pebaz): Stages that can produce their elements from the back of the
+    # same remaining range as `next()` set `_back` to a function that turns a
+    # function pulling from the back of their input into one for their output
+    _back = None
+
+    # NOTE(pebaz): A `Checkpoint` can only resume stages whose progress is
+    # fully captured by `save_state()` and the position of their upstream.
+    # Stages that keep no state of their own and never pull elements ahead of
+    # the ones they return set `_resumable`
+    _resumable = False
 
     def __init__(self, items=[], reverse_seed=None, bounds=[]):
         self._modified = False
         self.items = iter(items)
+        self._upstream = items if isinstance(items, it) else None
 
         if isinstance(items, it):
             self._lower_bound, self._upper_bound = bounds or items.size_hint()
             self.reverse = reverse_seed or items.reverse
+            self._source = (
+                items._source
+                if type(self) is type(items) is it and not items._modified
+                else None
+            )
 
         else:
+            # NOTE(pebaz): Keep indexable collections around so that traits can
+            # slice them directly instead of pulling one element at a time.
+            self._source = (
+                items
+                if type(self) is it
+                and hasattr(items, '__getitem__')
+                and hasattr(items, '__len__')
+                and not hasattr(items, 'keys')
+                else None
+            )
+
             if bounds:
                 self._lower_bound, self._upper_bound = bounds
             else:
@@ -81,7 +202,7 @@ class it:
     def __dir__(self):
         from itertools import chain
         keys = set(self.__dict__.keys()) ^ {'items'}
-        return sorted(set(chain(keys, self.traits.keys())))
+        return sorted(set(chain(keys, self.traits.names())))
 
     def __getattr__(self, name):
         if name not in it.traits:
@@ -104,7 +225,24 @@ class it:
                 return f'<{self.__module__}.it.{self.name} at {hid}>'
 
             def __call__(self, *args, **kwargs):
-                return self.clazz(self.items, *args, **kwargs)
+                result = self.clazz(self.items, *args, **kwargs)
+
+                # NOTE(pebaz): Remember which iterator produced the result so
+                # that the pipeline can be walked back to its source.
+                if (
+                    isinstance(result, it)
+                    and result is not self.items
+                    and result._upstream is None
+                ):
+                    result._upstream = self.items
+                if (
+                    isinstance(result, it)
+                    and result is not self.items
+                    and result._trait is None
+                ):
+                    result._trait = self.name
+                    result._arguments = args, kwargs
+                return result
 
         return wrap(self, clazz, name)
 
@@ -117,6 +255,134 @@ class it:
     def size_hint(self):
         return self._lower_bound, self._upper_bound
 
+    def next_back(self):
+        """
+        Returns the last of the elements not yet returned by `next()` or
+        `next_back()`, consuming it.
+
+        Unlike `rev()`, which walks an independent copy of the pipeline from
+        the back, both ends share the same remaining elements, so `next()` and
+        `next_back()` can be mixed freely. Only available for pipelines over a
+        sequence made of stages that support it, like `map` and `filter`.
+
+        **Examples**
+
+            :::python
+
+            itr = it(range(5)).map(lambda x: x * 10)
+            assert itr.next_back() == 40
+            assert itr.next() == 0
+            assert itr.next_back() == 30
+            assert itr.collect() == [10, 20]
+        """
+        pull = self._pull_back()
+        if pull is None:
+            raise ChemicalException(
+                'next_back: iterator is not double-ended. Only stages like '
+                'map and filter over a sequence can be consumed from both '
+                'ends.'
+            )
+        self._modified = True
+        return pull()
+
+    def _pull_back(self):
+        """
+        Returns a function that pops the element at the back of this iterator's
+        remaining elements, or `None` if the pipeline can't do that.
+        """
+        pull = self.__dict__.get('_puller')
+        if pull is not None:
+            return pull
+
+        upstream = self._upstream
+        if upstream is None:
+            cursor = _Cursor.of(self)
+            if cursor is None:
+                return None
+            pull = cursor.pull
+
+        elif self._back is not None:
+            pull = upstream._pull_back()
+            if pull is None:
+                return None
+            pull = self._back(pull)
+
+        elif type(self) is it and self.items is upstream:
+            pull = upstream._pull_back()
+            if pull is None:
+                return None
+
+        else:
+            return None
+
+        # NOTE(pebaz): Forward pulls must stop where the back has got up to
+        cursor = _Cursor.find(self)
+        forward = self.__get_next__
+
+        def bounded():
+            item = forward()
+            if cursor.overrun():
+                self.items = iter(())
+                raise StopIteration
+            return item
+
+        self.__get_next__ = bounded
+        self._puller = pull
+        return pull
+
+    def stages(self):
+        """
+        Returns every iterator in the pipeline that produced this one, starting
+        with the source and ending with this iterator.
+        """
+        stages = []
+        stage = self
+        while stage is not None:
+            stages.append(stage)
+            stage = stage._upstream
+        return stages[::-1]
+
+    def buffered(self):
+        """
+        Returns the number of elements this iterator is holding on to and an
+        estimate of the bytes they take up.
+        """
+        if self._buffer is None:
+            return 0, 0
+
+        from .memory import estimate
+        return estimate(self._buffer)
+
+    def save_state(self):
+        """
+        Returns a small, picklable snapshot of any progress this iterator keeps
+        apart from its upstream iterators, or `None` if it keeps none.
+        """
+        return None
+
+    def load_state(self, state):
+        "Restores a snapshot previously returned by `save_state()`."
+
+    def _sequence(self):
+        """
+        Returns the indexable collection this iterator walks over, provided
+        that no elements have been pulled from it yet. Otherwise returns
+        `None`.
+        """
+        from operator import length_hint
+
+        source = self._source
+        if source is None or self._modified:
+            return None
+
+        if isinstance(self.items, it):
+            return self.items._sequence()
+
+        if length_hint(self.items, -1) not in (-1, len(source)):
+            return None
+
+        return source
+
 
 def trait(bind=None):
     def inner(*args, **kwargs):
@@ -137,6 +403,181 @@ def trait(bind=None):
     return bind
 
 
+class _Cursor:
+    """
+    Tracks the back end of the remaining range of a sequence source whose
+    front is tracked by the forward iterator over it.
+    """
+    def __init__(self, source, items):
+        self.source = source
+        self.items = items
+        self.back = len(source)
+
+    @staticmethod
+    def of(source_it):
+        "Returns the cursor of a source `it`, or `None` if it has none."
+        from operator import length_hint
+
+        cursor = source_it.__dict__.get('_cursor')
+        if cursor is not None:
+            return cursor
+
+        source = source_it._source
+        if source is None or length_hint(source_it.items, -1) == -1:
+            return None
+
+        cursor = source_it._cursor = _Cursor(source, source_it.items)
+        return cursor
+
+    @staticmethod
+    def find(stage):
+        "Returns the cursor of the source of a pipeline."
+        while stage._upstream is not None:
+            stage = stage._upstream
+        return stage._cursor
+
+    def front(self):
+        from operator import length_hint
+        return len(self.source) - length_hint(self.items)
+
+    def overrun(self):
+        "True if the forward side has gone past the back."
+        return self.front() > self.back
+
+    def pull(self):
+        if self.back <= self.front():
+            raise StopIteration
+        self.back -= 1
+        return self.source[self.back]
+
+
+def _raw(items):
+    """
+    Returns what a plain `it` wraps, skipping its two calls per element.
+
+    Only a fresh `it` is unwrapped. One that has been pulled from, holds on to
+    elements or had `next_back()` called on it is returned as is, so that its
+    own bookkeeping keeps running.
+    """
+    if (
+        type(items) is it
+        and not items._modified
+        and items._buffer is None
+        and '_puller' not in items.__dict__
+        and '__get_next__' not in items.__dict__
+    ):
+        return items.items
+    return items
+
+
+_SIZES = {
+    'preserve': lambda lower, upper, *args, **kwargs: (lower, upper),
+    'shrink': lambda lower, upper, *args, **kwargs: (0, upper),
+    'unknown': lambda lower, upper, *args, **kwargs: (0, None),
+}
+
+
+def stage(
+    bind=None, size='preserve', reverse=True, batch=None, back=None,
+    resumable=False
+):
+    """
+    Registers a function that turns an iterable into an iterator, usually a
+    generator function, as a trait that runs at generator speed.
+
+    The function receives the upstream elements followed by the arguments the
+    trait was called with. When the upstream is a plain `it`, the function
+    iterates whatever that `it` wraps directly.
+
+    `size` says how the stage changes the size hint of its input: it may
+    `'preserve'` or `'shrink'` it, make it `'unknown'`, or be a function
+    given the `lower` and `upper` bounds and the trait's arguments that
+    returns the new bounds.
+
+    If `reverse` is `True`, the function is also run over the reverse side of
+    the input so that the stage can be reversed.
+
+    If `batch` is a number, the function receives lists of up to `batch`
+    elements and returns iterables of results, which are flattened.
+
+    To support `next_back()`, pass `back`: a function given a function that
+    pops an element from the back of the input, and the trait's arguments,
+    that returns a function popping an element from the back of the output.
+
+    Pass `resumable=True` if the function keeps no state and only pulls the
+    elements it needs for each one it returns, like `map` and `filter`, so
+    that a `Checkpoint` can resume it.
+
+    **Examples**
+
+        :::python
+
+        @trait.stage
+        def double(items):
+            for i in items:
+                yield i * 2
+
+        assert it(range(3)).double().rev().collect() == [4, 2, 0]
+
+        @trait.stage('pairs', size=lambda lo, up: (lo // 2, up and up // 2))
+        def make_pairs(items):
+            return zip(items, items)
+
+        @trait.stage(batch=1024)
+        def scaled(batches, factor):
+            for batch in batches:
+                yield [i * factor for i in batch]
+    """
+    if callable(size):
+        bounds = size
+    elif size in _SIZES:
+        bounds = _SIZES[size]
+    else:
+        raise TraitException(
+            f'stage: size must be {", ".join(_SIZES)} or a function, '
+            f'not {size!r}'
+        )
+
+    def wrapper(func):
+        from functools import wraps
+
+        def run(items, args, kwargs):
+            items = _raw(items)
+            if batch is None:
+                return func(items, *args, **kwargs)
+
+            from itertools import chain, islice
+            batches = iter(lambda: list(islice(items, batch)), [])
+            return chain.from_iterable(func(batches, *args, **kwargs))
+
+        @wraps(func)
+        def make(self, *args, **kwargs):
+            lower, upper = self.size_hint()
+            result = it(
+                run(self, args, kwargs),
+                run(self.reverse, args, kwargs)
+                if reverse and self.reverse is not None else None,
+                bounds(lower, upper, *args, **kwargs)
+            )
+            if back is not None:
+                result._back = lambda pull: back(pull, *args, **kwargs)
+            result._resumable = resumable and batch is None
+            return result
+
+        it.traits[name or func.__name__.lower()] = make
+        return make
+
+    if callable(bind):
+        name = None
+        return wrapper(bind)
+
+    name = bind
+    return wrapper
+
+
+trait.stage = stage
+
+
 class Ordering(Enum):
     Equal = auto()
     Less = auto()
@@ -163,6 +604,85 @@ class Ref:
         return self.val
 
 
-# Allow all iterators and aggregators to be available upon import
-from . aggregators import *
-from . iterators import *
+# NOTE(pebaz): Trait modules are imported the first time one of their traits is
+# used, which keeps `import chemical` cheap for short-lived processes.
+it.traits.provide('chemical.aggregators', (
+    'all', 'any', 'cmp', 'cmp_by', 'collect', 'collect_array',
+    'collect_columns', 'collect_numpy', 'count', 'count_distinct', 'eq',
+    'find', 'ge', 'go', 'gt', 'heavy_hitters', 'is_sorted', 'last', 'le', 'lt',
+    'max', 'max_by_key', 'min', 'min_by_key', 'neq', 'nth', 'partition',
+    'position', 'product', 'quantiles', 'rfind', 'sample', 'sum', 'unzip',
+))
+
+it.traits.provide('chemical.iterators', (
+    'chain', 'chunks', 'chunks_exact', 'current', 'cycle', 'dedup',
+    'difference', 'enumerate', 'filter', 'flatten', 'fold', 'for_each',
+    'inspect', 'intersect', 'islice', 'join', 'map', 'merge', 'merge_join',
+    'par_iter', 'partition_lazy', 'peekable', 'prefetch', 'sample_rate',
+    'scan', 'shard', 'shared', 'skip', 'skip_while', 'step_by', 'sync',
+    'take', 'take_while', 'union_sorted', 'unique', 'window_max',
+    'window_mean', 'window_min', 'window_sum', 'windows', 'zip',
+))
+
+it.traits.provide('chemical.memory', ('memory_limit',))
+
+it.traits.provide('chemical.parallel', ('par_filter', 'par_map', 'par_sum'))
+
+it.traits.provide('chemical.io', ('to_csv', 'to_jsonl', 'write_lines'))
+
+it.traits.provide('chemical.text', ('regex_tokens', 'split', 'split_lines'))
+
+
+class _Source:
+    """
+    A function on the `it` class, like `it.from_jsonl`, that is imported from
+    its module the first time it is looked up.
+    """
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+
+    def __get__(self, instance, owner):
+        from importlib import import_module
+        return getattr(import_module(self.module), self.name)
+
+
+it.from_compressed = _Source('chemical.io', 'from_compressed')
+it.from_csv = _Source('chemical.io', 'from_csv')
+it.from_jsonl = _Source('chemical.io', 'from_jsonl')
+
+
+# NOTE(pebaz): `from chemical import *` exports what it did when the trait
+# modules were star-imported here. Only a star import loads them.
+__all__ = [
+    'ChemicalException', 'ENTRY_POINT_GROUP', 'NothingToPeek', 'Ordering',
+    'Ref', 'TraitException', 'Traits', 'it', 'trait',
+
+    # chemical.aggregators
+    'all_it', 'any_it', 'cmp', 'cmp_by', 'collect', 'count', 'eq', 'find',
+    'ge', 'go', 'gt', 'is_sorted', 'last', 'le', 'lt', 'max_by_key', 'max_it',
+    'min_by_key', 'min_it', 'neq', 'nth', 'partition', 'position', 'product',
+    'sum_it', 'unzip',
+
+    # chemical.iterators
+    'Current', 'Inspect', 'Peekable', 'Skip', 'Step', 'chain_it', 'cycle_it',
+    'enumerate_it', 'filter', 'flatten', 'fold', 'for_each', 'map_it',
+    'par_iter', 'scan', 'skip_while', 'take', 'take_while', 'zip_it',
+]
+
+
+def __getattr__(name):
+    "Keeps names defined by the trait modules importable from `chemical`."
+    from importlib import import_module
+
+    # NOTE(pebaz): Lookups like `__path__` or `__wrapped__` must not import the
+    # trait modules
+    if name.startswith('__'):
+        raise AttributeError(f"module 'chemical' has no attribute '{name}'")
+
+    for module in ('chemical.aggregators', 'chemical.iterators'):
+        module = import_module(module)
+        if hasattr(module, name):
+            return getattr(module, name)
+
+    raise AttributeError(f"module 'chemical' has no attribute '{name}'")
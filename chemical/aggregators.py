@@ -52,13 +52,159 @@ def collect(self, into=list):
         assert it(range(3)).collect(tuple) == (0, 1, 2)
         assert it(range(3)).collect(set) == {0, 1, 2}
         assert it('abc').collect(str) == 'abc'
+
+    Passing an `array.array` instance extends it with the elements and returns
+    it, storing numbers compactly instead of as one object per element:
+
+        :::python
+
+        from array import array
+
+        assert it(range(3)).collect(array('d')) == array('d', [0, 1, 2])
+
+    The `bytes` and `bytearray` types accept either integers or bytes-like
+    chunks, which are concatenated:
+
+        :::python
+
+        assert it([104, 105]).collect(bytes) == b'hi'
+        assert it([b'ab', b'cd']).collect(bytearray) == bytearray(b'abcd')
     """
+    from array import array
+
     if into == str:
         return ''.join(str(i) for i in self)
+    elif isinstance(into, array):
+        return _fill_array(self, into)
+    elif into in (bytes, bytearray):
+        return _collect_bytes(self, into)
     else:
         return into(self)
 
 
+_BATCH = 4096
+
+
+def _fill_array(self, result):
+    """
+    Appends the elements of `self` to the `array.array` `result`.
+
+    If the number of elements is known exactly, `result` is grown once up front
+    and filled in place batch by batch. Otherwise `array.extend()` grows it
+    geometrically as elements arrive.
+    """
+    from array import array
+    from itertools import islice
+
+    lower, upper = self.size_hint()
+    if lower != upper or not lower:
+        result.extend(self)
+        return result
+
+    start = len(result)
+    result.extend(array(result.typecode, [0]) * lower)
+
+    end, typecode = start, result.typecode
+    while end < start + lower:
+        batch = array(typecode, islice(self, min(_BATCH, start + lower - end)))
+        if not batch:
+            break
+        result[end:end + len(batch)] = batch
+        end += len(batch)
+
+    # NOTE(pebaz): Don't trust the size hint with the contents of the array
+    del result[end:]
+    result.extend(self)
+    return result
+
+
+def _collect_bytes(self, into):
+    result = bytearray()
+    for item in self:
+        if isinstance(item, int):
+            result.append(item)
+        else:
+            result += item
+    return result if into is bytearray else bytes(result)
+
+
+@trait
+def collect_array(self, typecode):
+    """
+    Consumes the iterator and returns its elements in an `array.array` of the
+    given type code.
+
+    Each number takes only the size of its type code (8 bytes for `'d'` and
+    `'q'`) instead of being a separate object referenced by a list.
+
+    **Examples**
+
+        :::python
+
+        from array import array
+
+        assert it(range(3)).collect_array('i') == array('i', [0, 1, 2])
+        assert it(range(3)).map(float).collect_array('d').itemsize == 8
+    """
+    from array import array
+
+    return _fill_array(self, array(typecode))
+
+
+@trait
+def collect_numpy(self, dtype=float):
+    """
+    Consumes the iterator and returns its elements in a one-dimensional NumPy
+    array of the given `dtype`.
+
+    The array is allocated once if the number of elements is known exactly,
+    and trimmed or grown if the iterator turns out shorter or longer than its
+    size hint. Requires NumPy to be installed.
+
+    **Examples**
+
+        :::python
+
+        import numpy as np
+
+        values = it(range(5)).map(lambda x: x * x).collect_numpy(np.int64)
+        assert values.tolist() == [0, 1, 4, 9, 16]
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ChemicalException(
+            'collect_numpy: NumPy is not installed'
+        ).with_traceback(e.__traceback__) from e
+
+    from array import array
+
+    source = self._sequence()
+    if isinstance(source, (np.ndarray, array)):
+        return np.array(source, dtype=dtype)
+
+    from itertools import islice
+
+    lower, upper = self.size_hint()
+    if lower != upper or not lower:
+        return np.fromiter(self, dtype)
+
+    result = np.empty(lower, dtype)
+    end = 0
+    while end < lower:
+        batch = np.fromiter(islice(self, min(_BATCH, lower - end)), dtype)
+        if not batch.size:
+            break
+        result[end:end + batch.size] = batch
+        end += batch.size
+
+    # NOTE(pebaz): Don't trust the size hint with the length of the array
+    rest = np.fromiter(self, dtype)
+    if end < lower:
+        result = result[:end].copy()
+    return np.concatenate((result, rest)) if rest.size else result
+
+
 @trait
 def nth(self, num):
     """
@@ -84,12 +230,32 @@ def nth(self, num):
     if num == 0:
         raise ChemicalException('nth: to take the first item, use integer 1')
 
+    pull = _back_puller(self) if num < 0 else None
+    if pull is not None:
+        for i in range(-num):
+            item = pull()
+        return item
+
     for i in range(abs(num)):
         item = next(self if num > 0 else self.reverse)
 
     return item
 
 
+_SIDE_EFFECTS = {'inspect', 'for_each'}
+
+
+def _back_puller(self):
+    """
+    Returns a function popping elements from the back of the iterator, or
+    `None` if it isn't double-ended or if skipping the elements in front would
+    hide them from a stage like `inspect` that has side effects.
+    """
+    if any(stage._trait in _SIDE_EFFECTS for stage in self.stages()):
+        return None
+    return self._pull_back()
+
+
 @trait
 def count(self):
     """
@@ -130,7 +296,19 @@ def last(self):
         assert it('abc').last() == 'c'
         assert it('abc').skip(1).last() == 'c'
         assert it('abc').cycle().take(8).last() == 'b'
+
+    Double-ended iterators, like `map` and `filter` over a sequence, find the
+    last element from the back without visiting the others.
     """
+    pull = _back_puller(self)
+    if pull is not None:
+        try:
+            item = pull()
+        except StopIteration:
+            item = None
+        self.items = iter(())
+        return item
+
     item = None
     for i in self:
         item = i
@@ -251,10 +429,10 @@ def go(self):
 
 
 @trait
-def unzip(self):
+def unzip(self, n=2):
     """
-    Returns two lists created from the first and second index of every
-    collection found within the iterator.
+    Returns `n` lists, the first holding the first field of every collection
+    found within the iterator, the second holding the second field, and so on.
 
     **Examples**
 
@@ -262,16 +440,35 @@ def unzip(self):
 
         gold = [*range(9)], [*range(8, -1, -1)]
         assert it(range(9)).zip(range(8, -1, -1)).unzip() == gold
+        assert it([(1, 2, 3), (4, 5, 6)]).unzip(3) == ([1, 4], [2, 5], [3, 6])
     """
-    left, right = [], []
-    try:
-        for l, r in self:
-            left.append(l); right.append(r)
-    except ValueError as e:
-        raise ChemicalException(
-            'unzip: left and right hand sides are unbalanced'
-        ).with_traceback(e.__traceback__) from e
-    return left, right
+    from .columns import _transpose
+
+    return tuple(_transpose(self, n, False, 'unzip'))
+
+
+@trait
+def collect_columns(self, names=None):
+    """
+    Consumes an iterator of equally sized tuples and returns a `Columns` table
+    that stores each field in its own column.
+
+    Fields holding only ints or only floats are stored in compact `array.array`
+    columns, other fields in lists. If `names` are given, columns can be looked
+    up by name and every row must have one field per name.
+
+    **Examples**
+
+        :::python
+
+        table = it('abc').enumerate().collect_columns(['index', 'letter'])
+        assert table.column('index') == array('q', [0, 1, 2])
+        assert table.column('letter') == ['a', 'b', 'c']
+        assert it(table).collect() == [(0, 'a'), (1, 'b'), (2, 'c')]
+    """
+    from .columns import Columns
+
+    return Columns.from_rows(self, names)
 
 
 @trait
@@ -448,6 +645,50 @@ def find(self, closure):
     )
 
 
+@trait
+def rfind(self, closure):
+    """
+    Uses a function to search for the last item that matches and returns it.
+
+    Double-ended iterators are searched from the back, consuming only the
+    elements after the match. Otherwise the reverse of the iterator is
+    searched if it has one, and every element is visited if it doesn't.
+
+    **Examples**
+
+        :::python
+
+        assert it('asdf').rfind(lambda x: x in 'as') == 's'
+        assert it(range(10)).map(lambda x: x * 3).rfind(lambda x: x % 2) == 27
+    """
+    pull = _back_puller(self)
+    if pull is not None:
+        try:
+            while True:
+                item = pull()
+                if closure(item):
+                    return item
+        except StopIteration:
+            ...
+
+    elif self.reverse is not None:
+        for item in self.reverse:
+            if closure(item):
+                return item
+
+    else:
+        found = False
+        for item in self:
+            if closure(item):
+                found, last = True, item
+        if found:
+            return last
+
+    raise ChemicalException(
+        'rfind: item matching provided lambda could not be found'
+    )
+
+
 @trait
 def position(self, closure):
     """
@@ -512,8 +753,13 @@ def is_sorted(self):
         assert it((1, 2, 3)).is_sorted()
         assert not it((2, 3, 1)).is_sorted()
     """
-    collection = self.collect()
-    return collection == sorted(collection)
+    items = iter(self)
+    for previous in items:
+        for item in items:
+            if item < previous:
+                return False
+            previous = item
+    return True
 
 
 @trait
@@ -529,3 +775,135 @@ def product(self):
         assert it((-1, 2, 3)).product() == -6
     """
     return self.fold(1, lambda acc, ele: acc(acc._ * ele))
+
+
+@trait
+def sample(self, k, seed=None):
+    """
+    Returns `k` elements chosen uniformly at random without replacement,
+    consuming the iterator but never holding more than `k` elements.
+
+    Uses reservoir sampling with Algorithm L, which computes how many elements
+    to skip before the next replacement instead of drawing a random number for
+    every element. If the iterator walks an untouched sequence, `k` indices are
+    picked directly instead.
+
+    Fewer than `k` elements are returned if the iterator is shorter than `k`.
+    Pass a `seed` to get the same sample every time.
+
+    **Examples**
+
+        :::python
+
+        assert len(it(range(100)).sample(5)) == 5
+        assert sorted(it('abc').sample(5)) == ['a', 'b', 'c']
+        assert it(range(100)).sample(3, seed=7) == it(range(100)).sample(
+            3, seed=7
+        )
+    """
+    import random
+    from itertools import islice
+    from math import exp, floor, log
+
+    if k < 0:
+        raise ChemicalException('sample: k must be >= 0')
+
+    rng = random.Random(seed)
+    uniform = lambda: rng.random() or 5e-324
+
+    source = self._sequence()
+    if source is not None:
+        indices = rng.sample(range(len(source)), min(k, len(source)))
+        return [source[i] for i in indices]
+
+    reservoir = list(islice(self, k))
+    if len(reservoir) < k or not k:
+        return reservoir
+
+    weight = exp(log(uniform()) / k)
+    end = object()
+    while True:
+        skip = floor(log(uniform()) / log(1 - weight))
+        item = next(islice(self, skip, skip + 1), end)
+        if item is end:
+            return reservoir
+        reservoir[rng.randrange(k)] = item
+        weight *= exp(log(uniform()) / k)
+
+
+@trait
+def count_distinct(self, approx=False, precision=14):
+    """
+    Returns the number of distinct elements, consuming the iterator.
+
+    By default every distinct element is held in a `set`. Passing
+    `approx=True` estimates the count with a `HyperLogLog` sketch instead,
+    which uses `2 ** precision` bytes and has a standard error of about
+    `1.04 / sqrt(2 ** precision)`.
+
+    To combine counts from several shards, build a
+    `chemical.sketches.HyperLogLog` for each one and `merge()` them.
+
+    **Examples**
+
+        :::python
+
+        assert it('abacb').count_distinct() == 3
+        assert 990 < it(range(1000)).count_distinct(approx=True) < 1010
+    """
+    if not approx:
+        return len(set(self))
+
+    from .sketches import HyperLogLog
+    return HyperLogLog(precision).update(self).count()
+
+
+@trait
+def quantiles(self, fractions, k=200, seed=None):
+    """
+    Returns the approximate element at each fraction of the way through the
+    sorted elements, consuming the iterator.
+
+    Uses a `KLLSketch`, which holds about `3 * k` elements no matter how long
+    the iterator is. If `fractions` is a single number, a single element is
+    returned.
+
+    To combine quantiles from several shards, build a
+    `chemical.sketches.KLLSketch` for each one and `merge()` them.
+
+    **Examples**
+
+        :::python
+
+        assert it(range(101)).quantiles([0.5, 1]) == [50, 100]
+        assert it(range(101)).quantiles(0.5) == 50
+    """
+    from .sketches import KLLSketch
+
+    sketch = KLLSketch(k, seed).update(self)
+    if isinstance(fractions, (int, float)):
+        return sketch.quantile(fractions)
+    return sketch.quantiles(fractions)
+
+
+@trait
+def heavy_hitters(self, k, width=2048, depth=5):
+    """
+    Returns the `k` most frequent elements as `(element, count)` pairs, most
+    frequent first, consuming the iterator.
+
+    Counts come from a `CountMinSketch` of `depth` rows of `width` counters, so
+    they may overestimate but never underestimate. Only the `k` current
+    candidates are held in memory.
+
+    To combine results from several shards, build a
+    `chemical.sketches.HeavyHitters` for each one and `merge()` them.
+
+    **Examples**
+
+        :::python
+
+        assert it('abracadabra').heavy_hitters(1) == [('a', 5)]
+    """
+    from .sketches import HeavyHitters
+    return HeavyHitters(k, width, depth).update(self).top()
@@ -0,0 +1,219 @@
+"""
+Checkpointing for long-running pipelines.
+
+A `Checkpoint` periodically saves the position of a pipeline's source along
+with the `save_state()` of every stage, so that a restarted job can seek its
+source straight to where it left off instead of starting over.
+
+    :::python
+
+    from chemical import it
+    from chemical.checkpoint import Checkpoint
+
+    ckpt = Checkpoint('nightly.ckpt', every=100000)
+
+    with open('events.log') as events:
+        pipeline = (ckpt.source(events)
+            .map(parse)
+            .filter(is_interesting)
+        )
+        total = ckpt.fold(pipeline, 0, lambda acc, e: acc(acc._ + e.size))
+
+The pipeline must be rebuilt the same way on every run so that saved states
+line up with their stages. Stages that hold on to elements or read ahead of
+what they return, like `dedup`, `unique`, `windows` or `prefetch`, can't be
+resumed correctly, so pipelines containing them are rejected. The checkpoint
+file is removed once the pipeline has been fully consumed.
+"""
+
+import os, pickle
+from . import it, ChemicalException, Ref
+
+
+class Resumable(it):
+    """
+    Wraps a sequence or a file and tracks how far into it iteration has gone,
+    so that its position can be saved and later restored.
+
+    Files are read line by line and their position is their `tell()` offset,
+    so restoring it is a single `seek()`. Sequences are indexed directly from
+    the restored offset.
+    """
+    def __init__(self, items):
+        if hasattr(items, 'readline') and hasattr(items, 'seek'):
+            self.file = items
+            self.offset = None
+            it.__init__(self, iter(items.readline, items.read(0)))
+
+        elif hasattr(items, '__getitem__') and hasattr(items, '__len__'):
+            self.file = None
+            self.offset = 0
+            it.__init__(self, items)
+
+        else:
+            raise ChemicalException(
+                'Resumable: only sequences and seekable files can be resumed'
+            )
+
+        self.source = items
+
+    def __get_next__(self):
+        item = next(self.items)
+        if self.file is None:
+            self.offset += 1
+        return item
+
+    def save_state(self):
+        if self.file is not None:
+            return self.file.tell()
+        return self.offset
+
+    def load_state(self, state):
+        if self.file is not None:
+            self.file.seek(state)
+            return
+
+        source = self.source
+        self.offset = state
+        self.items = map(source.__getitem__, range(state, len(source)))
+        self._lower_bound = self._upper_bound = max(0, len(source) - state)
+
+
+def _resumable(stage):
+    "True if the progress of `stage` can be saved and restored."
+    if stage._resumable or type(stage).save_state is not it.save_state:
+        return True
+
+    # NOTE(pebaz): Plain wrappers around another stage, like `it(other)`
+    return (
+        type(stage) is it
+        and stage._trait is None
+        and stage.items is stage._upstream
+    )
+
+
+def _check(pipeline):
+    "Raises if `pipeline` contains a stage that can't be checkpointed."
+    stages = pipeline.stages()
+    for index, stage in enumerate(stages[1:], 1):
+        if not _resumable(stage):
+            name = stage._trait or type(stage).__name__
+            raise ChemicalException(
+                f'Checkpoint: stage {index} ({name}) holds on to or reads '
+                'ahead of elements, so it can\'t be resumed from a checkpoint'
+            )
+
+
+class Checkpoint:
+    """
+    Saves the state of a pipeline to `path` every `every` elements it yields,
+    and restores that state when a pipeline is resumed from the same path.
+    """
+    def __init__(self, path, every=10000):
+        if every <= 0:
+            raise ChemicalException('Checkpoint: every must be > 0')
+
+        self.path = path
+        self.every = every
+        self.saved = None
+
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                self.saved = pickle.load(file)
+
+    @property
+    def resumed(self):
+        "True if a saved checkpoint was found when this object was created."
+        return self.saved is not None
+
+    def source(self, items):
+        "Wraps a sequence or seekable file so that its position is saved."
+        return Resumable(items)
+
+    def save(self, pipeline, partial=None):
+        "Saves the state of every stage of `pipeline` and a `partial` result."
+        _check(pipeline)
+        snapshot = {
+            'stages': [stage.save_state() for stage in pipeline.stages()],
+            'partial': partial,
+        }
+
+        temporary = self.path + '.tmp'
+        try:
+            with open(temporary, 'wb') as file:
+                pickle.dump(snapshot, file)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ChemicalException(
+                'Checkpoint: the state of a stage could not be pickled'
+            ).with_traceback(e.__traceback__) from e
+
+        # NOTE(pebaz): Never leave a half-written checkpoint behind
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        "Removes the saved checkpoint, if any."
+        self.saved = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def restore(self, pipeline):
+        """
+        Loads saved stage states into `pipeline`, returning the saved partial
+        result, or `None` if there is nothing to restore.
+
+        Raises if the pipeline contains a stage that can't be resumed.
+        """
+        _check(pipeline)
+        if self.saved is None:
+            return None
+
+        stages = pipeline.stages()
+        states = self.saved['stages']
+        if len(states) != len(stages):
+            raise ChemicalException(
+                f'Checkpoint: saved pipeline had {len(states)} stages but '
+                f'this one has {len(stages)}'
+            )
+
+        if not isinstance(stages[0], Resumable):
+            raise ChemicalException(
+                'Checkpoint: the pipeline source must come from source()'
+            )
+
+        for stage, state in zip(stages, states):
+            if state is not None:
+                stage.load_state(state)
+
+        return self.saved['partial']
+
+    def track(self, pipeline):
+        """
+        Yields the elements of `pipeline`, resuming from and periodically
+        saving a checkpoint.
+        """
+        self.restore(pipeline)
+        every, count = self.every, 0
+        for item in pipeline:
+            yield item
+            count += 1
+            if count == every:
+                self.save(pipeline)
+                count = 0
+        self.clear()
+
+    def fold(self, pipeline, seed, closure):
+        """
+        Folds `pipeline` just like the `fold()` trait, also saving the
+        accumulator in each checkpoint so that it is resumed too.
+        """
+        partial = self.restore(pipeline)
+        acc = Ref(seed if partial is None else partial)
+        every, count = self.every, 0
+        for item in pipeline:
+            closure(acc, item)
+            count += 1
+            if count == every:
+                self.save(pipeline, acc.get())
+                count = 0
+        self.clear()
+        return acc.get()
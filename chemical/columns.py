@@ -0,0 +1,154 @@
+"""
+Columnar storage for iterators of records.
+
+A list of tuples stores every field of every row as a separate object. A
+`Columns` table stores each field in its own column instead, using a compact
+`array.array` for columns that hold only ints or only floats.
+"""
+
+from array import array
+from itertools import islice
+from . import ChemicalException
+
+
+_BATCH = 4096
+
+_TYPECODES = {int: 'q', float: 'd'}
+
+
+class _Column:
+    """
+    Accumulates the values of one field, as an `array.array` while every value
+    has the same numeric type and as a list from the first one that does not.
+    """
+    def __init__(self, typed):
+        self.values = None if typed else []
+
+    def extend(self, values):
+        if self.values is None or type(self.values) is array:
+            kinds = set(map(type, values))
+            typecode = _TYPECODES.get(kinds.pop()) if len(kinds) == 1 else None
+
+            if self.values is None:
+                self.values = array(typecode) if typecode else []
+            elif typecode != self.values.typecode:
+                self.demote()
+
+        if type(self.values) is array:
+            size = len(self.values)
+            try:
+                self.values.extend(values)
+                return
+            except OverflowError:
+                del self.values[size:]
+                self.demote()
+
+        self.values.extend(values)
+
+    def demote(self):
+        self.values = self.values.tolist()
+
+
+def _transpose(rows, width, typed, name):
+    """
+    Returns the columns of `rows`, which must all have `width` fields, filling
+    them a batch of rows at a time. If `width` is None it is taken from the
+    first row.
+    """
+    rows = iter(rows)
+    columns = None if width is None else [_Column(typed) for _ in range(width)]
+
+    batch = list(islice(rows, _BATCH))
+    while batch:
+        if columns is None:
+            width = len(batch[0])
+            columns = [_Column(typed) for _ in range(width)]
+
+        try:
+            unbalanced = any(len(row) != width for row in batch)
+        except TypeError as e:
+            raise ChemicalException(
+                f'{name}: every element must be a collection of fields'
+            ).with_traceback(e.__traceback__) from e
+
+        if unbalanced:
+            raise ChemicalException(
+                f'{name}: every element must have exactly {width} fields'
+            )
+
+        for column, values in zip(columns, zip(*batch)):
+            column.extend(values)
+
+        batch = list(islice(rows, _BATCH))
+
+    return [
+        [] if column.values is None else column.values
+        for column in columns or []
+    ]
+
+
+class Columns:
+    """
+    A table of records stored as one sequence per field.
+
+    Rows are rebuilt as tuples on demand, so `it(columns)` iterates the records
+    lazily and can be reversed. Use `column()` to work on a whole field at
+    once, e.g. to feed a vectorized stage.
+
+    **Examples**
+
+        :::python
+
+        table = it('abc').enumerate().collect_columns(['index', 'letter'])
+        assert len(table) == 3
+        assert table[1] == (1, 'b')
+        assert table.column('index') == array('q', [0, 1, 2])
+        assert it(table).rev().next() == (2, 'c')
+    """
+    def __init__(self, columns, names=None):
+        self.columns = list(columns)
+        self.names = list(names) if names is not None else None
+
+        if self.names is not None and len(self.names) != len(self.columns):
+            raise ChemicalException(
+                f'Columns: got {len(self.names)} names for '
+                f'{len(self.columns)} columns'
+            )
+
+        if len({len(column) for column in self.columns}) > 1:
+            raise ChemicalException('Columns: columns must be the same length')
+
+    @classmethod
+    def from_rows(cls, rows, names=None, typed=True):
+        """
+        Builds a table from an iterable of equally sized tuples. If `names` is
+        given, every row must have one field per name.
+        """
+        width = None if names is None else len(names)
+        return cls(_transpose(rows, width, typed, 'collect_columns'), names)
+
+    def column(self, key):
+        "Returns a column by its name or index."
+        if isinstance(key, str):
+            if self.names is None or key not in self.names:
+                raise ChemicalException(f'Columns: no column named "{key}"')
+            key = self.names.index(key)
+        return self.columns[key]
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(*(column[index] for column in self.columns)))
+        return tuple(column[index] for column in self.columns)
+
+    def __iter__(self):
+        return zip(*self.columns)
+
+    def __reversed__(self):
+        return zip(*(reversed(column) for column in self.columns))
+
+    def __repr__(self):
+        names = self.names or list(range(len(self.columns)))
+        return f'<Columns {names} with {len(self)} rows>'
@@ -0,0 +1,740 @@
+"""
+Sources that read records from files in large blocks, and sinks that write
+them in large batches.
+
+`it(open(path)).map(json.loads)` reads and parses one line at a time. The
+sources in this module read the file in blocks of `block_size` bytes, cut each
+block after its last complete record and parse whole blocks at once. Given
+more than one process, blocks are parsed in a pool of worker processes while
+records are still returned in file order:
+
+    :::python
+
+    users = it.from_jsonl('events.jsonl', fields=['user'], processes=4)
+    assert users.next() == ('pebaz',)
+
+`it.from_compressed` returns the lines of a gzip, bzip2 or xz file, and can
+decompress the members of a multi-member file in parallel.
+
+The sinks do the opposite, joining records into large batches that are each
+written with a single call:
+
+    :::python
+
+    written = users.map(lambda user: user[0]).write_lines('users.txt.gz')
+    print(written.records, written.bytes)
+
+Only the records of a few blocks per process are held in memory at a time.
+JSON Lines files must be UTF-8, and CSV files must use an encoding in which a
+newline is the byte `\\n`, which UTF-8 and Latin-1 do.
+"""
+
+import os
+from collections import namedtuple
+from . import it, trait, ChemicalException, _raw
+
+
+_BLOCK_SIZE = 1 << 20
+
+_BATCH = 8192
+
+_CODECS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+Written = namedtuple('Written', 'records bytes')
+Written.__doc__ = (
+    "The number of records and bytes, before compression, a sink wrote."
+)
+
+
+def _jsonl_boundary(block, quoted):
+    "Returns where the last complete line in `block` ends."
+    return block.rfind(b'\n') + 1, False
+
+
+def _csv_boundary(quote):
+    """
+    Returns a function finding where the last complete CSV row in a block
+    ends. A newline only ends a row if it isn't inside quotes, which is the
+    case when an even number of quote characters come before it.
+
+    The function is also told whether the text carried over from earlier
+    blocks ends inside quotes, and returns that for the text it leaves over,
+    so that quotes are only ever counted once.
+    """
+    def boundary(block, quoted):
+        total = quotes = quoted + block.count(quote)
+        end = len(block)
+        while True:
+            newline = block.rfind(b'\n', 0, end)
+            if newline < 0:
+                return 0, total % 2 == 1
+            quotes -= block.count(quote, newline, end)
+            if quotes % 2 == 0:
+                return newline + 1, (total - quotes) % 2 == 1
+            end = newline
+    return boundary
+
+
+def _blocks(path, block_size, boundary, offset=0):
+    "Reads `path` in blocks that each end after a complete record."
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        pending, quoted = [], False
+        for block in iter(lambda: f.read(block_size), b''):
+            end, quoted = boundary(block, quoted)
+            if not end:
+                # NOTE(pebaz): The record is longer than a block, keep reading
+                pending.append(block)
+                continue
+            pending.append(block[:end])
+            yield b''.join(pending)
+            pending = [block[end:]] if end < len(block) else []
+
+        if pending:
+            yield b''.join(pending)
+
+
+def _parse_jsonl(block, fields):
+    "Parses a block of JSON Lines, keeping only `fields` if given."
+    from json import JSONDecoder
+
+    # NOTE(pebaz): Decoding the block once is much faster than letting
+    # `json.loads` detect the encoding of every line. `str.splitlines` can't
+    # be used since JSON strings may contain characters like U+2028.
+    decode = JSONDecoder().decode
+    records = [
+        decode(line) for line in block.decode('utf-8').split('\n')
+        if line and not line.isspace()
+    ]
+    if fields is None:
+        return records
+    return [tuple(map(record.get, fields)) for record in records]
+
+
+def _parse_csv(block, encoding, columns, fmtparams):
+    "Parses a block of CSV rows, keeping only `columns` if given."
+    import csv, io
+    from operator import itemgetter
+
+    text = io.StringIO(block.decode(encoding), newline='')
+    rows = filter(None, csv.reader(text, **fmtparams))
+    if columns is None:
+        return list(rows)
+
+    if len(columns) == 1:
+        column, = columns
+        return [(row[column],) for row in rows]
+
+    pick = itemgetter(*columns)
+    return [pick(row) for row in rows]
+
+
+def _processes(processes, name):
+    if processes is None:
+        return os.cpu_count() or 1
+    if processes < 1:
+        raise ChemicalException(f'{name}: processes must be >= 1')
+    return processes
+
+
+def ordered_map(func, items, processes):
+    """
+    Calls `func` on each element in a pool of `processes` worker processes,
+    returning the results in order. Only twice as many elements as there are
+    processes are sent to the pool ahead of the result being returned, so
+    large inputs are streamed rather than queued up all at once.
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(pool.submit(func, item))
+                if len(pending) >= 2 * processes:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _records(blocks, parse, processes):
+    from itertools import chain
+
+    if processes == 1:
+        parsed = map(parse, blocks)
+    else:
+        parsed = ordered_map(parse, blocks, processes)
+    return it(chain.from_iterable(parsed), None, (0, None))
+
+
+def from_jsonl(path, fields=None, processes=1, block_size=_BLOCK_SIZE):
+    """
+    Returns an iterator over the records of a JSON Lines file, skipping blank
+    lines.
+
+    If `fields` is given, each record is a tuple of the values of those keys,
+    with `None` for missing keys, which is cheaper to send back from worker
+    processes than a whole object. Blocks are parsed in `processes` worker
+    processes if more than one is given, or one per CPU if it is `None`.
+
+    **Examples**
+
+        :::python
+
+        events = it.from_jsonl('events.jsonl')
+        assert events.next() == {'user': 'pebaz', 'action': 'login'}
+
+        users = it.from_jsonl('events.jsonl', fields=['user'], processes=4)
+        assert users.next() == ('pebaz',)
+    """
+    from functools import partial
+
+    if block_size < 1:
+        raise ChemicalException('from_jsonl: block_size must be >= 1')
+
+    processes = _processes(processes, 'from_jsonl')
+    fields = None if fields is None else tuple(fields)
+    return _records(
+        _blocks(path, block_size, _jsonl_boundary),
+        partial(_parse_jsonl, fields=fields),
+        processes
+    )
+
+
+def from_csv(
+    path, fields=None, header=True, processes=1, block_size=_BLOCK_SIZE,
+    encoding='utf-8', **fmtparams
+):
+    """
+    Returns an iterator over the rows of a CSV file as lists of strings, like
+    `csv.reader`, skipping blank rows. Formatting parameters like `delimiter`
+    are passed on to `csv.reader`.
+
+    If `header` is `True`, the first row names the columns and is skipped.
+    If `fields` is given, each row is a tuple of only those columns, named or
+    numbered from 0. Blocks are parsed in `processes` worker processes if more
+    than one is given, or one per CPU if it is `None`.
+
+    **Examples**
+
+        :::python
+
+        rows = it.from_csv('scores.csv')
+        assert rows.next() == ['pebaz', '42', 'blue']
+
+        scores = it.from_csv('scores.csv', fields=['name', 'score'])
+        assert scores.next() == ('pebaz', '42')
+    """
+    import csv, io
+    from functools import partial
+
+    if block_size < 1:
+        raise ChemicalException('from_csv: block_size must be >= 1')
+
+    processes = _processes(processes, 'from_csv')
+
+    offset = 0
+    names = None
+    if header:
+        with open(path, 'rb') as f:
+            line = f.readline()
+        offset = len(line)
+        text = io.StringIO(line.decode(encoding), newline='')
+        names = next(csv.reader(text, **fmtparams), [])
+
+    columns = None
+    if fields is not None:
+        columns = []
+        for field in fields:
+            if isinstance(field, str):
+                if names is None or field not in names:
+                    raise ChemicalException(
+                        f'from_csv: no column named "{field}"'
+                    )
+                field = names.index(field)
+            columns.append(field)
+        columns = tuple(columns)
+
+    quote = fmtparams.get('quotechar', '"')
+    boundary = _jsonl_boundary
+    if quote:
+        boundary = _csv_boundary(quote.encode(encoding))
+
+    return _records(
+        _blocks(path, block_size, boundary, offset),
+        partial(
+            _parse_csv, encoding=encoding, columns=columns, fmtparams=fmtparams
+        ),
+        processes
+    )
+
+
+_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+}
+
+# NOTE(pebaz): Longer patterns than the magic numbers above so that fewer
+# places inside compressed data are mistaken for the start of a member
+_MEMBER = {
+    'gzip': br'\x1f\x8b\x08',
+    'bz2': br'BZh[1-9]1AY&SY',
+}
+
+
+def _detect(path):
+    "Returns the codec `path` is compressed with, going by its first bytes."
+    with open(path, 'rb') as f:
+        head = f.read(max(map(len, _MAGIC.values())))
+    for codec, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def _decompressor(codec):
+    if codec == 'gzip':
+        import zlib
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if codec == 'bz2':
+        import bz2
+        return bz2.BZ2Decompressor()
+    import lzma
+    return lzma.LZMADecompressor()
+
+
+class _Members:
+    """
+    Decompresses the members of a file one after the other, starting with the
+    one at byte `start` and ending with the first one that ends at or after
+    byte `stop`. Once iterated, `end` is where the last member ended.
+    """
+    def __init__(self, path, codec, start=0, stop=None):
+        self.path = path
+        self.codec = codec
+        self.start = start
+        self.stop = stop
+        self.end = None
+
+    def __iter__(self):
+        magic = _MAGIC[self.codec]
+        with open(self.path, 'rb') as f:
+            f.seek(self.start)
+            offset = self.start
+            data = b''
+            while self.stop is None or offset < self.stop:
+                if len(data) < len(magic):
+                    data += f.read(_BLOCK_SIZE)
+                if not data:
+                    break
+
+                if not data.startswith(magic):
+                    # NOTE(pebaz): Files may be padded with null bytes
+                    if not data.strip(b'\0') and not f.read().strip(b'\0'):
+                        break
+                    raise ChemicalException(
+                        f'from_compressed: expected a {self.codec} member at '
+                        f'byte {offset} of {self.path}'
+                    )
+
+                decompressor = _decompressor(self.codec)
+                while True:
+                    if not data:
+                        data = f.read(_BLOCK_SIZE)
+                        if not data:
+                            raise ChemicalException(
+                                f'from_compressed: {self.path} ends in the '
+                                f'middle of a {self.codec} member'
+                            )
+
+                    try:
+                        piece = decompressor.decompress(data)
+                    except Exception as e:
+                        raise ChemicalException(
+                            f'from_compressed: could not decompress the '
+                            f'{self.codec} data in {self.path} near byte '
+                            f'{offset}: {e}'
+                        ).with_traceback(e.__traceback__) from e
+
+                    if piece:
+                        yield piece
+
+                    if decompressor.eof:
+                        rest = decompressor.unused_data
+                        offset += len(data) - len(rest)
+                        data = rest
+                        break
+
+                    offset += len(data)
+                    data = b''
+
+        self.end = offset
+
+
+def _inflate(task):
+    """
+    Runs in a worker: decompresses the members from a possible member start
+    onwards. Returns `(start, end, data, error)`.
+    """
+    path, codec, start, stop = task
+    members = _Members(path, codec, start, stop)
+    try:
+        data = b''.join(members)
+    except ChemicalException as e:
+        return start, None, None, str(e)
+    return start, members.end, data, None
+
+
+def _member_starts(path, codec):
+    "Yields every offset in `path` that looks like the start of a member."
+    import re
+
+    pattern = re.compile(_MEMBER[codec])
+    with open(path, 'rb') as f:
+        base = 0
+        data = b''
+        for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+            # NOTE(pebaz): Keep the end of the last block in case a header
+            # straddles the two, but only report headers that end in this one
+            tail = data[-16:]
+            base += len(data) - len(tail)
+            data = tail + block
+            for match in pattern.finditer(data):
+                if match.end() > len(tail):
+                    yield base + match.start()
+
+
+def _tasks(path, codec, block_size):
+    """
+    Splits `path` into parts of about `block_size` compressed bytes that each
+    begin where a member seems to start.
+    """
+    last = 0
+    for start in _member_starts(path, codec):
+        if start >= last + block_size:
+            yield path, codec, last, start
+            last = start
+    yield path, codec, last, None
+
+
+def _inflate_parallel(path, codec, processes, block_size):
+    """
+    Yields the decompressed parts of `path` in order.
+
+    When compressed data happens to look like a member header, the part before
+    it runs on to the end of the member and the part starting there is dropped.
+    Members between the end of one part and the start of the next are then
+    decompressed in this process.
+    """
+    expected = 0
+    results = ordered_map(_inflate, _tasks(path, codec, block_size), processes)
+    for start, end, data, error in results:
+        if start > expected:
+            gap = _Members(path, codec, expected, start)
+            yield from gap
+            expected = gap.end
+
+        if start < expected:
+            continue
+
+        if error is not None:
+            raise ChemicalException(error)
+        expected = end
+        yield data
+
+    yield from _Members(path, codec, expected)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(_BLOCK_SIZE), b'')
+
+
+def _decode(chunks, encoding, errors):
+    from codecs import getincrementaldecoder
+
+    decoder = getincrementaldecoder(encoding)(errors)
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', True)
+
+
+def from_compressed(
+    path, processes=1, encoding='utf-8', errors='strict',
+    block_size=16 * _BLOCK_SIZE
+):
+    """
+    Returns an iterator over the lines of a file that may be compressed with
+    gzip, bzip2 or xz, telling which from the first bytes of the file. Lines
+    are decoded with `encoding`, or left as `bytes` if it is `None`, and their
+    `\\n` or `\\r\\n` line endings are removed.
+
+    Files made of several gzip or bzip2 members one after the other, as many
+    log shippers write them, are decompressed in `processes` worker processes
+    if more than one is given, or one per CPU if it is `None`. Each worker is
+    given about `block_size` compressed bytes' worth of members, and lines are
+    returned in file order. Other files are decompressed in this process.
+
+    **Examples**
+
+        :::python
+
+        errors = it.from_compressed('app.log.gz', processes=4).filter(
+            lambda line: 'ERROR' in line
+        )
+    """
+    from .text import _LINES, _stream
+
+    if block_size < 1:
+        raise ChemicalException('from_compressed: block_size must be >= 1')
+
+    processes = _processes(processes, 'from_compressed')
+    codec = _detect(path)
+
+    if codec is None:
+        chunks = _read(path)
+    elif processes > 1 and codec in _MEMBER:
+        chunks = _inflate_parallel(path, codec, processes, block_size)
+    else:
+        chunks = iter(_Members(path, codec))
+
+    if encoding is not None:
+        chunks = _decode(chunks, encoding, errors)
+
+    pattern = _LINES[encoding is None]
+    return it(_stream(chunks, pattern, 'lines', False), None, (0, None))
+
+
+def _open_compressed(raw, codec):
+    "Wraps the binary file `raw` in a compressor for `codec`."
+    if codec == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=raw, mode='wb')
+    if codec == 'bz2':
+        import bz2
+        return bz2.BZ2File(raw, 'wb')
+    import lzma
+    return lzma.LZMAFile(raw, 'wb')
+
+
+def _temporary(path):
+    """
+    Creates a new file next to `path` to be renamed over it once written,
+    returning its descriptor and name. Unlike `tempfile.mkstemp()`, which
+    only lets the owner read the file, its permissions follow the umask the
+    way those of a file created by `open()` do.
+    """
+    directory, base = os.path.split(os.path.abspath(path))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        temp = os.path.join(directory, f'.{base}.{os.urandom(6).hex()}.tmp')
+        try:
+            return os.open(temp, flags, 0o666), temp
+        except FileExistsError:
+            continue
+
+
+def _sink(self, name, target, encode, batch, fsync_every, atomic, compression):
+    """
+    Writes the elements of `self` to `target` in batches of `batch` elements,
+    each turned into bytes by a single call to `encode`.
+    """
+    from itertools import islice
+
+    if batch < 1:
+        raise ChemicalException(f'{name}: batch must be >= 1')
+    if fsync_every is not None and fsync_every < 1:
+        raise ChemicalException(f'{name}: fsync_every must be >= 1')
+    if compression not in (None, 'infer') + tuple(_CODECS.values()):
+        raise ChemicalException(
+            f'{name}: compression must be gzip, bz2, xz, "infer" or None, '
+            f'not {compression!r}'
+        )
+
+    if hasattr(target, 'write'):
+        if atomic or compression not in (None, 'infer'):
+            raise ChemicalException(
+                f'{name}: atomic writes and compression need a path, not a '
+                'file'
+            )
+        raw, path, temp, codec = target, None, None, None
+
+    else:
+        path = os.fspath(target)
+        codec = compression
+        if compression == 'infer':
+            codec = _CODECS.get(os.path.splitext(path)[1].lower())
+
+        if atomic:
+            handle, temp = _temporary(path)
+            raw = os.fdopen(handle, 'wb')
+        else:
+            temp = None
+            raw = open(path, 'wb')
+
+    records = nbytes = unsynced = 0
+    try:
+        out = _open_compressed(raw, codec) if codec else raw
+        try:
+            items = _raw(self)
+            for chunk in iter(lambda: list(islice(items, batch)), []):
+                count = len(chunk)
+                data = encode(chunk)
+                out.write(data)
+                records += count
+                nbytes += len(data)
+
+                unsynced += count
+                if fsync_every is not None and unsynced >= fsync_every:
+                    unsynced = 0
+                    out.flush()
+                    raw.flush()
+                    os.fsync(raw.fileno())
+        finally:
+            if out is not raw:
+                out.close()
+
+        if path is not None:
+            raw.flush()
+            # NOTE(pebaz): The data must be on disk before the rename makes
+            # it visible, or a crash could leave an empty file behind
+            if atomic or fsync_every is not None:
+                os.fsync(raw.fileno())
+            raw.close()
+            if temp is not None:
+                # NOTE(pebaz): The file being replaced keeps its permissions
+                try:
+                    os.chmod(temp, os.stat(path).st_mode & 0o7777)
+                except FileNotFoundError:
+                    pass
+                os.replace(temp, path)
+
+    except BaseException:
+        if path is not None:
+            raw.close()
+            if temp is not None:
+                os.unlink(temp)
+        raise
+
+    return Written(records, nbytes)
+
+
+def _encode_lines(encoding):
+    def encode(lines):
+        if isinstance(lines[0], str):
+            lines.append('')
+            return '\n'.join(lines).encode(encoding)
+        lines.append(b'')
+        return b'\n'.join(lines)
+    return encode
+
+
+@trait
+def write_lines(
+    self, target, batch=_BATCH, fsync_every=None, atomic=False,
+    compression='infer', encoding='utf-8'
+):
+    """
+    Writes each element, a `str` or a bytes-like object, on its own line and
+    returns how many records and bytes were written.
+
+    `target` is a path or a binary file. Elements are joined in batches of
+    `batch` and each batch is written with one call. With `fsync_every`, the
+    file is synced to disk whenever that many more records have been written.
+    If `atomic` is `True`, a temporary file is written and then renamed over
+    `target`, so readers never see a partial file; an existing `target` keeps
+    its permissions. Paths ending in `.gz`, `.bz2` or `.xz` are compressed
+    unless `compression` says otherwise.
+
+    **Examples**
+
+        :::python
+
+        written = it(['a', 'b']).write_lines('out.txt')
+        assert written == (2, 4)
+        assert it(range(100)).map(str).write_lines('out.gz', atomic=True)
+    """
+    return _sink(
+        self, 'write_lines', target, _encode_lines(encoding), batch,
+        fsync_every, atomic, compression
+    )
+
+
+@trait
+def to_jsonl(
+    self, target, batch=_BATCH, fsync_every=None, atomic=False,
+    compression='infer', **kwargs
+):
+    """
+    Writes each element as a line of JSON and returns how many records and
+    bytes were written. Keyword arguments like `sort_keys` are passed to
+    `json.JSONEncoder`; the other arguments work like those of `write_lines`.
+
+    **Examples**
+
+        :::python
+
+        it([{'a': 1}, [2]]).to_jsonl('out.jsonl')
+        assert it.from_jsonl('out.jsonl').collect() == [{'a': 1}, [2]]
+    """
+    from json import JSONEncoder
+
+    dumps = JSONEncoder(**kwargs).encode
+
+    def encode(records):
+        lines = list(map(dumps, records))
+        lines.append('')
+        return '\n'.join(lines).encode('utf-8')
+
+    return _sink(
+        self, 'to_jsonl', target, encode, batch, fsync_every, atomic,
+        compression
+    )
+
+
+@trait
+def to_csv(
+    self, target, header=None, batch=_BATCH, fsync_every=None, atomic=False,
+    compression='infer', encoding='utf-8', **fmtparams
+):
+    """
+    Writes each element as a row of CSV, after the column names in `header`
+    if given, and returns how many records and bytes were written. The header
+    isn't counted as a record. Formatting parameters like `delimiter` are
+    passed to `csv.writer`; the other arguments work like those of
+    `write_lines`.
+
+    **Examples**
+
+        :::python
+
+        it([(1, 'a'), (2, 'b')]).to_csv('out.csv', header=['id', 'name'])
+        assert it.from_csv('out.csv').collect() == [['1', 'a'], ['2', 'b']]
+    """
+    import csv, io
+
+    def encode(rows):
+        text = io.StringIO()
+        writer = csv.writer(text, **fmtparams)
+        writer.writerows(rows)
+        return text.getvalue().encode(encoding)
+
+    rows = self
+    if header is not None:
+        from itertools import chain
+        rows = it(chain([header], _raw(self)))
+
+    written = _sink(
+        rows, 'to_csv', target, encode, batch, fsync_every, atomic,
+        compression
+    )
+    return written if header is None else written._replace(
+        records=written.records - 1
+    )
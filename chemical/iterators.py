@@ -23,14 +23,30 @@ class Skip(it):
         if self._upper_bound:
             self._upper_bound -= times
     
-    def __get_next__(self):
+    def _skip(self):
         while self.times > 0:
             next(self.items)
-            next(self.reverse)
+            if self.reverse is not None:
+                next(self.reverse)
             self.times -= 1
 
+    def __get_next__(self):
+        self._skip()
         return next(self.items)
 
+    def _back(self, pull):
+        def skip_then_pull():
+            # NOTE(pebaz): Skipped elements can't be taken from the back either
+            self._skip()
+            return pull()
+        return skip_then_pull
+
+    def save_state(self):
+        return self.times
+
+    def load_state(self, state):
+        self.times = state
+
     def __get_reversed__(self):
         """
         Although subtle, it is important that `next(self.items)` is called the
@@ -65,6 +81,8 @@ class Step(it):
         assert it(range(10)).step_by(2).collect() == [0, 2, 4, 6, 8]
         assert it(range(10)).rev().step_by(3).collect() == [9, 6, 3, 0]
     """
+    _resumable = True
+
     def __init__(self, items, step):
         it.__init__(self, items)
         self.step = step
@@ -86,8 +104,29 @@ class Step(it):
         return it(Step(self.reverse, self.step), self.items, self.size_hint())
 
 
-@trait
-def filter(self, filter_func):
+def _map_back(pull, closure):
+    return lambda: closure(pull())
+
+
+def _filter_back(pull, closure):
+    def filtered():
+        item = pull()
+        while not closure(item):
+            item = pull()
+        return item
+    return filtered
+
+
+def _inspect_back(pull, func):
+    def inspected():
+        item = pull()
+        func(item)
+        return item
+    return inspected
+
+
+@trait.stage(size='shrink', back=_filter_back, resumable=True)
+def filter(items, filter_func):
     """
     Filters out elements of the iterator based on the provided lambda.
 
@@ -98,11 +137,7 @@ def filter(self, filter_func):
         assert it(range(5)).filter(lambda x: not x % 2).collect() == [0, 2, 4]
         assert it('abcd').filter(lambda x: x in 'bd').collect(str) == 'bd'
     """
-    return it(
-        (i for i in self if filter_func(i)),
-        (i for i in self.reverse if filter_func(i)),
-        (0, self._upper_bound)
-    )
+    return (i for i in items if filter_func(i))
 
 
 @trait
@@ -118,11 +153,54 @@ def take(self, num_items):
         assert it(range(5)).rev().take(3).collect() == [4, 3, 2]
     """
     taken = [next(self) for i in range(num_items)]
-    return it(iter(taken), reversed(taken), [num_items] * 2)
+    result = it(iter(taken), reversed(taken), [num_items] * 2)
+    result._buffer = taken
+    return result
 
 
-@trait
-def take_while(self, closure):
+@trait('islice')
+def islice_it(self, start, stop=None):
+    """
+    Lazily returns the elements from index `start` up to but not including
+    index `stop`, or to the end of the iterator if `stop` is None.
+
+    Unlike `skip(start).take(stop - start)`, elements are pulled one at a time
+    and running out of elements early is not an error.
+
+    **Examples**
+
+        :::python
+
+        assert it(range(10)).islice(2, 5).collect() == [2, 3, 4]
+        assert it(range(10)).islice(8).collect() == [8, 9]
+        assert it(range(10)).islice(2, 5).rev().collect() == [4, 3, 2]
+    """
+    from itertools import islice
+
+    if start < 0 or (stop is not None and stop < 0):
+        raise ChemicalException('islice: start and stop must be >= 0')
+
+    lower, upper = self.size_hint()
+    clamp = lambda bound: max(0, bound - start)
+    bounds = (
+        clamp(lower if stop is None else min(lower, stop)),
+        None if upper is None and stop is None else clamp(
+            min(bound for bound in (upper, stop) if bound is not None)
+        )
+    )
+
+    # NOTE(pebaz): The back end of the slice can only be found from the back of
+    # the iterator if its length is known
+    reverse = None
+    if self.reverse is not None and lower == upper:
+        end = lower if stop is None else min(stop, lower)
+        reverse = islice(self.reverse, lower - end, max(0, lower - start))
+
+    return it(islice(self, start, stop), reverse, bounds)
+
+
+@trait.stage(size='shrink', back=_filter_back, resumable=True)
+def take_while(items, closure):
     """
     Only returns elements from the iterator while a given function returns True.
 
@@ -132,11 +210,7 @@ def take_while(self, closure):
 
         assert it('ab7f').take_while(lambda x: x.isalpha()).collect(str) == 'ab'
     """
-    return it(
-        (i for i in self if closure(i)),
-        it(i for i in self.reverse if closure(i)),
-        (0, self.size_hint()[1])
-    )
+    return (i for i in items if closure(i))
 
 
 @trait
@@ -145,6 +219,10 @@ class Peekable(it):
     Adds a method to any iterator that allows the next element to be revealed
     without consuming it.
 
+    Elements are only pulled from the underlying iterator when they are
+    needed, and peeked elements are buffered in a deque so that looking
+    several elements ahead is cheap.
+
     **Examples**
 
         :::python
@@ -156,51 +234,98 @@ class Peekable(it):
         assert itr.next() == 'b'
         assert itr.peek() == 'c'
         assert itr.next() == 'c'
+
+        itr = it('abcd').peekable()
+        assert itr.peek_n(3) == ['a', 'b', 'c']
+        assert itr.peek_nth(3) == 'd'
+        assert itr.next_if(lambda x: x == 'a') == 'a'
+        assert itr.next_if(lambda x: x == 'a') is None
+        itr.putback('z')
+        assert itr.next() == 'z'
     """
     def __init__(self, items):
+        from collections import deque
+
         it.__init__(self, items)
-        self.ahead = None
-        self.done = False
-        self.can_peek = True
+        self.ahead = deque()
+        self._buffer = self.ahead
 
     def has_next(self):
         try:
             self.peek()
         except NothingToPeek:
-            self.can_peek = False
-        return self.can_peek
+            return False
+        return True
 
     def peek(self):
-        if self.done:
-            raise NothingToPeek()
+        "Returns the next element without consuming it."
+        ahead = self.ahead
+        if ahead:
+            return ahead[0]
+        return self.peek_nth(0)
 
-        if not self.ahead:
-            try:
-                self.ahead = next(self.items)
-            except StopIteration as e:
-                #self.done = True
-                raise NothingToPeek().with_traceback(e.__traceback__) from e
+    def peek_nth(self, index):
+        """
+        Returns the element `index` positions ahead without consuming anything,
+        where `peek_nth(0)` is the same as `peek()`.
+        """
+        if index < 0:
+            raise ChemicalException('peek_nth: index must be >= 0')
 
-        return self.ahead
+        ahead = self.ahead
+        try:
+            while len(ahead) <= index:
+                ahead.append(next(self.items))
+        except StopIteration as e:
+            raise NothingToPeek().with_traceback(e.__traceback__) from e
+        return ahead[index]
 
-    def __get_next__(self):
-        if self.done:
-            raise StopIteration()
+    def peek_n(self, count):
+        """
+        Returns a list of up to `count` upcoming elements without consuming
+        them. The list is shorter if the iterator runs out first.
+        """
+        from itertools import islice
+
+        if count < 0:
+            raise ChemicalException('peek_n: count must be >= 0')
+        if not count:
+            return []
 
         try:
-            if not self.ahead:
-                self.ahead = next(self.items)
-        except StopIteration as e:
-            pass
+            self.peek_nth(count - 1)
+        except NothingToPeek:
+            "Return however many elements there are"
+        return list(islice(self.ahead, count))
 
-        ret = self.ahead
+    def next_if(self, closure, default=None):
+        """
+        Consumes and returns the next element only if `closure` returns True
+        for it. Otherwise nothing is consumed and `default` is returned.
+        """
         try:
-            self.ahead = next(self.items)
-        except StopIteration:
-            self.done = True
-            return ret
+            item = self.peek()
+        except NothingToPeek:
+            return default
+        if closure(item):
+            return next(self)
+        return default
 
-        return ret
+    def putback(self, item):
+        "Pushes `item` back so that it is the next element returned."
+        self.ahead.appendleft(item)
+
+    def save_state(self):
+        return list(self.ahead)
+
+    def load_state(self, state):
+        self.ahead.clear()
+        self.ahead.extend(state)
+
+    def __get_next__(self):
+        if self.ahead:
+            return self.ahead.popleft()
+        return next(self.items)
 
 
 @trait('chain')
@@ -244,12 +369,24 @@ def cycle_it(self):
 
         assert it('123').cycle().take(6).collect(str) == '123123'
     """
-    from itertools import cycle
-    return it(cycle(self), it(cycle(self.reverse)))
+    def _cycle(items, saved):
+        for i in items:
+            saved.append(i)
+            yield i
+        while saved:
+            yield from saved
+
+    saved = []
+    result = it(
+        _cycle(self, saved),
+        it(_cycle(self.reverse, [])) if self.reverse is not None else None
+    )
+    result._buffer = saved
+    return result
 
 
-@trait('map')
-def map_it(self, closure):
+@trait.stage('map', back=_map_back, resumable=True)
+def map_it(items, closure):
     """
     Applies a given function to each element and returns the result instead.
 
@@ -259,15 +396,11 @@ def map_it(self, closure):
 
         assert it('abc').map(lambda x: x.upper()).collect(str) == 'ABC'
     """
-    return it(
-        map(closure, self),
-        map(closure, self.reverse),
-        self.size_hint()
-    )
+    return map(closure, items)
 
 
-@trait('enumerate')
-def enumerate_it(self):
+@trait.stage('enumerate')
+def enumerate_it(items):
     """
     Yields a tuple containing the position and the value of each element.
 
@@ -277,11 +410,11 @@ def enumerate_it(self):
 
         assert it((1, 2, 3)).enumerate().collect() == [(0, 1), (1, 2), (2, 3)]
     """
-    return it(enumerate(self), enumerate(self.reverse), self.size_hint())
+    return enumerate(items)
 
 
-@trait
-class Inspect(it):
+@trait.stage(back=_inspect_back, resumable=True)
+def inspect(items, func):
     """
     Allows a function to be applied to each element in an iterator without
     modifying it in any way.
@@ -302,6 +435,26 @@ class Inspect(it):
             .go()
         )
     """
+    for item in items:
+        func(item)
+        yield item
+
+
+class Inspect(it):
+    """
+    Calls `func` with each element of `items` as it passes through. Kept for
+    code that builds the stage directly; `it(items).inspect(func)` is faster.
+
+    **Examples**
+
+        :::python
+
+        seen = []
+        assert Inspect('abc', seen.append).collect(str) == 'abc'
+        assert seen == ['a', 'b', 'c']
+    """
+    _resumable = True
+
     def __init__(self, items, func):
         it.__init__(self, items)
         self.func = func
@@ -389,18 +542,33 @@ def flatten(self):
 
         assert it([[1], [2], [3]]).flatten().collect() == [1, 2, 3]
     """
-    links = it()
+    from itertools import chain
+
+    parts = []
     for i in self:
         try:
             iter(i)
-            links = links.chain(i)
+            parts.append(i)
         except TypeError:
-            links = links.chain([i])
-    return links
+            parts.append([i])
 
+    try:
+        size = sum(len(part) for part in parts)
+        bounds = size, size
+    except TypeError:
+        bounds = 0, None
+
+    result = it(
+        chain.from_iterable(parts),
+        chain.from_iterable(reversed(part) for part in reversed(parts)),
+        bounds
+    )
+    result._buffer = parts
+    return result
 
-@trait
-def for_each(self, closure):
+
+@trait.stage(back=_map_back, resumable=True)
+def for_each(items, closure):
     """
     Iterator version of a `for` loop.
 
@@ -413,11 +581,7 @@ def for_each(self, closure):
         # Prints each element on its own line.
         assert it('asdf').for_each(print)
     """
-    return it(
-        (closure(i) for i in self),
-        (closure(i) for i in self.reverse),
-        self.size_hint()
-    )
+    return map(closure, items)
 
 
 @trait
@@ -471,7 +635,7 @@ def fold(self, seed, closure):
 
 
 @trait
-def scan(self, seed, closure):
+class Scan(it):
     """
     An iterator adaptor similar to fold that holds internal state and produces a
     new iterator.
@@ -493,17 +657,96 @@ def scan(self, seed, closure):
             .collect()
         ) == [1, 2, 6]
     """
-    the_seed = Ref(seed)
+    def __init__(self, items, seed, closure):
+        it.__init__(self, items)
+        self.seed = Ref(seed)
+        self.closure = closure
 
-    return it(
-        (closure(the_seed, i) for i in self),
-        (closure(the_seed, i) for i in self.reverse),
-        self.size_hint()
-    )
+    def __get_next__(self):
+        return self.closure(self.seed, next(self.items))
+
+    def __get_reversed__(self):
+        backward = Scan(self.reverse, None, self.closure)
+        backward.seed = self.seed
+        return it(backward, self.items, self.size_hint())
+
+    def save_state(self):
+        return self.seed.get()
+
+    def load_state(self, state):
+        self.seed.set(state)
+
+
+# NOTE(pebaz): Keeps `from chemical import scan` working now that it's a class
+scan = Scan
+
+
+@trait('shared')
+class Shared(it):
+    """
+    Makes the iterator safe to pull from several threads at once.
+
+    Plain iterators are not thread-safe: two threads calling `next()` at the
+    same time can raise `ValueError: generator already executing` or lose
+    elements. A shared iterator hands out elements to each thread `batch` at
+    a time, so its lock is taken once per batch instead of once per element.
+    Every element goes to exactly one thread, and each thread receives its
+    elements in order.
+
+    Also available as `sync()`.
+
+    **Examples**
+
+        :::python
+
+        import threading
+
+        jobs = it(open('jobs.txt')).map(parse).shared(batch=32)
+
+        def worker():
+            for job in jobs:
+                run(job)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+    """
+    def __init__(self, items, batch=64):
+        import threading
+
+        if batch <= 0:
+            raise ChemicalException('shared: batch must be > 0')
+
+        it.__init__(self, items)
+        self.batch = batch
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def __next__(self):
+        # NOTE(pebaz): Most calls only touch this thread's current batch
+        try:
+            return next(self.local.pending)
+        except (AttributeError, StopIteration):
+            self._modified = True
+            return self.__get_next__()
+
+    def __get_next__(self):
+        from itertools import islice
+
+        with self.lock:
+            pending = iter(list(islice(self.items, self.batch)))
+        self.local.pending = pending
+        return next(pending)
+
+    def __get_reversed__(self):
+        return it(
+            Shared(self.reverse, self.batch), self.items, self.size_hint()
+        )
+
+
+trait('sync')(Shared)
 
 
 @trait
-def par_iter(self):
+def par_iter(self, workers=None):
     """
     Iterate through the elements of an iterator concurrently.
 
@@ -535,7 +778,10 @@ def par_iter(self):
         assert itr.next() == 1
         assert itr.next() == 2
 
-    Making HTTP requests is faster using `par_iter`:
+    Only the `map` stages right before `par_iter` run concurrently: their
+    functions are handed to a pool of `workers` threads, one per CPU by
+    default, while the rest of the pipeline is pulled from on the calling
+    thread. This makes waiting on HTTP requests overlap:
 
         :::python
         from requests import get as GET
@@ -545,49 +791,165 @@ def par_iter(self):
         results = (it(urls)
             .map(lambda u: GET(u))
             .map(lambda u: u.text if u.ok else u.reason)
-            .par_iter()
+            .par_iter(workers=16)
             .collect()
         )
     """
+    import multiprocessing
+
+    # NOTE(pebaz): Pulling from a generator can't happen on two threads at
+    # once, so only the functions of trailing maps are run in the pool, over
+    # elements pulled in order from the stage before them
+    stage, closures = self, []
+    while stage._trait == 'map' and stage._upstream is not None:
+        args, kwargs = stage._arguments
+        closures.append(args[0] if args else kwargs['closure'])
+        stage = stage._upstream
+    closures.reverse()
+
+    workers = workers or multiprocessing.cpu_count()
+    return it(
+        _concurrent(stage, closures, workers),
+        _lazy(lambda: _concurrent(stage.rev(), closures, workers))
+        if self.reverse is not None else None,
+        self.size_hint()
+    )
 
-    def _process_items(the_items):
-        yield
 
-        from concurrent.futures import ThreadPoolExecutor, as_completed, Future
-        import multiprocessing
+def _concurrent(items, closures, workers):
+    "Applies `closures` to each of `items` on a pool of threads, in order."
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import islice
 
-        num_cores = multiprocessing.cpu_count()
+    def apply(value):
+        for closure in closures:
+            value = closure(value)
+        return value
 
-        pool = ThreadPoolExecutor(max_workers=num_cores)
-        submitted = [None] * num_cores
-        completed = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(
+            pool.submit(apply, value) for value in islice(items, 2 * workers)
+        )
+        while pending:
+            for value in islice(items, 1):
+                pending.append(pool.submit(apply, value))
+            yield pending.popleft().result()
 
-        while not completed:
-            for i in range(num_cores):
-                submitted[i] = pool.submit(
-                    lambda s, idx: (idx, next(s)), the_items, i
-                )
 
-            for value in as_completed(submitted):
+class _Raised:
+    "Carries an error from the producer thread of `prefetch` to the consumer."
+    def __init__(self, error):
+        self.error = error
+
+
+def _prefetch(items, buffer, batch):
+    import threading, queue
+
+    stop = threading.Event()
+    done = object()
+
+    def put(value):
+        # NOTE(pebaz): Wake up now and then so an abandoned producer can exit
+        while not stop.is_set():
+            try:
+                buffer.put(value, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+
+    def produce():
+        try:
+            if batch == 1:
+                for item in items:
+                    if stop.is_set():
+                        return
+                    put(item)
+            else:
+                chunk = []
                 try:
-                    index, val = value.result()
-                    submitted[index] = val
-                except StopIteration:
-                    completed = True
+                    for item in items:
+                        chunk.append(item)
+                        if len(chunk) == batch:
+                            put(chunk)
+                            chunk = []
+                            if stop.is_set():
+                                return
+                finally:
+                    # NOTE(pebaz): Hand over what was pulled before an error
+                    if chunk:
+                        put(chunk)
+            put(done)
+        except BaseException as e:
+            put(_Raised(e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            value = buffer.get()
+            if value is done:
+                return
+            if type(value) is _Raised:
+                raise value.error
+            if batch == 1:
+                yield value
+            else:
+                yield from value
+    finally:
+        stop.set()
+
+
+@trait
+def prefetch(self, n=16, batch=1):
+    """
+    Reads ahead up to `n` elements from the iterator in a background thread.
+
+    Lets a slow source (a file, a socket, a database cursor) keep producing
+    while the rest of the pipeline is busy with the elements already fetched.
+    Unlike `par_iter`, there is only one producer and the order of elements is
+    always kept.
+
+    If `batch` is greater than 1, elements are passed between threads in lists
+    of `batch` elements and up to `n` of those lists are buffered, which cuts
+    the locking overhead for cheap elements.
 
-            for value in submitted:
-                if not isinstance(value, Future):
-                    yield value
+    Exceptions raised by the upstream pipeline are raised from `next()` when
+    the consumer reaches them. The background thread is started on the first
+    call to `next()` and stops shortly after the consumer is done with the
+    iterator, even if it stopped early.
+
+    **Examples**
+
+        :::python
 
+        lines = (it(open('huge.log'))
+            .prefetch(1024, batch=64)
+            .map(parse)
+            .collect()
+        )
 
-    # Prevent from continuing right off the bat by returning None initially.
-    # E.g. subsequent calls to next() will yield actual values.
-    forward = _process_items(self.items)
-    backward = _process_items(self.rev())
-    next(forward)
-    next(backward)
+        assert it(range(5)).prefetch(2).collect() == [0, 1, 2, 3, 4]
+    """
+    if n <= 0:
+        raise ChemicalException(f'Prefetch: n must be > 0, got {n}')
+    if batch <= 0:
+        raise ChemicalException(f'Prefetch: batch must be > 0, got {batch}')
+
+    from queue import Queue
+
+    buffer = Queue(n)
+    result = it(
+        _prefetch(self, buffer, batch),
+        _prefetch(self.reverse, Queue(n), batch)
+        if self.reverse is not None else None,
+        self.size_hint()
+    )
 
-    return it(forward, backward, self.size_hint())
+    # NOTE(pebaz): Batches count as one element each
+    result._buffer = buffer.queue
+    return result
 
 
 @trait
@@ -626,3 +988,1158 @@ class Current(Peekable):
         if not self._modified:
             return self.peek()
         return self.current_item
+
+
+@trait
+def dedup(self):
+    """
+    Removes consecutive duplicate elements, keeping only one of each run.
+
+    Only the previous element is ever held in memory.
+
+    **Examples**
+
+        :::python
+
+        assert it('aabbbca').dedup().collect(str) == 'abca'
+        assert it('aabbbca').dedup().rev().collect(str) == 'acba'
+    """
+    from itertools import groupby
+
+    def _dedup(items):
+        return (key for key, _ in groupby(items))
+
+    return it(
+        _dedup(self),
+        _dedup(self.reverse) if self.reverse is not None else None,
+        (min(1, self._lower_bound), self._upper_bound)
+    )
+
+
+@trait
+def unique(self, key=None, approx=False, capacity=1000000, error_rate=0.01):
+    """
+    Yields only the first occurrence of each element, preserving order.
+
+    If given, `key` is called on each element to get the value to compare.
+
+    By default, every distinct key is remembered in a `set`. Passing
+    `approx=True` remembers keys in a `BloomFilter` instead, which uses a fixed
+    amount of memory sized for `capacity` distinct keys. In exchange, roughly
+    `error_rate` of the distinct elements will be mistaken for duplicates and
+    dropped.
+
+    Whether an element is kept depends on every element before it, so `rev()`
+    reads the whole iterator before yielding anything and holds on to every
+    kept element until it is yielded. `buffered()` reports on them.
+
+    **Examples**
+
+        :::python
+
+        assert it('abacb').unique().collect(str) == 'abc'
+        assert it('abacb').unique().rev().collect(str) == 'cba'
+        assert it('aAbB').unique(key=str.lower).collect(str) == 'ab'
+        assert it(range(5)).unique(approx=True, capacity=10).count() == 5
+    """
+    from .sketches import BloomFilter
+
+    def _unique(items, seen):
+        add = seen.add
+        if approx:
+            if key is None:
+                return (i for i in items if add(i))
+            return (i for i in items if add(key(i)))
+
+        if key is None:
+            return (i for i in items if not (i in seen or add(i)))
+        return _first_by_key(items, key, seen)
+
+    def _first_by_key(items, key, seen):
+        for i in items:
+            k = key(i)
+            if k not in seen:
+                seen.add(k)
+                yield i
+
+    def _reversed_unique(reverse, held):
+        # NOTE(pebaz): Whether an element is a first occurrence depends on
+        # every element before it, which come last from the reverse side
+        held.extend(reverse)
+        held.reverse()
+        kept = list(_unique(held, new()))
+        held[:] = kept
+        del kept
+        while held:
+            yield held.pop()
+
+    new = (lambda: BloomFilter(capacity, error_rate)) if approx else set
+    seen = new()
+    backward = None
+    if self.reverse is not None:
+        held = []
+        backward = it(_reversed_unique(self.reverse, held))
+        backward._buffer = held
+    result = it(
+        _unique(self, seen),
+        backward,
+        (min(1, self._lower_bound), self._upper_bound)
+    )
+    result._buffer = seen
+    return result
+
+
+def _lazy(func, *args):
+    "Yields the elements of `func(*args)`, only calling it once pulled from."
+    yield from func(*args)
+
+
+def _sliceable(self):
+    """
+    Returns a view of the untouched sequence this iterator walks over whose
+    slices do not copy the underlying data, or `None` if it can't be sliced.
+    """
+    from mmap import mmap
+
+    sequence = self._sequence()
+    if sequence is None or isinstance(sequence, range):
+        # NOTE(pebaz): Slices of a range are ranges, not windows of elements
+        return None
+
+    if isinstance(sequence, (bytes, bytearray, mmap)):
+        return memoryview(sequence)
+
+    try:
+        sequence[0:0]
+    except (TypeError, KeyError):
+        # NOTE(pebaz): Some indexable collections, like deque, can't be sliced
+        return None
+    return sequence
+
+
+def _exact_size(itr):
+    "Returns the number of elements in `itr` if known exactly, else None."
+    lower, upper = itr.size_hint()
+    return lower if lower == upper else None
+
+
+@trait
+def windows(self, size):
+    """
+    Yields every contiguous window of `size` elements, overlapping by all but
+    one element.
+
+    If the iterator walks an untouched sequence that can be sliced, other than
+    a `range`, each window is a slice of it. Windows over `bytes`, `bytearray`
+    and `memoryview` are zero-copy `memoryview` slices. Otherwise windows are
+    tuples filled from a ring buffer.
+
+    **Examples**
+
+        :::python
+
+        assert it('abcd').windows(2).collect() == ['ab', 'bc', 'cd']
+        assert it('abcd').windows(2).rev().collect() == ['cd', 'bc', 'ab']
+        assert it(iter('abc')).windows(2).collect() == [('a', 'b'), ('b', 'c')]
+    """
+    from collections import deque
+    from itertools import islice
+
+    if size <= 0:
+        raise ChemicalException('windows: size must be > 0')
+
+    bounds = tuple(
+        None if bound is None else max(0, bound - size + 1)
+        for bound in self.size_hint()
+    )
+
+    view = _sliceable(self)
+    if view is not None:
+        count = max(0, len(view) - size + 1)
+        return it(
+            (view[i:i + size] for i in range(count)),
+            (view[i:i + size] for i in range(count - 1, -1, -1)),
+            bounds
+        )
+
+    def _windows(items):
+        ring = deque(islice(items, size - 1), maxlen=size)
+        append = ring.append
+        for i in items:
+            append(i)
+            yield tuple(ring)
+
+    def _windows_reversed(items):
+        ring = deque(maxlen=size)
+        append = ring.appendleft
+        for i in islice(items, size - 1):
+            append(i)
+        for i in items:
+            append(i)
+            yield tuple(ring)
+
+    return it(
+        _windows(self),
+        _windows_reversed(self.reverse) if self.reverse is not None else None,
+        bounds
+    )
+
+
+def _chunks(self, size, exact):
+    from itertools import islice
+
+    if size <= 0:
+        name = 'chunks_exact' if exact else 'chunks'
+        raise ChemicalException(f'{name}: size must be > 0')
+
+    divide = (lambda n: n // size) if exact else (lambda n: -(-n // size))
+    bounds = tuple(
+        None if bound is None else divide(bound) for bound in self.size_hint()
+    )
+
+    view = _sliceable(self)
+    if view is not None:
+        count = divide(len(view))
+        return it(
+            (view[i * size:(i + 1) * size] for i in range(count)),
+            (view[i * size:(i + 1) * size] for i in range(count - 1, -1, -1)),
+            bounds
+        )
+
+    def _forward(items):
+        chunks = iter(lambda: tuple(islice(items, size)), ())
+        if not exact:
+            return chunks
+        return (chunk for chunk in chunks if len(chunk) == size)
+
+    def _backward(items, total):
+        remainder = total % size
+        if remainder:
+            last = tuple(islice(items, remainder))[::-1]
+            if not exact:
+                yield last
+        for chunk in iter(lambda: tuple(islice(items, size)), ()):
+            yield chunk[::-1]
+
+    total = _exact_size(self)
+    return it(
+        _forward(self),
+        _backward(self.reverse, total)
+        if self.reverse is not None and total is not None
+        else None,
+        bounds
+    )
+
+
+@trait
+def chunks(self, size):
+    """
+    Splits the iterator into consecutive chunks of `size` elements. The last
+    chunk holds the remaining elements and may be shorter.
+
+    If the iterator walks an untouched sequence that can be sliced, other than
+    a `range`, each chunk is a slice of it. Chunks of `bytes`, `bytearray` and
+    `memoryview` are zero-copy `memoryview` slices. Otherwise chunks are
+    tuples.
+
+    Reversing yields the same chunks in reverse order, which requires an exact
+    `size_hint()` to know where the short chunk lies.
+
+    **Examples**
+
+        :::python
+
+        assert it('abcde').chunks(2).collect() == ['ab', 'cd', 'e']
+        assert it('abcde').chunks(2).rev().collect() == ['e', 'cd', 'ab']
+        assert it(iter('abc')).chunks(2).collect() == [('a', 'b'), ('c',)]
+    """
+    return _chunks(self, size, exact=False)
+
+
+@trait
+def chunks_exact(self, size):
+    """
+    Splits the iterator into consecutive chunks of exactly `size` elements,
+    dropping any remaining elements that cannot fill a chunk.
+
+    See `chunks()` for how chunks are represented.
+
+    **Examples**
+
+        :::python
+
+        assert it('abcde').chunks_exact(2).collect() == ['ab', 'cd']
+        assert it('abcde').chunks_exact(2).rev().collect() == ['cd', 'ab']
+    """
+    return _chunks(self, size, exact=True)
+
+
+def _numeric_array(source):
+    """
+    Returns `source` as a one dimensional NumPy array if it is a NumPy array or
+    a numeric `array.array` and NumPy is installed. Otherwise returns `None`.
+    """
+    from array import array
+
+    if type(source).__module__ != 'numpy' and not isinstance(source, array):
+        return None
+
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    if isinstance(source, array):
+        if source.typecode == 'u':
+            return None
+        source = np.frombuffer(source, dtype=source.typecode)
+
+    if not isinstance(source, np.ndarray) or source.ndim != 1:
+        return None
+
+    if source.dtype.kind not in 'iuf':
+        return None
+
+    return source
+
+
+def _sliding_view(values, size):
+    "Returns a read-only (len - size + 1, size) view of overlapping windows."
+    import numpy as np
+
+    try:
+        return np.lib.stride_tricks.sliding_window_view(values, size)
+    except AttributeError:
+        stride = values.strides[0]
+        return np.lib.stride_tricks.as_strided(
+            values,
+            (len(values) - size + 1, size),
+            (stride, stride),
+            writeable=False
+        )
+
+
+def _rolling_totals(values, size):
+    "Returns the sum of every window of `size` elements via a cumulative sum."
+    import numpy as np
+
+    totals = np.cumsum(values)
+    totals[size:] = totals[size:] - totals[:-size]
+    return totals[size - 1:]
+
+
+_ROLLING_CHUNK = 4096
+
+
+class _Rolling(it):
+    """
+    Base class for rolling aggregates over a sliding window of `size` elements.
+
+    Subclasses implement `__get_next__` to fold each new element into their
+    running state and optionally provide `_vectorized` to compute every window
+    at once when the source is a numeric array.
+    """
+    def __init__(self, items, size, *args):
+        from collections import deque
+
+        it.__init__(self, items)
+        if size <= 0:
+            raise ChemicalException(
+                f'{self.__class__.__name__}: size must be > 0'
+            )
+
+        self.size = size
+        self.args = args
+        self.window = deque()
+        self._buffer = self.window
+        self._lower_bound = max(0, self._lower_bound - size + 1)
+        if self._upper_bound is not None:
+            self._upper_bound = max(0, self._upper_bound - size + 1)
+
+        self.values = None
+        if isinstance(self.items, it):
+            self.values = _numeric_array(self.items._sequence())
+            if self.values is not None:
+                # NOTE(pebaz): Bypass the incremental path entirely
+                self.__get_next__ = self._results(False).__next__
+
+    def _vectorized(self, values):
+        "Returns an array of every window's result for a NumPy array `values`"
+        raise NotImplementedError
+
+    def _to_python(self, results):
+        "Converts part of the array returned by `_vectorized` to Python values"
+        return results.tolist()
+
+    def _results(self, backward):
+        """
+        Computes every window with NumPy once the first result is pulled, then
+        converts the results to Python values a chunk at a time.
+        """
+        if len(self.values) < self.size:
+            return
+
+        results = self._vectorized(self.values)
+        if backward:
+            results = results[::-1]
+        for start in range(0, len(results), _ROLLING_CHUNK):
+            yield from self._to_python(results[start:start + _ROLLING_CHUNK])
+
+    def __get_reversed__(self):
+        if self.values is not None:
+            return it(self._results(True), self.items, self.size_hint())
+
+        return it(
+            self.__class__(self.reverse, self.size, *self.args),
+            self.items,
+            self.size_hint()
+        )
+
+
+@trait('window_sum')
+class WindowSum(_Rolling):
+    """
+    Yields the sum of every window of `size` consecutive elements, updating a
+    running total in O(1) per element.
+
+    Pass `kahan=True` to compensate for floating point rounding errors that
+    would otherwise accumulate over long streams of floats.
+
+    Sums over NumPy arrays or numeric `array.array` sources are computed all at
+    once with NumPy when it is installed.
+
+    **Examples**
+
+        :::python
+
+        assert it((1, 2, 3, 4)).window_sum(2).collect() == [3, 5, 7]
+        assert it((1, 2, 3, 4)).window_sum(2).rev().collect() == [7, 5, 3]
+    """
+    def __init__(self, items, size, kahan=False):
+        self.total = 0
+        self.compensation = 0.0
+        _Rolling.__init__(self, items, size, kahan)
+
+    def _vectorized(self, values):
+        if self.args[0]:
+            return _sliding_view(values, self.size).sum(axis=1)
+        return _rolling_totals(values, self.size)
+
+    def __get_next__(self):
+        window, size = self.window, self.size
+        kahan = self.args[0]
+        while True:
+            item = next(self.items)
+            window.append(item)
+            if kahan:
+                self._compensated_add(item)
+                if len(window) > size:
+                    self._compensated_add(-window.popleft())
+                if len(window) == size:
+                    return self.total + self.compensation
+            else:
+                self.total += item
+                if len(window) > size:
+                    self.total -= window.popleft()
+                if len(window) == size:
+                    return self.total
+
+    def _compensated_add(self, item):
+        "Neumaier's variant of Kahan summation"
+        total = self.total
+        new_total = total + item
+        if abs(total) >= abs(item):
+            self.compensation += (total - new_total) + item
+        else:
+            self.compensation += (item - new_total) + total
+        self.total = new_total
+
+
+@trait('window_min')
+class WindowMin(_Rolling):
+    """
+    Yields the smallest element of every window of `size` consecutive elements.
+
+    Candidates are kept in a monotonic deque, so each element is added and
+    removed at most once.
+
+    **Examples**
+
+        :::python
+
+        assert it((3, 1, 4, 1, 5)).window_min(2).collect() == [1, 1, 1, 1]
+        assert it((3, 1, 4, 1, 5)).window_min(3).rev().collect() == [1, 1, 1]
+    """
+    def __init__(self, items, size):
+        self.index = 0
+        _Rolling.__init__(self, items, size)
+
+    @staticmethod
+    def _keep(candidate, item):
+        return candidate < item
+
+    def _vectorized(self, values):
+        return _sliding_view(values, self.size).min(axis=1)
+
+    def __get_next__(self):
+        candidates, size, keep = self.window, self.size, self._keep
+        while True:
+            item = next(self.items)
+            index = self.index
+            self.index += 1
+            while candidates and not keep(candidates[-1][1], item):
+                candidates.pop()
+            candidates.append((index, item))
+            if candidates[0][0] <= index - size:
+                candidates.popleft()
+            if index >= size - 1:
+                return candidates[0][1]
+
+
+@trait('window_max')
+class WindowMax(WindowMin):
+    """
+    Yields the largest element of every window of `size` consecutive elements.
+
+    Candidates are kept in a monotonic deque, so each element is added and
+    removed at most once.
+
+    **Examples**
+
+        :::python
+
+        assert it((3, 1, 4, 1, 5)).window_max(2).collect() == [3, 4, 4, 5]
+        assert it((3, 1, 4, 1, 5)).window_max(3).rev().collect() == [5, 4, 4]
+    """
+    @staticmethod
+    def _keep(candidate, item):
+        return candidate > item
+
+    def _vectorized(self, values):
+        return _sliding_view(values, self.size).max(axis=1)
+
+
+@trait('window_mean')
+class WindowMean(_Rolling):
+    """
+    Yields the mean of every window of `size` consecutive elements using
+    Welford's numerically stable running update.
+
+    Pass `variance=True` to yield `(mean, variance)` tuples instead, where
+    variance is the population variance of the window.
+
+    **Examples**
+
+        :::python
+
+        assert it((1, 2, 3, 4)).window_mean(2).collect() == [1.5, 2.5, 3.5]
+        assert it((1, 3, 5)).window_mean(2, variance=True).collect() == [
+            (2.0, 1.0), (4.0, 1.0)
+        ]
+    """
+    def __init__(self, items, size, variance=False):
+        self.mean = 0.0
+        self.squares = 0.0
+        _Rolling.__init__(self, items, size, variance)
+
+    def _vectorized(self, values):
+        import numpy as np
+
+        if not self.args[0]:
+            return _rolling_totals(values, self.size) / self.size
+        windows = _sliding_view(values, self.size)
+        return np.column_stack((windows.mean(axis=1), windows.var(axis=1)))
+
+    def _to_python(self, results):
+        if not self.args[0]:
+            return results.tolist()
+        return map(tuple, results.tolist())
+
+    def __get_next__(self):
+        window, size = self.window, self.size
+        while True:
+            item = next(self.items)
+            window.append(item)
+            mean = self.mean
+            if len(window) > size:
+                oldest = window.popleft()
+                self.mean = mean + (item - oldest) / size
+                self.squares += (item - oldest) * (
+                    item - self.mean + oldest - mean
+                )
+            else:
+                delta = item - mean
+                self.mean = mean + delta / len(window)
+                self.squares += delta * (item - self.mean)
+
+            if len(window) == size:
+                if self.args[0]:
+                    return self.mean, max(0.0, self.squares / size)
+                return self.mean
+
+
+@trait
+def sample_rate(self, probability, seed=None):
+    """
+    Lazily keeps each element with the given `probability`, independently of
+    every other element (Bernoulli sampling).
+
+    Rather than drawing a random number per element, the number of elements to
+    skip before the next kept one is drawn from a geometric distribution. If
+    the iterator walks an untouched sequence, skipped elements are never
+    visited at all.
+
+    Which elements are kept depends only on the seed and their positions, so
+    `rev()` keeps the same elements as forward iteration, in reverse. Pass a
+    `seed` to keep the same elements every time. Iterators that aren't over a
+    sequence can only be reversed if their exact size is known.
+
+    **Examples**
+
+        :::python
+
+        assert it(range(10)).sample_rate(1.0).collect() == [*range(10)]
+        assert it(range(10)).sample_rate(0.0).collect() == []
+        assert 0 < it(range(10000)).sample_rate(0.1).count() < 2000
+    """
+    from itertools import count, islice
+    from math import floor, log
+    import random
+
+    if not 0 <= probability <= 1:
+        raise ChemicalException('sample_rate: probability must be in [0, 1]')
+
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    def _kept(block):
+        if probability == 0:
+            return []
+        first = block * _SAMPLE_BLOCK
+        if probability == 1:
+            return list(range(first, first + _SAMPLE_BLOCK))
+
+        # NOTE(pebaz): Each block draws its gaps from a generator seeded by its
+        # index, so that blocks can be visited from either end
+        rng = random.Random(f'{seed!r}/{block}')
+        log_miss = log(1 - probability)
+        kept, position = [], first - 1
+        while True:
+            gap = floor(log(rng.random() or 5e-324) / log_miss)
+            position += gap + 1
+            if position >= first + _SAMPLE_BLOCK:
+                return kept
+            kept.append(position)
+
+    def _forward(size=None):
+        for block in count():
+            if size is not None and block * _SAMPLE_BLOCK >= size:
+                return
+            for position in _kept(block):
+                if size is not None and position >= size:
+                    return
+                yield position
+
+    def _backward(size):
+        for block in range((size - 1) // _SAMPLE_BLOCK, -1, -1):
+            for position in reversed(_kept(block)):
+                if position < size:
+                    yield position
+
+    def _pick(items, offsets):
+        end, current = object(), 0
+        for offset in offsets:
+            skip = offset - current
+            item = next(islice(items, skip, skip + 1), end)
+            if item is end:
+                return
+            current = offset + 1
+            yield item
+
+    bounds = 0, self._upper_bound
+    source = self._sequence()
+    if source is not None:
+        size = len(source)
+        return it(
+            map(source.__getitem__, _forward(size)),
+            map(source.__getitem__, _backward(size)),
+            bounds
+        )
+
+    size = _exact_size(self)
+    return it(
+        _pick(self, _forward()),
+        _pick(self.reverse, (size - 1 - i for i in _backward(size)))
+        if self.reverse is not None and size is not None else None,
+        bounds
+    )
+
+
+_SAMPLE_BLOCK = 4096
+
+
+def _sorted_inputs(self, others):
+    "Wraps `others` and returns them with the combined bounds of all inputs."
+    others = [o if isinstance(o, it) else it(o) for o in others]
+    lowers, uppers = zip(*(itr.size_hint() for itr in [self, *others]))
+    upper = None if None in uppers else sum(uppers)
+    reversible = self.reverse is not None and all(
+        other.reverse is not None for other in others
+    )
+    return others, (sum(lowers), upper), reversible
+
+
+def _sorted_groups(streams, key, descending):
+    """
+    Merges sorted `streams` in one pass and yields the first element of each
+    run of equal keys along with the set of stream indices found in the run.
+    """
+    from heapq import merge
+    from itertools import groupby, repeat
+
+    if key is None:
+        get = lambda pair: pair[1]
+    else:
+        get = lambda pair: key(pair[1])
+    tagged = [zip(repeat(i), stream) for i, stream in enumerate(streams)]
+    for _, run in groupby(merge(*tagged, key=get, reverse=descending), get):
+        origin, first = next(run)
+        origins = {origin}
+        origins.update(i for i, _ in run)
+        yield first, origins
+
+
+def _set_op(self, others, key, keep, bounds=None):
+    others, merged_bounds, reversible = _sorted_inputs(self, others)
+
+    def _run(streams, descending):
+        count = len(streams)
+        return (
+            first
+            for first, origins in _sorted_groups(streams, key, descending)
+            if keep(origins, count)
+        )
+
+    return it(
+        _run([self, *others], False),
+        _run([self.reverse, *(o.reverse for o in others)], True)
+        if reversible else None,
+        bounds(merged_bounds) if bounds else (0, merged_bounds[1])
+    )
+
+
+@trait
+def merge(self, *others, key=None):
+    """
+    Merges any number of sorted iterators into one sorted iterator.
+
+    Uses a heap holding one element per input, so only `O(k)` elements are held
+    for `k` inputs. Elements with equal keys are yielded in input order.
+
+    **Examples**
+
+        :::python
+
+        assert it((1, 4, 7)).merge((2, 5), (3, 6)).collect() == [
+            1, 2, 3, 4, 5, 6, 7
+        ]
+        assert it('ad').merge('bc').rev().collect(str) == 'dcba'
+    """
+    from heapq import merge
+
+    others, bounds, reversible = _sorted_inputs(self, others)
+    return it(
+        merge(self, *others, key=key),
+        merge(
+            self.reverse, *(o.reverse for o in others), key=key, reverse=True
+        ) if reversible else None,
+        bounds
+    )
+
+
+@trait
+def union_sorted(self, *others, key=None):
+    """
+    Yields each distinct element found in any of the sorted iterators once,
+    in sorted order, in a single pass.
+
+    **Examples**
+
+        :::python
+
+        assert it((1, 2, 4)).union_sorted((2, 3), (4, 5)).collect() == [
+            1, 2, 3, 4, 5
+        ]
+    """
+    return _set_op(
+        self,
+        others,
+        key,
+        lambda origins, count: True,
+        lambda bounds: (min(1, bounds[0]), bounds[1])
+    )
+
+
+@trait
+def intersect(self, *others, key=None):
+    """
+    Yields each distinct element found in every one of the sorted iterators
+    once, in sorted order, in a single pass.
+
+    **Examples**
+
+        :::python
+
+        assert it((1, 2, 3, 4)).intersect((2, 4, 6), (0, 2, 4)).collect() == [
+            2, 4
+        ]
+    """
+    return _set_op(
+        self, others, key, lambda origins, count: len(origins) == count
+    )
+
+
+@trait
+def difference(self, *others, key=None):
+    """
+    Yields each distinct element of this sorted iterator that is not found in
+    any of the other sorted iterators, in sorted order, in a single pass.
+
+    **Examples**
+
+        :::python
+
+        assert it((1, 2, 3, 4)).difference((2,), (4, 5)).collect() == [1, 3]
+    """
+    return _set_op(self, others, key, lambda origins, count: origins == {0})
+
+
+_JOINS = {
+    'inner': (False, False),
+    'left': (True, False),
+    'right': (False, True),
+    'outer': (True, True),
+}
+
+
+def _join_kind(name, how):
+    "Returns whether unmatched left and right elements are kept for `how`."
+    if how not in _JOINS:
+        raise ChemicalException(
+            f'{name}: how must be one of {", ".join(_JOINS)}, not {how!r}'
+        )
+    return _JOINS[how]
+
+
+def _join_bounds(left, right, how):
+    left_lower, right_lower = left.size_hint()[0], right.size_hint()[0]
+    lower = {
+        'inner': 0,
+        'left': left_lower,
+        'right': right_lower,
+        'outer': max(left_lower, right_lower)
+    }[how]
+    return lower, None
+
+
+@trait
+def join(self, other, left_key, right_key=None, how='inner'):
+    """
+    Pairs up elements of this iterator and `other` whose keys are equal, like a
+    database hash join, yielding `(left, right)` tuples.
+
+    `left_key` and `right_key` are called on elements of each side to get the
+    key to join on. If `right_key` is not given, `left_key` is used for both.
+
+    `how` decides what happens to elements without a match:
+
+    * `'inner'`: they are dropped
+    * `'left'`: unmatched left elements are paired with `None`
+    * `'right'`: unmatched right elements are paired with `None`
+    * `'outer'`: unmatched elements of both sides are paired with `None`
+
+    A hash table is built from whichever side `size_hint()` says is smaller
+    (the right side, unless the left is known to be smaller) and the other side
+    is streamed through it. Results follow the order of the streamed side,
+    followed by any unmatched elements of the side in the table.
+
+    This iterator cannot be reversed.
+
+    **Examples**
+
+        :::python
+
+        names = [(1, 'ann'), (2, 'bob')]
+        events = [(2, 'login'), (3, 'logout'), (1, 'login')]
+
+        assert it(events).join(names, lambda e: e[0]).collect() == [
+            ((2, 'login'), (2, 'bob')), ((1, 'login'), (1, 'ann'))
+        ]
+        assert it(events).join(names, lambda e: e[0], how='left').nth(2) == (
+            (3, 'logout'), None
+        )
+    """
+    keep_left, keep_right = _join_kind('join', how)
+    other = other if isinstance(other, it) else it(other)
+    right_key = right_key or left_key
+
+    left_size, right_size = self.size_hint()[1], other.size_hint()[1]
+    build_left = left_size is not None and (
+        right_size is None or left_size < right_size
+    )
+
+    def _hash_join(build, probe, build_key, probe_key, keep_build, keep_probe):
+        table = {}
+        for element in build:
+            table.setdefault(build_key(element), []).append(element)
+
+        matched = set()
+        for element in probe:
+            key = probe_key(element)
+            rows = table.get(key)
+            if rows is None:
+                if keep_probe:
+                    yield element, None
+                continue
+            if keep_build:
+                matched.add(key)
+            for row in rows:
+                yield element, row
+
+        if keep_build:
+            for key, rows in table.items():
+                if key not in matched:
+                    for row in rows:
+                        yield None, row
+
+    if build_left:
+        pairs = (
+            (left, right)
+            for right, left in _hash_join(
+                self, other, left_key, right_key, keep_left, keep_right
+            )
+        )
+    else:
+        pairs = _hash_join(
+            other, self, right_key, left_key, keep_right, keep_left
+        )
+
+    return it(pairs, None, _join_bounds(self, other, how))
+
+
+@trait
+def merge_join(self, other, left_key, right_key=None, how='inner'):
+    """
+    Pairs up elements of this iterator and `other` whose keys are equal,
+    yielding `(left, right)` tuples, for inputs that are already sorted by key.
+
+    Takes the same arguments as `join()`, but walks both sides in a single pass
+    instead of building a hash table. Only the run of right elements sharing
+    the current key is held in memory. Results are in key order.
+
+    This iterator cannot be reversed.
+
+    **Examples**
+
+        :::python
+
+        left = [(1, 'a'), (2, 'b'), (2, 'c')]
+        right = [(2, 'x'), (3, 'y')]
+
+        assert it(left).merge_join(right, lambda e: e[0]).collect() == [
+            ((2, 'b'), (2, 'x')), ((2, 'c'), (2, 'x'))
+        ]
+        assert it(left).merge_join(
+            right, lambda e: e[0], how='outer'
+        ).count() == 4
+    """
+    from itertools import groupby
+
+    keep_left, keep_right = _join_kind('merge_join', how)
+    other = other if isinstance(other, it) else it(other)
+    right_key = right_key or left_key
+
+    def _merge_join(left, right):
+        lefts, rights = groupby(left, left_key), groupby(right, right_key)
+        left_run, right_run = next(lefts, None), next(rights, None)
+
+        while left_run is not None and right_run is not None:
+            if left_run[0] < right_run[0]:
+                if keep_left:
+                    yield from ((element, None) for element in left_run[1])
+                left_run = next(lefts, None)
+
+            elif right_run[0] < left_run[0]:
+                if keep_right:
+                    yield from ((None, element) for element in right_run[1])
+                right_run = next(rights, None)
+
+            else:
+                matches = list(right_run[1])
+                for element in left_run[1]:
+                    for match in matches:
+                        yield element, match
+                left_run, right_run = next(lefts, None), next(rights, None)
+
+        while keep_left and left_run is not None:
+            yield from ((element, None) for element in left_run[1])
+            left_run = next(lefts, None)
+
+        while keep_right and right_run is not None:
+            yield from ((None, element) for element in right_run[1])
+            right_run = next(rights, None)
+
+    return it(_merge_join(self, other), None, _join_bounds(self, other, how))
+
+
+class _Splitter:
+    """
+    Hands out the elements of one upstream iterator to several outputs, each
+    with its own bounded buffer. Whichever output runs dry pulls from upstream,
+    keeping any elements routed elsewhere for their own outputs.
+    """
+    def __init__(self, items, outputs, route, limit, block, name):
+        import threading
+        from collections import deque
+
+        if limit <= 0:
+            raise ChemicalException(f'{name}: buffer must be > 0')
+
+        self.items = items
+        self.route = route
+        self.limit = limit
+        self.block = block
+        self.name = name
+        self.queues = [deque() for _ in range(outputs)]
+        self.ready = threading.Condition()
+        self.done = False
+
+    def _others_have_room(self, index):
+        limit = self.limit
+        return all(
+            len(queue) < limit
+            for other, queue in enumerate(self.queues) if other != index
+        )
+
+    def pull(self, index):
+        queues, limit = self.queues, self.limit
+        with self.ready:
+            while True:
+                if queues[index]:
+                    item = queues[index].popleft()
+                    self.ready.notify_all()
+                    return item
+
+                if self.done:
+                    raise StopIteration
+
+                # NOTE(pebaz): Wait for other consumers to make room before
+                # pulling so that elements keep their order in every output
+                if self.block and not self._others_have_room(index):
+                    self.ready.wait_for(
+                        lambda: self.done or queues[index]
+                        or self._others_have_room(index)
+                    )
+                    continue
+
+                try:
+                    item = next(self.items)
+                except StopIteration:
+                    self.done = True
+                    self.ready.notify_all()
+                    raise
+
+                target = self.route(item)
+                if target == index:
+                    return item
+
+                queues[target].append(item)
+                self.ready.notify_all()
+                if len(queues[target]) > limit:
+                    raise ChemicalException(
+                        f'{self.name}: output {target} is holding more than '
+                        f'{limit} elements. Consume the outputs evenly, raise '
+                        'the buffer size or pass block=True when consuming '
+                        'them from separate threads'
+                    )
+
+
+class _SplitOutput(it):
+    "One of the outputs of a `_Splitter`."
+    def __init__(self, splitter, index, upper_bound):
+        it.__init__(self, [], bounds=(0, upper_bound))
+        self.reverse = None
+        self.splitter = splitter
+        self.index = index
+        self._buffer = splitter.queues[index]
+
+    def __get_next__(self):
+        return self.splitter.pull(self.index)
+
+
+@trait
+def partition_lazy(self, closure, buffer=1024, block=False):
+    """
+    Lazy version of `partition` that returns two iterators, one yielding the
+    elements for which `closure` returns `True` and one yielding the rest.
+
+    Both iterators are fed from a single pass over this one. Elements pulled
+    from upstream while looking for the next element of one side wait in a
+    buffer for the other side, which may hold up to `buffer` elements.
+
+    If a buffer fills up, a `ChemicalException` is raised, unless `block` is
+    `True`, in which case the consumer waits for the other side to catch up.
+    Only use `block` when each side is consumed from its own thread.
+
+    **Examples**
+
+        :::python
+
+        evens, odds = it(range(6)).partition_lazy(lambda x: x % 2 == 0)
+        assert evens.next() == 0
+        assert odds.collect() == [1, 3, 5]
+        assert evens.collect() == [2, 4]
+    """
+    splitter = _Splitter(
+        self, 2, lambda item: int(not closure(item)), buffer, block,
+        'partition_lazy'
+    )
+    upper = self.size_hint()[1]
+    return _SplitOutput(splitter, 0, upper), _SplitOutput(splitter, 1, upper)
+
+
+@trait
+def shard(self, n, key=None, buffer=1024, block=False):
+    """
+    Splits the iterator into `n` iterators by hashing each element, or the
+    result of calling `key` on it, in a single pass.
+
+    Equal keys always go to the same shard, even across processes, for ints,
+    strings and bytes. Buffering works as in `partition_lazy`: pass
+    `block=True` to fan the shards out to one thread each.
+
+    **Examples**
+
+        :::python
+
+        shards = it(range(100)).shard(4, key=lambda x: x % 10)
+        assert it(shards).map(lambda s: s.count()).sum() == 100
+
+        import threading
+        shards = it(lines).shard(8, key=user_id, block=True)
+        for shard, writer in zip(shards, writers):
+            threading.Thread(target=writer.write_all, args=[shard]).start()
+    """
+    from .sketches import _hash64
+
+    if n <= 0:
+        raise ChemicalException('shard: n must be > 0')
+
+    if key is None:
+        route = lambda item: _hash64(item) % n
+    else:
+        route = lambda item: _hash64(key(item)) % n
+
+    splitter = _Splitter(self, n, route, buffer, block, 'shard')
+    upper = self.size_hint()[1]
+    return [_SplitOutput(splitter, index, upper) for index in range(n)]
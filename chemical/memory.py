@@ -0,0 +1,160 @@
+"""
+Accounting for the memory held by buffering stages of a pipeline.
+
+Stages such as `take`, `cycle`, `peekable`, `unique` and `flatten` hold on to
+elements while the pipeline runs. Each reports what it holds through
+`it.buffered()`, and the `memory_limit` trait watches every stage of a pipeline
+so that running out of memory points at the stage responsible.
+
+    :::python
+
+    pipeline = it(events).unique(key=user_id).memory_limit(512 * 1024 ** 2)
+    for event in pipeline:
+        ...
+
+    print(pipeline.report())
+"""
+
+from sys import getsizeof
+from . import it, trait, ChemicalException
+
+
+_SAMPLE = 16
+
+
+class MemoryLimitExceeded(ChemicalException):
+    "Raised when the stages of a pipeline buffer more bytes than allowed"
+    def __init__(self, stage, elements, nbytes, total, limit):
+        ChemicalException.__init__(
+            self,
+            f'memory_limit: pipeline holds ~{total} bytes, over the limit of '
+            f'{limit} bytes. Stage "{stage}" holds {elements} elements '
+            f'(~{nbytes} bytes)'
+        )
+        self.stage = stage
+        self.elements = elements
+        self.nbytes = nbytes
+        self.total = total
+        self.limit = limit
+
+
+def estimate(buffer):
+    """
+    Returns the number of elements in `buffer` and an estimate of the bytes
+    used by the container and its elements, measured on a small sample.
+
+    Fixed-size structures with an `nbytes` attribute, like `BloomFilter`, hold
+    no elements and report `nbytes` as is.
+    """
+    nbytes = getattr(buffer, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return 0, nbytes
+
+    from itertools import islice
+
+    elements = len(buffer)
+    try:
+        sample = list(islice(iter(buffer), _SAMPLE))
+    except RuntimeError:
+        # NOTE(pebaz): Another thread changed the buffer while sampling it
+        sample = []
+
+    each = sum(map(getsizeof, sample)) / len(sample) if sample else 0
+    return elements, getsizeof(buffer) + int(each * elements)
+
+
+def _stage_name(index, stage):
+    return f'{index}:{stage._trait or type(stage).__name__}'
+
+
+@trait('memory_limit')
+class MemoryLimit(it):
+    """
+    Watches the memory held by every stage of the pipeline that produced this
+    iterator, raising `MemoryLimitExceeded` naming the stage holding the most
+    if their total goes over `limit` bytes. Pass `None` to only keep track.
+
+    Stages are checked when this iterator is created, every `every` elements
+    and once the pipeline is exhausted. `summary()` and `report()` return the
+    most each stage held at any check.
+
+    **Examples**
+
+        :::python
+
+        itr = it(range(1000)).take(500).memory_limit(None)
+        itr.count()
+        assert itr.summary()[1][:2] == ('1:take', 500)
+
+        with pytest.raises(MemoryLimitExceeded):
+            it(range(1000)).take(500).memory_limit(1024)
+    """
+    _resumable = True
+
+    def __init__(self, items, limit, every=1000):
+        if every <= 0:
+            raise ChemicalException('memory_limit: every must be > 0')
+
+        it.__init__(self, items)
+        self.limit = limit
+        self.every = every
+        self.countdown = every
+        self.watched = items.stages() if isinstance(items, it) else []
+        self.peaks = {}
+        self.peak = 0
+        self.check()
+
+    def check(self):
+        "Measures every stage, raising if the limit has been exceeded."
+        measured = []
+        total = 0
+        for index, stage in enumerate(self.watched):
+            elements, nbytes = stage.buffered()
+            total += nbytes
+            if not elements and not nbytes:
+                continue
+
+            name = _stage_name(index, stage)
+            measured.append((nbytes, elements, name))
+            if nbytes >= self.peaks.get(name, (0, 0))[1]:
+                self.peaks[name] = elements, nbytes
+
+        self.peak = max(self.peak, total)
+        if self.limit is not None and total > self.limit:
+            nbytes, elements, name = max(measured)
+            raise MemoryLimitExceeded(
+                name, elements, nbytes, total, self.limit
+            )
+
+    def __get_next__(self):
+        self.countdown -= 1
+        if not self.countdown:
+            self.countdown = self.every
+            self.check()
+
+        try:
+            return next(self.items)
+        except StopIteration:
+            self.check()
+            raise
+
+    def summary(self):
+        """
+        Returns `(stage, elements, bytes)` for the largest amount each stage
+        held, in pipeline order. Stages are named `index:trait`.
+        """
+        return [
+            (name, elements, nbytes)
+            for name, (elements, nbytes) in sorted(
+                self.peaks.items(), key=lambda item: int(item[0].split(':')[0])
+            )
+        ]
+
+    def report(self):
+        "Returns the peak memory summary as a printable table."
+        lines = [f'peak total: ~{self.peak} bytes']
+        for name, elements, nbytes in self.summary():
+            lines.append(
+                f'  {name:<24} {elements:>12} elements  ~{nbytes} bytes'
+            )
+        return '\n'.join(lines)
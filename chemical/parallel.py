@@ -0,0 +1,272 @@
+"""
+Process-parallel stages over numeric arrays that share memory with workers.
+
+Sending elements to worker processes normally means pickling every one of
+them. The traits in this module copy an `array.array` or NumPy source into a
+`multiprocessing.shared_memory` block once, and hand each worker only a
+`Block` descriptor naming the part of it to work on. Workers write their
+results into a second shared block and return descriptors as well, so no
+element is ever pickled.
+
+    :::python
+
+    from array import array
+    from chemical.plan import X
+
+    values = array('d', range(10 ** 8))
+    assert it(values).par_map(X * 2).par_sum() == 2 * sum(range(10 ** 8))
+
+Requires Python 3.8 or later. Functions given to these traits are sent to the
+workers, so they must be picklable: use importable functions or `X`
+expressions from `chemical.plan` instead of lambdas.
+"""
+
+import sys
+from array import array
+from collections import namedtuple
+from . import it, trait, ChemicalException
+
+
+Block = namedtuple('Block', 'name offset length typecode')
+Block.__doc__ = "Describes `length` elements of `typecode` in a shared block."
+
+_TYPECODES = frozenset('bBhHiIlLqQfd')
+
+
+def _attach(name):
+    "Opens an existing shared block without the resource tracker adopting it."
+    from multiprocessing import shared_memory, resource_tracker
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+
+    # NOTE(pebaz): Before 3.13 attaching registers the block for cleanup a
+    # second time, so the tracker complains once the owner unlinks it
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+class _SharedArray:
+    "A shared memory block holding `length` elements of type `typecode`."
+    def __init__(self, typecode, length, source=None):
+        from multiprocessing import shared_memory
+
+        self.typecode = typecode
+        self.length = length
+        self.nbytes = length * array(typecode).itemsize
+        self.memory = shared_memory.SharedMemory(
+            create=True, size=max(1, self.nbytes)
+        )
+        self.name = self.memory.name
+
+        if source is not None and self.nbytes:
+            data = memoryview(source).cast('B')
+            try:
+                self.memory.buf[:self.nbytes] = data
+            finally:
+                data.release()
+
+    def block(self, offset, length):
+        return Block(self.name, offset, length, self.typecode)
+
+    def read(self, blocks=None):
+        "Copies `blocks` (or the whole array) out into an `array.array`."
+        result = array(self.typecode)
+        itemsize = result.itemsize
+        for block in blocks or [self.block(0, self.length)]:
+            start = block.offset * itemsize
+            end = start + block.length * itemsize
+            result.frombytes(self.memory.buf[start:end])
+        return result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _work(task):
+    "Runs in a worker: applies one operation to one block of the input."
+    kind, func, source, target = task
+
+    memory = _attach(source.name)
+    outputs = _attach(target.name) if target is not None else None
+    views = []
+    try:
+        values = memory.buf.cast(source.typecode)
+        views.append(values)
+        values = values[source.offset:source.offset + source.length]
+        views.append(values)
+
+        if kind == 'sum':
+            return sum(values) if func is None else sum(map(func, values))
+
+        if kind == 'map':
+            results = array(target.typecode, map(func, values))
+        else:
+            results = array(target.typecode, filter(func, values))
+
+        out = outputs.buf.cast(target.typecode)
+        views.append(out)
+        out[target.offset:target.offset + len(results)] = results
+        return target._replace(length=len(results))
+
+    finally:
+        for view in reversed(views):
+            view.release()
+        memory.close()
+        if outputs is not None:
+            outputs.close()
+
+
+def _numeric_source(self, typecode, name):
+    """
+    Returns the array to share, its type code and whether it is a NumPy array.
+    Other iterators are collected into an `array.array` of `typecode`.
+    """
+    source = self._sequence()
+
+    if isinstance(source, array) and source.typecode in _TYPECODES:
+        return source, source.typecode, False
+
+    if type(source).__module__ == 'numpy':
+        import numpy as np
+
+        if source.ndim == 1 and source.dtype.char in _TYPECODES:
+            return np.ascontiguousarray(source), source.dtype.char, True
+
+    if typecode is None:
+        raise ChemicalException(
+            f'{name}: iterator is not a numeric array.array or NumPy array, '
+            'pass a typecode to collect it into one first'
+        )
+
+    return self.collect_array(typecode), typecode, False
+
+
+def _parallel(self, kind, func, typecode, out_typecode, processes, name):
+    from concurrent.futures import ProcessPoolExecutor
+    import os
+
+    try:
+        from multiprocessing import shared_memory
+    except ImportError as e:
+        raise ChemicalException(
+            f'{name}: shared memory requires Python 3.8 or later'
+        ).with_traceback(e.__traceback__) from e
+
+    values, typecode, numpy = _numeric_source(self, typecode, name)
+    out_typecode = out_typecode or typecode
+    length = len(values)
+    processes = processes or os.cpu_count() or 1
+    step = max(1, -(-length // processes))
+
+    with _SharedArray(typecode, length, values) as inputs:
+        outputs = (
+            None if kind == 'sum' else _SharedArray(out_typecode, length)
+        )
+        try:
+            tasks = [
+                (
+                    kind, func, inputs.block(start, min(step, length - start)),
+                    outputs and outputs.block(start, min(step, length - start))
+                )
+                for start in range(0, length, step)
+            ]
+
+            with ProcessPoolExecutor(processes) as pool:
+                results = list(pool.map(_work, tasks))
+
+            if kind == 'sum':
+                return sum(results)
+
+            results = outputs.read(results)
+        finally:
+            if outputs is not None:
+                outputs.__exit__()
+
+    if numpy:
+        import numpy as np
+        return np.frombuffer(results, dtype=results.typecode)
+    return results
+
+
+@trait
+def par_map(self, closure, typecode=None, processes=None):
+    """
+    Applies `closure` to each element in a pool of worker processes that read
+    the elements from, and write the results to, shared memory.
+
+    Works on iterators over numeric `array.array` or NumPy arrays. Other
+    iterators are first collected into an `array.array` of `typecode`, which
+    is also the type of the results (it defaults to the type of the source).
+
+    **Examples**
+
+        :::python
+
+        from array import array
+        from chemical.plan import X
+
+        doubled = it(array('q', [1, 2, 3])).par_map(X * 2)
+        assert doubled.collect() == [2, 4, 6]
+        assert it(range(4)).par_map(X / 2, 'd').collect() == [0, 0.5, 1, 1.5]
+    """
+    result = _parallel(
+        self, 'map', closure, typecode, typecode, processes, 'par_map'
+    )
+    return it(result)
+
+
+@trait
+def par_filter(self, closure, typecode=None, processes=None):
+    """
+    Keeps the elements for which `closure` returns `True`, testing them in a
+    pool of worker processes that share memory with this one.
+
+    Accepts the same sources as `par_map`.
+
+    **Examples**
+
+        :::python
+
+        from array import array
+        from chemical.plan import X
+
+        odds = it(array('i', range(10))).par_filter(X % 2 == 1)
+        assert odds.collect() == [1, 3, 5, 7, 9]
+    """
+    result = _parallel(
+        self, 'filter', closure, typecode, None, processes, 'par_filter'
+    )
+    return it(result)
+
+
+@trait
+def par_sum(self, closure=None, typecode=None, processes=None):
+    """
+    Sums the elements, or the results of calling `closure` on them, in a pool
+    of worker processes that share memory with this one. Only the partial sum
+    of each worker is sent back.
+
+    Accepts the same sources as `par_map`.
+
+    **Examples**
+
+        :::python
+
+        from array import array
+        from chemical.plan import X
+
+        assert it(array('d', [1, 2, 3])).par_sum() == 6
+        assert it(array('d', [1, 2, 3])).par_sum(X * X) == 14
+    """
+    return _parallel(
+        self, 'sum', closure, typecode, None, processes, 'par_sum'
+    )
@@ -0,0 +1,405 @@
+"""
+Serializable pipeline plans.
+
+An `it` pipeline is a chain of live iterators that cannot be pickled. A `Plan`
+records the traits of a pipeline by name instead, so it can be pickled, sent
+to worker processes and run again on each worker's own data.
+
+    :::python
+
+    from chemical.plan import Plan, X
+
+    plan = Plan().map(X * 2).filter(X > 10).sum()
+    assert plan.run(range(10)) == 60
+    assert plan.map_partitions([range(10), range(10, 20)]) == [60, 290]
+
+Arguments given to traits must be picklable for the plan to be: use functions
+importable from a module, or expressions built from `X`, instead of lambdas.
+"""
+
+import operator, pickle
+from . import it, ChemicalException, TraitException
+
+
+_SYMBOLS = {
+    operator.add: '+', operator.sub: '-', operator.mul: '*',
+    operator.truediv: '/', operator.floordiv: '//', operator.mod: '%',
+    operator.pow: '**', operator.eq: '==', operator.ne: '!=',
+    operator.lt: '<', operator.le: '<=', operator.gt: '>', operator.ge: '>=',
+    operator.and_: '&', operator.or_: '|', operator.xor: '^',
+}
+
+
+class Expr:
+    """
+    A picklable stand-in for a small lambda, built by applying operators to
+    the placeholder `X`. Calling an expression evaluates it for one element.
+
+    **Examples**
+
+        :::python
+
+        assert (X * 2 + 1)(3) == 7
+        assert (X['name'] == 'ann')({'name': 'ann'})
+        assert call(str.upper, X.name)(some_user) == 'ANN'
+    """
+    def __init__(self, func=None, args=(), kwargs=None):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs or {}
+
+    def __reduce__(self):
+        return Expr, (self._func, self._args, self._kwargs)
+
+    def __call__(self, value):
+        if self._func is None:
+            return value
+
+        args = [
+            arg(value) if isinstance(arg, Expr) else arg for arg in self._args
+        ]
+        kwargs = {
+            key: arg(value) if isinstance(arg, Expr) else arg
+            for key, arg in self._kwargs.items()
+        }
+        return self._func(*args, **kwargs)
+
+    def __repr__(self):
+        func, args = self._func, self._args
+        if func is None:
+            return 'X'
+        if func in _SYMBOLS:
+            return f'({args[0]!r} {_SYMBOLS[func]} {args[1]!r})'
+        if func is operator.getitem:
+            return f'{args[0]!r}[{args[1]!r}]'
+        if func is getattr:
+            return f'{args[0]!r}.{args[1]}'
+        if func is operator.neg:
+            return f'-{args[0]!r}'
+        if func is operator.not_:
+            return f'~{args[0]!r}'
+
+        arguments = [repr(arg) for arg in args]
+        arguments += [f'{key}={arg!r}' for key, arg in self._kwargs.items()]
+        name = getattr(func, '__qualname__', repr(func))
+        return f'{name}({", ".join(arguments)})'
+
+    def __bool__(self):
+        raise ChemicalException(
+            'Expr: use & and | instead of "and" and "or" in expressions'
+        )
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Expr(getattr, (self, name))
+
+    def __getitem__(self, key):
+        return Expr(operator.getitem, (self, key))
+
+    def __neg__(self):
+        return Expr(operator.neg, (self,))
+
+    def __invert__(self):
+        return Expr(operator.not_, (self,))
+
+    __hash__ = None
+
+
+def _binary(func):
+    def forward(self, other):
+        return Expr(func, (self, other))
+
+    def backward(self, other):
+        return Expr(func, (other, self))
+
+    return forward, backward
+
+
+for _name, _func in (
+    ('add', operator.add), ('sub', operator.sub), ('mul', operator.mul),
+    ('truediv', operator.truediv), ('floordiv', operator.floordiv),
+    ('mod', operator.mod), ('pow', operator.pow), ('and', operator.and_),
+    ('or', operator.or_), ('xor', operator.xor),
+):
+    _forward, _backward = _binary(_func)
+    setattr(Expr, f'__{_name}__', _forward)
+    setattr(Expr, f'__r{_name}__', _backward)
+
+for _name, _func in (
+    ('eq', operator.eq), ('ne', operator.ne), ('lt', operator.lt),
+    ('le', operator.le), ('gt', operator.gt), ('ge', operator.ge),
+):
+    setattr(Expr, f'__{_name}__', _binary(_func)[0])
+
+
+X = Expr()
+
+
+def call(func, *args, **kwargs):
+    """
+    Returns an expression that calls `func` with the given arguments, any of
+    which may be expressions themselves.
+
+    **Examples**
+
+        :::python
+
+        assert call(len, X)('abc') == 3
+        assert call(str.split, X, ',')('a,b') == ['a', 'b']
+    """
+    return Expr(func, args, kwargs)
+
+
+def _describe(value):
+    "Returns a short description of a step argument for reprs."
+    if callable(value) and not isinstance(value, Expr) and hasattr(
+        value, '__qualname__'
+    ):
+        return value.__qualname__
+    return repr(value)
+
+
+class _Compose:
+    "Calls each function on the result of the one before it."
+    def __init__(self, *funcs):
+        self.funcs = funcs
+
+    def __call__(self, value):
+        for func in self.funcs:
+            value = func(value)
+        return value
+
+    def __repr__(self):
+        return f'compose({", ".join(map(_describe, self.funcs))})'
+
+
+class _AllOf:
+    "Returns True if every predicate does, stopping at the first that doesn't."
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def __call__(self, value):
+        for predicate in self.predicates:
+            if not predicate(value):
+                return False
+        return True
+
+    def __repr__(self):
+        return f'all_of({", ".join(map(_describe, self.predicates))})'
+
+
+def _only_arg(step):
+    "Returns the single positional argument of `step`, or None."
+    name, args, kwargs = step
+    return args[0] if len(args) == 1 and not kwargs else None
+
+
+def _fuse_maps(first, second):
+    "map(f).map(g) -> map(compose(f, g))"
+    if first[0] == second[0] == 'map':
+        f, g = _only_arg(first), _only_arg(second)
+        if f is not None and g is not None:
+            funcs = []
+            for func in (f, g):
+                funcs.extend(func.funcs if type(func) is _Compose else [func])
+            return [('map', (_Compose(*funcs),), {})]
+
+
+def _fuse_filters(first, second):
+    "filter(p).filter(q) -> filter(all_of(p, q))"
+    if first[0] == second[0] == 'filter':
+        p, q = _only_arg(first), _only_arg(second)
+        if p is not None and q is not None:
+            predicates = []
+            for predicate in (p, q):
+                predicates.extend(
+                    predicate.predicates if type(predicate) is _AllOf
+                    else [predicate]
+                )
+            return [('filter', (_AllOf(*predicates),), {})]
+
+
+def _cancel_revs(first, second):
+    "rev().rev() -> nothing"
+    if first[0] == second[0] == 'rev':
+        return []
+
+
+def _skip_take(first, second):
+    "skip(a).take(b) -> islice(a, a + b)"
+    if first[0] == 'skip' and second[0] == 'take':
+        a, b = _only_arg(first), _only_arg(second)
+        if a is not None and b is not None:
+            return [('islice', (a, a + b), {})]
+
+
+def _count_without_map(first, second):
+    "map(f).count() -> count()"
+    if first[0] == 'map' and second == ('count', (), {}):
+        return [second]
+
+
+def _limit_before_map(first, second):
+    "map(f).take(n) -> take(n).map(f)"
+    if first[0] == 'map' and second[0] in ('take', 'islice'):
+        return [second, first]
+
+
+# NOTE(pebaz): Every rule assumes that the functions given to `map` and
+# `filter` are pure. Stages that exist for their side effects are never moved.
+_RULES = (
+    _fuse_maps, _fuse_filters, _cancel_revs, _skip_take, _count_without_map,
+    _limit_before_map,
+)
+
+_SIDE_EFFECTS = {'inspect', 'for_each'}
+
+_METHODS = {'rev'}
+
+
+def _run_plan(plan, partition):
+    result = plan.run(partition)
+    return result.collect() if isinstance(result, it) else result
+
+
+class Plan:
+    """
+    A picklable description of a pipeline: an optional `source` function and
+    a list of `(trait name, args, kwargs)` steps.
+
+    Calling a trait on a plan returns a new plan with that step appended, so
+    plans are built just like pipelines. `run()` builds the live pipeline.
+
+    If given, `source` is called with the data passed to `run()` to produce the
+    iterable the pipeline starts from, e.g. to open a worker's own partition
+    file from its path.
+    """
+    def __init__(self, steps=(), source=None):
+        self.steps = tuple(steps)
+        self.source = source
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        if name not in _METHODS and name not in it.traits:
+            raise TraitException(f'Plan: trait "{name}" not found.')
+
+        def step(*args, **kwargs):
+            return Plan(self.steps + ((name, args, kwargs),), self.source)
+
+        step.__doc__ = (
+            getattr(it, name) if name in _METHODS else it.traits[name]
+        ).__doc__
+        return step
+
+    def __repr__(self):
+        steps = ''.join(
+            '.{}({})'.format(
+                name,
+                ', '.join(
+                    [_describe(arg) for arg in args] + [
+                        f'{key}={_describe(arg)}'
+                        for key, arg in kwargs.items()
+                    ]
+                )
+            )
+            for name, args, kwargs in self.steps
+        )
+        return f'Plan(it(...){steps})'
+
+    def run(self, data):
+        "Builds the pipeline over `data` and returns its result."
+        result = it(self.source(data) if self.source else data)
+        for index, (name, args, kwargs) in enumerate(self.steps):
+            if not isinstance(result, it):
+                raise ChemicalException(
+                    f'Plan: step "{name}" follows step '
+                    f'"{self.steps[index - 1][0]}", which does not return an '
+                    'iterator'
+                )
+            result = getattr(result, name)(*args, **kwargs)
+        return result
+
+    def _rewrite(self):
+        "Returns the optimized steps and the names of the rules applied."
+        steps, applied = list(self.steps), []
+
+        rewritten = True
+        while rewritten:
+            rewritten = False
+            for index in range(len(steps) - 1):
+                first, second = steps[index], steps[index + 1]
+                if {first[0], second[0]} & _SIDE_EFFECTS:
+                    continue
+
+                for rule in _RULES:
+                    replacement = rule(first, second)
+                    if replacement is not None:
+                        steps[index:index + 2] = replacement
+                        applied.append(rule.__doc__)
+                        rewritten = True
+                        break
+
+                if rewritten:
+                    break
+
+        return steps, applied
+
+    def optimize(self):
+        """
+        Returns an equivalent plan that does less work, e.g. by fusing
+        consecutive `map` or `filter` steps, cancelling `rev().rev()`, turning
+        `skip().take()` into `islice()` and moving `take()` ahead of `map()`.
+
+        The rewrites assume that the functions passed to `map` and `filter`
+        have no side effects. `inspect` and `for_each` are never moved.
+
+        **Examples**
+
+            :::python
+
+            plan = Plan().map(X + 1).map(X * 2).skip(5).take(10)
+            assert plan.optimize().steps[0][0] == 'islice'
+        """
+        return Plan(self._rewrite()[0], self.source)
+
+    def explain(self, file=None):
+        "Prints this plan, its optimized form and the rules that produced it."
+        steps, applied = self._rewrite()
+        print(f'Original:  {self!r}', file=file)
+        print(f'Optimized: {Plan(steps, self.source)!r}', file=file)
+        for rule in applied:
+            print(f'  applied: {rule}', file=file)
+
+    def dumps(self):
+        "Returns this plan pickled to bytes."
+        try:
+            return pickle.dumps(self)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ChemicalException(
+                'Plan: could not pickle plan. Use importable functions or `X` '
+                'expressions instead of lambdas and closures'
+            ).with_traceback(e.__traceback__) from e
+
+    @staticmethod
+    def loads(data):
+        "Returns the plan pickled into `data` by `dumps()`."
+        return pickle.loads(data)
+
+    def map_partitions(self, partitions, processes=None):
+        """
+        Runs this plan on each partition in a pool of worker processes,
+        returning the results in the same order as `partitions`.
+
+        Any iterators returned by the plan are collected into lists so they
+        can be sent back from the workers.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+
+        # NOTE(pebaz): Fail here with a helpful message rather than in the pool
+        self.dumps()
+        with ProcessPoolExecutor(processes) as pool:
+            return list(pool.map(_run_plan, repeat(self), partitions))
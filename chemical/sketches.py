@@ -0,0 +1,468 @@
+"""
+Compact probabilistic data structures backing Chemical's approximate traits.
+
+Each structure uses a fixed amount of memory chosen up front, no matter how
+many elements are added to it.
+"""
+
+import math
+from hashlib import blake2b
+from . import ChemicalException
+
+
+_MASK = (1 << 64) - 1
+
+
+def _mix64(x):
+    "Spreads the bits of a 64 bit integer (the splitmix64 finalizer)."
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & _MASK
+    return x ^ (x >> 31)
+
+
+def _hash64(value):
+    """
+    Returns a well-distributed 64 bit hash of `value`.
+
+    Integers, strings and bytes hash the same way in every process so that
+    sketches built on separate machines can be merged.
+    """
+    if isinstance(value, str):
+        digest = blake2b(value.encode('utf-8'), digest_size=8, person=b's')
+        return int.from_bytes(digest.digest(), 'little')
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return int.from_bytes(
+            blake2b(value, digest_size=8, person=b'b').digest(), 'little'
+        )
+
+    if isinstance(value, int):
+        return _mix64(value & _MASK)
+
+    return _mix64(hash(value) & _MASK)
+
+
+class BloomFilter:
+    """
+    A set that answers "definitely not seen" or "probably seen" using a fixed
+    `bytearray` of bits.
+
+    The number of bits and hash functions are derived from the expected
+    `capacity` and the acceptable false positive `error_rate`.
+
+    **Examples**
+
+        :::python
+
+        seen = BloomFilter(1000, 0.01)
+        assert seen.add('a')
+        assert not seen.add('a')
+        assert 'a' in seen
+    """
+    def __init__(self, capacity, error_rate=0.01):
+        if capacity <= 0:
+            raise ChemicalException('BloomFilter: capacity must be > 0')
+
+        if not 0 < error_rate < 1:
+            raise ChemicalException(
+                'BloomFilter: error_rate must be between 0 and 1'
+            )
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.bits = max(8, int(math.ceil(bits)))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, value):
+        "Kirsch-Mitzenmacher double hashing: k positions from one 64 bit hash."
+        hashed = _hash64(value)
+        pos, step = hashed & 0xffffffff, (hashed >> 32) | 1
+        bits = self.bits
+        return [(pos + i * step) % bits for i in range(self.hashes)]
+
+    def add(self, value):
+        "Adds `value`, returning `True` if it was definitely not seen before."
+        array = self.array
+        added = False
+        for pos in self._positions(value):
+            mask = 1 << (pos & 7)
+            pos >>= 3
+            if not array[pos] & mask:
+                array[pos] |= mask
+                added = True
+        return added
+
+    def __contains__(self, value):
+        array = self.array
+        for pos in self._positions(value):
+            if not array[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def merge(self, other):
+        "Adds every element of another filter with the same shape to this one."
+        if (self.bits, self.hashes) != (other.bits, other.hashes):
+            raise ChemicalException(
+                'BloomFilter: can only merge filters with the same shape'
+            )
+        merged = int.from_bytes(self.array, 'little') | int.from_bytes(
+            other.array, 'little'
+        )
+        self.array = bytearray(merged.to_bytes(len(self.array), 'little'))
+        return self
+
+    @property
+    def nbytes(self):
+        "The number of bytes used to store the bits of the filter."
+        return len(self.array)
+
+
+class HyperLogLog:
+    """
+    Estimates the number of distinct elements added to it using `2 **
+    precision` one byte registers.
+
+    The standard error of the estimate is about `1.04 / sqrt(2 ** precision)`,
+    which is 0.8% for the default precision of 14 (16 KiB of registers).
+
+    **Examples**
+
+        :::python
+
+        distinct = HyperLogLog().update(range(1000)).update(range(500))
+        assert 990 < distinct.count() < 1010
+    """
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ChemicalException(
+                'HyperLogLog: precision must be between 4 and 18'
+            )
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        hashed = _hash64(value)
+        width = 64 - self.precision
+        index = hashed >> width
+        rank = width - (hashed & ((1 << width) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        "Adds every element of `values`, returning this sketch."
+        add = self.add
+        for value in values:
+            add(value)
+        return self
+
+    def count(self):
+        "Returns the estimated number of distinct elements added."
+        registers = self.registers
+        size = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / math.fsum(
+            2.0 ** -rank for rank in registers
+        )
+        zeros = registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def merge(self, other):
+        "Adds every element of another sketch with the same precision to this."
+        if self.precision != other.precision:
+            raise ChemicalException(
+                'HyperLogLog: can only merge sketches with the same precision'
+            )
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    @property
+    def nbytes(self):
+        return len(self.registers)
+
+
+class KLLSketch:
+    """
+    Estimates quantiles of the elements added to it using the KLL algorithm,
+    keeping roughly `3 * k` elements no matter how many are added.
+
+    Elements only need to be comparable with each other. The rank error of a
+    query is about `1.7 / k` with high probability.
+
+    **Examples**
+
+        :::python
+
+        sketch = KLLSketch().update(range(1001))
+        assert 450 <= sketch.quantile(0.5) <= 550
+    """
+    def __init__(self, k=200, seed=None):
+        import random
+
+        if k < 8:
+            raise ChemicalException('KLLSketch: k must be >= 8')
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+        self.random = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, height):
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(
+            self._capacity(height) for height in range(len(self.compactors))
+        )
+
+    def _compress(self):
+        for height, compactor in enumerate(self.compactors):
+            if len(compactor) < self._capacity(height):
+                continue
+
+            if height + 1 == len(self.compactors):
+                self._grow()
+
+            compactor.sort()
+            leftover = [compactor.pop()] if len(compactor) % 2 else []
+            # Promote every other element, so each one stands for twice as many
+            self.compactors[height + 1].extend(
+                compactor[self.random.random() < 0.5::2]
+            )
+            compactor[:] = leftover
+            self._size = sum(len(c) for c in self.compactors)
+            return
+
+    def add(self, value):
+        self.compactors[0].append(value)
+        self.count += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def update(self, values):
+        "Adds every element of `values`, returning this sketch."
+        add = self.add
+        for value in values:
+            add(value)
+        return self
+
+    def merge(self, other):
+        "Adds every element summarized by another sketch to this one."
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, compactor in enumerate(other.compactors):
+            self.compactors[height].extend(compactor)
+        self.count += other.count
+        self._size = sum(len(c) for c in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def quantiles(self, fractions):
+        "Returns the estimated element at each fraction in `fractions`."
+        if not self.count:
+            raise ChemicalException('KLLSketch: no elements have been added')
+
+        weighted = sorted(
+            (value, 1 << height)
+            for height, compactor in enumerate(self.compactors)
+            for value in compactor
+        )
+        total = sum(weight for _, weight in weighted)
+
+        results = []
+        for fraction in fractions:
+            if not 0 <= fraction <= 1:
+                raise ChemicalException(
+                    'KLLSketch: quantiles must be between 0 and 1'
+                )
+            target = fraction * total
+            seen = 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    break
+            results.append(value)
+        return results
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+
+class CountMinSketch:
+    """
+    Estimates how many times each element was added using `depth` rows of
+    `width` counters. Estimates never undercount, and overcount by at most
+    `e / width` of the total count with probability `1 - e ** -depth`.
+
+    **Examples**
+
+        :::python
+
+        counts = CountMinSketch().update('abracadabra')
+        assert counts.estimate('a') >= 5
+    """
+    def __init__(self, width=2048, depth=5):
+        from array import array
+
+        if width <= 0 or depth <= 0:
+            raise ChemicalException(
+                'CountMinSketch: width and depth must be > 0'
+            )
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.rows = [array('Q', bytes(8 * width)) for _ in range(depth)]
+
+    def _positions(self, value):
+        hashed = _hash64(value)
+        pos, step = hashed & 0xffffffff, (hashed >> 32) | 1
+        width = self.width
+        return [(pos + i * step) % width for i in range(self.depth)]
+
+    def add(self, value, count=1):
+        "Adds `value` `count` times, returning its new estimated count."
+        self.total += count
+        estimate = None
+        for row, pos in zip(self.rows, self._positions(value)):
+            row[pos] += count
+            if estimate is None or row[pos] < estimate:
+                estimate = row[pos]
+        return estimate
+
+    def update(self, values):
+        "Adds every element of `values`, returning this sketch."
+        add = self.add
+        for value in values:
+            add(value)
+        return self
+
+    def estimate(self, value):
+        return min(
+            row[pos] for row, pos in zip(self.rows, self._positions(value))
+        )
+
+    def merge(self, other):
+        "Adds the counts of another sketch with the same shape to this one."
+        from array import array
+
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ChemicalException(
+                'CountMinSketch: can only merge sketches with the same shape'
+            )
+        self.rows = [
+            array('Q', map(int.__add__, mine, theirs))
+            for mine, theirs in zip(self.rows, other.rows)
+        ]
+        self.total += other.total
+        return self
+
+    @property
+    def nbytes(self):
+        return sum(row.itemsize * len(row) for row in self.rows)
+
+
+class HeavyHitters:
+    """
+    Tracks the `k` most frequent elements added to it, using a
+    `CountMinSketch` for counts and a heap of the current top `k` candidates.
+
+    **Examples**
+
+        :::python
+
+        top = HeavyHitters(2).update('abracadabra')
+        assert [item for item, _ in top.top()] == ['a', 'b']
+    """
+    def __init__(self, k, width=2048, depth=5):
+        if k <= 0:
+            raise ChemicalException('HeavyHitters: k must be > 0')
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates = {}
+        self._heap = []
+        self._pushes = 0
+
+    def _push(self, value, estimate):
+        import heapq
+
+        self._pushes += 1
+        heapq.heappush(self._heap, (estimate, self._pushes, value))
+
+        # NOTE(pebaz): Stale heap entries are skipped lazily, so rebuild the
+        # heap once they outnumber the live ones to keep it bounded.
+        if len(self._heap) > 4 * self.k:
+            self._rebuild()
+
+    def _rebuild(self):
+        import heapq
+
+        self._heap = [
+            (estimate, i, value)
+            for i, (value, estimate) in enumerate(self.candidates.items())
+        ]
+        self._pushes = len(self._heap)
+        heapq.heapify(self._heap)
+
+    def _evict_smallest(self, estimate):
+        "Evicts the smallest candidate if `estimate` beats it."
+        import heapq
+
+        heap, candidates = self._heap, self.candidates
+        while heap:
+            smallest, _, value = heap[0]
+            if candidates.get(value) != smallest:
+                heapq.heappop(heap)
+                continue
+            if smallest >= estimate:
+                return False
+            heapq.heappop(heap)
+            del candidates[value]
+            return True
+        return True
+
+    def add(self, value):
+        estimate = self.sketch.add(value)
+        candidates = self.candidates
+        if value in candidates or len(candidates) < self.k:
+            candidates[value] = estimate
+            self._push(value, estimate)
+        elif self._evict_smallest(estimate):
+            candidates[value] = estimate
+            self._push(value, estimate)
+
+    def update(self, values):
+        "Adds every element of `values`, returning this sketch."
+        add = self.add
+        for value in values:
+            add(value)
+        return self
+
+    def merge(self, other):
+        "Adds the counts and candidates of another tracker to this one."
+        self.sketch.merge(other.sketch)
+        estimate = self.sketch.estimate
+        merged = {
+            value: estimate(value)
+            for value in set(self.candidates) | set(other.candidates)
+        }
+        self.candidates = dict(
+            sorted(merged.items(), key=lambda pair: pair[1], reverse=True)[
+                :self.k
+            ]
+        )
+        self._rebuild()
+        return self
+
+    def top(self):
+        "Returns `(element, estimated count)` pairs, most frequent first."
+        return sorted(
+            self.candidates.items(), key=lambda pair: pair[1], reverse=True
+        )
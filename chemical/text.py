@@ -0,0 +1,265 @@
+"""
+Lazy tokenization of text and binary data.
+
+`it('a b')` yields one character at a time and `it(b'a b')` yields ints, so
+splitting them up used to mean collecting everything into a string first. The
+traits in this module tokenize without doing so:
+
+    :::python
+
+    with open('words.txt', 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=ACCESS_READ) as data:
+            longest = it(data).split_lines().map(len).max()
+
+When the source is `bytes`, a `bytearray`, a `memoryview` or an `mmap`, the
+whole buffer is searched at once and tokens are `memoryview` slices of it, so
+no bytes are copied. Call `bytes()` on a token to keep it around after the
+buffer is closed. A `str` source is searched at once too, though its tokens are
+copies since Python strings can't share memory.
+
+Any other iterator is treated as a stream of `str` or `bytes` chunks, such as
+blocks read from a file, and tokens that span two chunks are joined back up.
+"""
+
+import re
+from itertools import chain, islice
+from . import it, trait, ChemicalException
+
+
+_CHUNK = 64 * 1024
+
+_LINES = re.compile(r'\n'), re.compile(br'\n')
+
+_WORDS = re.compile(r'\S+'), re.compile(br'\S+')
+
+
+def _buffer(self):
+    """
+    Returns the `str` or the byte `memoryview` this iterator walks over, or
+    `None` if it has to be tokenized as a stream of chunks.
+    """
+    source = self._sequence()
+    if source is None or isinstance(source, str):
+        return source
+
+    try:
+        view = memoryview(source)
+    except TypeError:
+        return None
+
+    if view.itemsize != 1:
+        view.release()
+        return None
+    return view if view.format == 'B' else view.cast('B')
+
+
+def _chunks(items):
+    "Yields `str` or `bytes` chunks, batching the ints of a `bytes` iterator."
+    items = iter(items)
+    for first in items:
+        if isinstance(first, int):
+            yield bytes(chain([first], islice(items, _CHUNK - 1)))
+            while True:
+                chunk = bytes(islice(items, _CHUNK))
+                if not chunk:
+                    return
+                yield chunk
+
+        yield bytes(first) if isinstance(first, memoryview) else first
+        for chunk in items:
+            yield bytes(chunk) if isinstance(chunk, memoryview) else chunk
+
+
+def _compile(name, pattern, data):
+    "Returns `pattern` compiled for the type of `data`."
+    patterns = pattern if isinstance(pattern, tuple) else None
+    binary = not isinstance(data, str)
+
+    if patterns:
+        return patterns[binary]
+
+    if isinstance(pattern, (str, bytes)):
+        pattern = re.compile(pattern)
+
+    if isinstance(pattern.pattern, str) == binary:
+        kind = 'bytes' if binary else 'str'
+        raise ChemicalException(
+            f'{name}: pattern must be {kind} to tokenize {kind} data'
+        )
+    return pattern
+
+
+def _gaps(buffer, matches, mode, keepends):
+    """
+    Yields the tokens between the separators in `matches`, then returns where
+    the text after the last separator starts.
+    """
+    strip = mode == 'lines' and not keepends
+    cr = '\r' if isinstance(buffer, str) else 13
+    start = 0
+    for match in matches:
+        end = match.end() if keepends else match.start()
+
+        # NOTE(pebaz): Searching for a lone `\n` is much faster than for
+        # `\r?\n`
+        if strip and end > start and buffer[end - 1] == cr:
+            end -= 1
+
+        yield buffer[start:end]
+        start = match.end()
+    return start
+
+
+def _whole(buffer, pattern, mode, keepends):
+    "Tokenizes a whole buffer, slicing tokens out of it."
+    if mode == 'matches':
+        for match in pattern.finditer(buffer):
+            yield buffer[match.start():match.end()]
+        return
+
+    start = yield from _gaps(buffer, pattern.finditer(buffer), mode, keepends)
+    if mode == 'split' or start < len(buffer):
+        yield buffer[start:]
+
+
+def _matches(buffer, pattern):
+    """
+    Yields the matches in `buffer` except one that reaches its end, then
+    returns where the text still to be searched starts.
+    """
+    start = 0
+    for match in pattern.finditer(buffer):
+        # NOTE(pebaz): The token might go on in the next chunk
+        if match.end() == len(buffer):
+            return match.start()
+        yield buffer[match.start():match.end()]
+        start = match.end()
+    return start
+
+
+def _stream(chunks, pattern, mode, keepends):
+    """
+    Tokenizes a stream of chunks. Whatever follows the last complete token of
+    a chunk is carried over and searched again with the chunks after it.
+    """
+    pieces, size, carried = [], 0, 0
+    for chunk in chunks:
+        pieces.append(chunk)
+        size += len(chunk)
+
+        # NOTE(pebaz): Only search carried over text again once it has at least
+        # doubled, so that a long token doesn't cost quadratic time
+        if size < 2 * carried:
+            continue
+
+        buffer = chunk[:0].join(pieces)
+        if mode == 'matches':
+            start = yield from _matches(buffer, pattern)
+        else:
+            start = yield from _gaps(
+                buffer, pattern.finditer(buffer), mode, keepends
+            )
+        pieces = [buffer[start:]]
+        size = carried = len(pieces[0])
+
+    if pieces:
+        buffer = pieces[0][:0].join(pieces)
+        yield from _whole(buffer, pattern, mode, keepends)
+
+
+def _tokenize(self, name, pattern, mode, keepends=False):
+    buffer = _buffer(self)
+    if buffer is not None:
+        tokens = _whole(
+            buffer, _compile(name, pattern, buffer), mode, keepends
+        )
+
+    else:
+        chunks = _chunks(self)
+        first = next(chunks, None)
+        if first is None:
+            return it([])
+
+        tokens = _stream(
+            chain([first], chunks), _compile(name, pattern, first), mode,
+            keepends
+        )
+
+    return it(tokens, None, (0, None))
+
+
+@trait
+def split(self, sep=None):
+    """
+    Lazily splits text or binary data on each occurrence of `sep`, like
+    `str.split()`. If `sep` is `None`, splits on runs of whitespace and leaves
+    out empty tokens.
+
+    **Examples**
+
+        :::python
+
+        assert it('a,b,,c').split(',').collect() == ['a', 'b', '', 'c']
+        assert it('  to be  or ').split().collect() == ['to', 'be', 'or']
+        assert it(b'a b').split(b' ').map(bytes).collect() == [b'a', b'b']
+        assert it(['a,b', 'c,', 'd']).split(',').collect() == ['a', 'bc', 'd']
+    """
+    if sep is None:
+        return _tokenize(self, 'split', _WORDS, 'matches')
+
+    if not sep:
+        raise ChemicalException('split: separator must not be empty')
+
+    if isinstance(sep, str):
+        pattern = re.escape(sep)
+    else:
+        pattern = re.escape(bytes(sep))
+    return _tokenize(self, 'split', pattern, 'split')
+
+
+@trait
+def split_lines(self, keepends=False):
+    """
+    Lazily splits text or binary data into lines, like reading them from a
+    file: lines end with `\\n` or `\\r\\n` and a trailing newline doesn't start
+    an empty line. Pass `keepends=True` to keep the line endings.
+
+    **Examples**
+
+        :::python
+
+        assert it('a\\r\\nb\\n').split_lines().collect() == ['a', 'b']
+        assert it('a\\nb').split_lines(True).collect() == ['a\\n', 'b']
+
+        lines = it(memoryview(b'ab\\ncd')).split_lines()
+        assert lines.map(bytes).collect() == [b'ab', b'cd']
+    """
+    return _tokenize(self, 'split_lines', _LINES, 'lines', keepends)
+
+
+@trait
+def regex_tokens(self, pattern, flags=0):
+    """
+    Lazily returns every non-overlapping match of the regular expression
+    `pattern` in text or binary data, as found by `re.finditer()`.
+
+    When tokenizing a stream of chunks, a match that reaches the end of a
+    chunk is held back until the next chunk shows where it ends.
+
+    **Examples**
+
+        :::python
+
+        words = it('one, two; three').regex_tokens(r'\\w+')
+        assert words.collect() == ['one', 'two', 'three']
+
+        numbers = it([b'12 3', b'4 56']).regex_tokens(rb'\\d+')
+        assert numbers.map(int).collect() == [12, 34, 56]
+    """
+    if isinstance(pattern, (str, bytes)):
+        pattern = re.compile(pattern, flags)
+    elif flags:
+        raise ChemicalException(
+            'regex_tokens: flags can only be given with an uncompiled pattern'
+        )
+    return _tokenize(self, 'regex_tokens', pattern, 'matches')
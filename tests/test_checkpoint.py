@@ -0,0 +1,136 @@
+import pytest
+from chemical import it, ChemicalException
+from chemical.checkpoint import Checkpoint, Resumable
+
+
+def build(ckpt, data):
+    return (ckpt.source(data)
+        .skip(2)
+        .filter(lambda x: x % 3)
+        .scan(0, lambda acc, x: acc(acc._ + x))
+    )
+
+
+def test_track_resumes_sequence(tmp_path):
+    path = str(tmp_path / 'job.ckpt')
+    data = list(range(100))
+    expected = build(Checkpoint(path), data).collect()
+
+    ckpt = Checkpoint(path, every=5)
+    assert not ckpt.resumed
+    first = []
+    for item in ckpt.track(build(ckpt, data)):
+        first.append(item)
+        if len(first) == 12:
+            break  # Simulate a crash after 12 elements were handled
+
+    ckpt = Checkpoint(path, every=5)
+    assert ckpt.resumed
+    pipeline = build(ckpt, data)
+    rest = list(ckpt.track(pipeline))
+
+    # Elements handled after the last save are produced again
+    assert first[:10] + rest == expected
+    assert pipeline.stages()[0].offset == 100
+    assert not Checkpoint(path).resumed
+
+
+def test_fold_resumes_file(tmp_path):
+    path = str(tmp_path / 'job.ckpt')
+    source = tmp_path / 'numbers.txt'
+    source.write_text(''.join(f'{i}\n' for i in range(1000)))
+
+    class Crash(Exception):
+        ...
+
+    def crash_at(limit):
+        seen = []
+        def add(acc, x):
+            seen.append(x)
+            if len(seen) == limit:
+                raise Crash()
+            return acc(acc._ + x)
+        return add, seen
+
+    add, seen = crash_at(250)
+    with open(source) as file, pytest.raises(Crash):
+        ckpt = Checkpoint(path, every=100)
+        ckpt.fold(ckpt.source(file).map(int), 0, add)
+
+    add, seen = crash_at(None)
+    with open(source) as file:
+        ckpt = Checkpoint(path, every=100)
+        total = ckpt.fold(ckpt.source(file).map(int), 0, add)
+        assert total == sum(range(1000))
+
+    # Resumed right after the 200th element instead of from the start
+    assert seen[0] == 200
+    assert len(seen) == 800
+
+
+def test_restore_errors(tmp_path):
+    path = str(tmp_path / 'job.ckpt')
+    ckpt = Checkpoint(path)
+    ckpt.save(ckpt.source([1, 2, 3]).map(str))
+
+    with pytest.raises(ChemicalException):
+        Checkpoint(path).restore(it([1, 2, 3]).map(str).map(str))
+
+    with pytest.raises(ChemicalException):
+        Checkpoint(path).restore(it([1, 2, 3]).map(str))
+
+    with pytest.raises(ChemicalException):
+        Resumable(iter([1, 2, 3]))
+
+    with pytest.raises(ChemicalException):
+        Checkpoint(path, every=0)
+
+
+def test_stage_state():
+    skip = it('abcd').skip(2)
+    assert skip.save_state() == 2
+    assert skip.next() == 'c'
+    assert skip.save_state() == 0
+
+    scan = it((1, 2, 3)).scan(10, lambda acc, x: acc(acc._ + x))
+    scan.next()
+    assert scan.save_state() == 11
+    scan.load_state(0)
+    assert scan.next() == 2
+
+    peek = it('abc').peekable()
+    peek.peek_n(2)
+    assert peek.save_state() == ['a', 'b']
+
+    assert it('abc').map(str.upper).save_state() is None
+    assert len(it('abc').map(str.upper).filter(str.isupper).stages()) == 3
+
+
+def test_unresumable_stages(tmp_path):
+    path = str(tmp_path / 'job.ckpt')
+    data = [1, 1, 2, 2, 3, 3, 4, 5, 6]
+
+    for build in (
+        lambda c: c.source(data).dedup(),
+        lambda c: c.source(data).unique(),
+        lambda c: c.source(data).windows(2),
+        lambda c: c.source(data).chunks(2),
+        lambda c: c.source(data).prefetch(2),
+        lambda c: c.source(data).window_sum(2),
+        lambda c: c.source(data).map(str).enumerate(),
+    ):
+        ckpt = Checkpoint(path, every=2)
+        with pytest.raises(ChemicalException):
+            list(ckpt.track(build(ckpt)))
+        with pytest.raises(ChemicalException):
+            ckpt.save(build(ckpt))
+
+    ckpt = Checkpoint(path, every=2)
+    pipeline = (ckpt.source(data)
+        .map(str)
+        .filter(str.isdigit)
+        .step_by(2)
+        .peekable()
+        .memory_limit(None)
+    )
+    assert list(ckpt.track(pipeline)) == ['1', '2', '3', '4', '6']
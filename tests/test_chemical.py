@@ -588,6 +588,17 @@ def test_find():
         it('asdf').rev().find(lambda x: x == 'say what?')
 
 
+def test_rfind():
+    assert it('asdf').rfind(lambda x: x in 'as') == 's'
+    assert it(range(10)).map(lambda x: x * 3).rfind(lambda x: x % 2) == 27
+    assert it(iter('asdf')).rfind(lambda x: x in 'as') == 's'
+    assert it('asdf').cycle().take(6).rfind(lambda x: x == 'a') == 'a'
+    with pytest.raises(ChemicalException):
+        it('asdf').rfind(lambda x: x == 'say what?')
+    with pytest.raises(ChemicalException):
+        it(iter('asdf')).rfind(lambda x: x == 'say what?')
+
+
 def test_position():
     assert it('asdf').position(lambda x: x == 'd') == 2
     with pytest.raises(ChemicalException):
@@ -782,6 +793,42 @@ def test_par_iter():
     assert it('asdf').par_iter().rev().size_hint() == (4, 4)
 
 
+def test_par_iter_concurrent():
+    import threading, time
+
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow(x):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return x * 2
+
+    start = time.perf_counter()
+    result = it(range(16)).map(slow).map(str).par_iter(workers=8).collect()
+    elapsed = time.perf_counter() - start
+    assert result == [str(x * 2) for x in range(16)]
+    assert peak[0] > 1 and elapsed < 0.5
+
+    assert it(range(8)).map(slow).par_iter(8).rev().collect() == [
+        14, 12, 10, 8, 6, 4, 2, 0
+    ]
+    assert it(range(8)).skip(2).map(slow).par_iter(8).collect() == [
+        4, 6, 8, 10, 12, 14
+    ]
+    assert it(x for x in range(3)).map(slow).par_iter().collect() == [0, 2, 4]
+
+    def fail(x):
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        it(range(4)).map(fail).par_iter(2).collect()
+
+
 def test_current():
     assert it(range(4)).current().collect(str) == '0123'
     assert (it(range(100))
@@ -819,3 +866,854 @@ def test_current():
     assert c.curr() == 'd'
     assert c.peek() == 'f'
     assert c.next() == 'f'
+
+
+def test_dedup():
+    assert it('aabbbca').dedup().collect(str) == 'abca'
+    assert it([0, 0, None, None, '', 1]).dedup().collect() == [0, None, '', 1]
+    assert it('').dedup().collect() == []
+
+    assert it('aabbbca').dedup().rev().collect(str) == 'acba'
+    assert it(i for i in 'aab').dedup().collect(str) == 'ab'
+
+    with pytest.raises(ChemicalException):
+        a = it('aabb').dedup()
+        a.next()
+        a.rev()
+
+    assert it('aabb').dedup().size_hint() == (1, 4)
+    assert it('').dedup().size_hint() == (0, 0)
+
+
+def test_unique():
+    assert it('abacb').unique().collect(str) == 'abc'
+    assert it('aAbB').unique(key=str.lower).collect(str) == 'ab'
+    assert it([0, False, 0.0, None, None]).unique().collect() == [0, None]
+
+    assert it('abacb').unique().rev().collect(str) == 'cba'
+    assert it('aAbB').unique(key=str.lower).rev().collect(str) == 'ba'
+
+    # Reversing holds on to the kept elements, which memory accounting sees
+    backward = it('abacbd').unique().rev()
+    assert sum(stage.buffered()[0] for stage in backward.stages()) == 0
+    assert backward.next() == 'd'
+    assert sum(stage.buffered()[0] for stage in backward.stages()) == 3
+    assert backward.collect(str) == 'cba'
+    assert it(i for i in 'abacb').unique().collect(str) == 'abc'
+
+    assert it(range(1000)).chain(range(1000)).unique(
+        approx=True, capacity=1000, error_rate=0.001
+    ).count() >= 990
+    assert it('abacb').unique(approx=True, capacity=10).collect(str) == 'abc'
+    assert it('aAbB').unique(
+        key=str.lower, approx=True, capacity=10
+    ).collect(str) == 'ab'
+
+    with pytest.raises(ChemicalException):
+        a = it('abc').unique()
+        a.next()
+        a.rev()
+
+    with pytest.raises(ChemicalException):
+        it('abc').unique(approx=True, error_rate=2).collect()
+
+    assert it('abc').unique().size_hint() == (1, 3)
+    assert it('abc').unique().rev().size_hint() == (1, 3)
+
+
+def test_windows_and_chunks_unsliceable():
+    from collections import deque
+
+    assert it(deque([1, 2, 3])).windows(2).collect() == [(1, 2), (2, 3)]
+    assert it(deque([1, 2, 3])).chunks(2).collect() == [(1, 2), (3,)]
+    assert it(deque([1, 2, 3])).windows(2).rev().collect() == [(2, 3), (1, 2)]
+    assert it(range(4)).windows(3).collect() == [(0, 1, 2), (1, 2, 3)]
+    assert it(range(5)).chunks(2).collect() == [(0, 1), (2, 3), (4,)]
+
+
+def test_windows():
+    assert it('abcd').windows(2).collect() == ['ab', 'bc', 'cd']
+    assert it([1, 2, 3]).windows(3).collect() == [[1, 2, 3]]
+    assert it([1, 2, 3]).windows(4).collect() == []
+    assert it(iter('abc')).windows(2).collect() == [('a', 'b'), ('b', 'c')]
+    assert it('abcd').skip(1).windows(2).collect() == [('b', 'c'), ('c', 'd')]
+
+    data = b'abcd'
+    views = it(data).windows(2).collect()
+    assert all(isinstance(view, memoryview) for view in views)
+    assert [bytes(view) for view in views] == [b'ab', b'bc', b'cd']
+    assert views[0].obj is data
+
+    assert it('abcd').windows(2).rev().collect() == ['cd', 'bc', 'ab']
+    assert it('abcd').map(str.upper).windows(3).rev().collect() == [
+        ('B', 'C', 'D'), ('A', 'B', 'C')
+    ]
+    assert it('abcd').rev().windows(2).collect() == [('d', 'c'), ('c', 'b'), (
+        'b', 'a'
+    )]
+
+    a = it('abcd')
+    a.next()
+    assert a.windows(2).collect() == [('b', 'c'), ('c', 'd')]
+
+    with pytest.raises(ChemicalException):
+        it('abc').windows(0)
+
+    with pytest.raises(ChemicalException):
+        a = it('abcd').windows(2)
+        a.next()
+        a.rev()
+
+    assert it('abcd').windows(2).size_hint() == (3, 3)
+    assert it('abcd').windows(5).size_hint() == (0, 0)
+    assert it('abcd').map(str.upper).windows(2).rev().size_hint() == (3, 3)
+    assert it(iter('abcd')).windows(2).size_hint() == (0, None)
+
+
+def test_chunks():
+    assert it('abcde').chunks(2).collect() == ['ab', 'cd', 'e']
+    assert it('abcd').chunks(2).collect() == ['ab', 'cd']
+    assert it(iter('abc')).chunks(2).collect() == [('a', 'b'), ('c',)]
+    assert it('').chunks(2).collect() == []
+
+    views = it(bytearray(b'abcde')).chunks(2).collect()
+    assert all(isinstance(view, memoryview) for view in views)
+    assert [bytes(view) for view in views] == [b'ab', b'cd', b'e']
+
+    assert it('abcde').chunks(2).rev().collect() == ['e', 'cd', 'ab']
+    assert it('abcde').map(str.upper).chunks(2).rev().collect() == [
+        ('E',), ('C', 'D'), ('A', 'B')
+    ]
+
+    with pytest.raises(ChemicalException):
+        it(iter('abc')).chunks(2).rev()
+
+    with pytest.raises(ChemicalException):
+        it('abc').chunks(0)
+
+    assert it('abcde').chunks(2).size_hint() == (3, 3)
+    assert it('abcde').chunks(2).rev().size_hint() == (3, 3)
+    assert it('abcde').filter(str.isalpha).chunks(2).size_hint() == (0, 3)
+
+
+def test_chunks_exact():
+    assert it('abcde').chunks_exact(2).collect() == ['ab', 'cd']
+    assert it(iter('abcde')).chunks_exact(2).collect() == [
+        ('a', 'b'), ('c', 'd')
+    ]
+    assert it(memoryview(b'abcde')).chunks_exact(5).collect() == [b'abcde']
+
+    assert it('abcde').chunks_exact(2).rev().collect() == ['cd', 'ab']
+    assert it('abcde').map(str.upper).chunks_exact(2).rev().collect() == [
+        ('C', 'D'), ('A', 'B')
+    ]
+
+    assert it('abcde').chunks_exact(2).size_hint() == (2, 2)
+    assert it('abcde').chunks_exact(2).rev().size_hint() == (2, 2)
+
+
+def test_window_sum():
+    assert it((1, 2, 3, 4)).window_sum(2).collect() == [3, 5, 7]
+    assert it((1, 2, 3, 4)).window_sum(1).collect() == [1, 2, 3, 4]
+    assert it((1, 2, 3, 4)).window_sum(5).collect() == []
+    assert it(iter((1, 2, 3))).window_sum(3).collect() == [6]
+
+    from math import fsum
+    floats = [1e16, 1.0, -1e16, 1.0] * 3
+    assert it(floats).window_sum(3, kahan=True).collect() == [
+        fsum(floats[i:i + 3]) for i in range(len(floats) - 2)
+    ]
+    assert it(floats).window_sum(3).collect() != [
+        fsum(floats[i:i + 3]) for i in range(len(floats) - 2)
+    ]
+
+    assert it((1, 2, 3, 4)).window_sum(2).rev().collect() == [7, 5, 3]
+
+    with pytest.raises(ChemicalException):
+        it((1, 2)).window_sum(0)
+
+    with pytest.raises(ChemicalException):
+        a = it((1, 2, 3)).window_sum(2)
+        a.next()
+        a.rev()
+
+    assert it((1, 2, 3, 4)).window_sum(2).size_hint() == (3, 3)
+    assert it((1, 2, 3, 4)).window_sum(2).rev().size_hint() == (3, 3)
+
+
+def test_window_min():
+    data = 3, 1, 4, 1, 5, 9, 2, 6
+    expected = [min(data[i:i + 3]) for i in range(len(data) - 2)]
+    assert it(data).window_min(3).collect() == expected
+    assert it(data).window_min(3).rev().collect() == expected[::-1]
+    assert it(data).window_min(1).collect() == list(data)
+    assert it('bca').window_min(2).collect(str) == 'ba'
+
+    assert it(data).window_min(3).size_hint() == (6, 6)
+
+
+def test_window_max():
+    data = 3, 1, 4, 1, 5, 9, 2, 6
+    expected = [max(data[i:i + 3]) for i in range(len(data) - 2)]
+    assert it(data).window_max(3).collect() == expected
+    assert it(data).window_max(3).rev().collect() == expected[::-1]
+    assert it(iter(data)).window_max(8).collect() == [9]
+
+    assert it(data).window_max(3).rev().size_hint() == (6, 6)
+
+
+def test_window_mean():
+    from statistics import mean, pvariance
+
+    data = 3, 1, 4, 1, 5, 9, 2, 6
+    means = [mean(data[i:i + 3]) for i in range(len(data) - 2)]
+    variances = [pvariance(data[i:i + 3]) for i in range(len(data) - 2)]
+
+    assert it(data).window_mean(3).collect() == pytest.approx(means)
+    backward = it(data).window_mean(3).rev().collect()
+    assert backward == pytest.approx(means[::-1])
+
+    pairs = it(data).window_mean(3, variance=True).collect()
+    assert [m for m, _ in pairs] == pytest.approx(means)
+    assert [v for _, v in pairs] == pytest.approx(variances)
+
+    assert it(data).window_mean(3).size_hint() == (6, 6)
+
+
+def test_window_numpy():
+    np = pytest.importorskip('numpy')
+    from array import array
+
+    data = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0]
+    for source in (np.array(data), array('d', data)):
+        assert it(source).window_sum(3).collect() == pytest.approx(
+            it(data).window_sum(3).collect()
+        )
+        assert it(source).window_sum(3, kahan=True).collect() == pytest.approx(
+            it(data).window_sum(3).collect()
+        )
+        assert it(source).window_min(3).collect() == it(data).window_min(
+            3
+        ).collect()
+        assert it(source).window_max(3).collect() == it(data).window_max(
+            3
+        ).collect()
+        pairs = it(source).window_mean(3, variance=True).collect()
+        expected = it(data).window_mean(3, variance=True).collect()
+        assert all(isinstance(pair, tuple) for pair in pairs)
+        assert it(pairs).flatten().collect() == pytest.approx(
+            it(expected).flatten().collect()
+        )
+        assert it(source).window_sum(9).collect() == []
+        assert it(source).window_max(3).rev().collect() == it(data).window_max(
+            3
+        ).rev().collect()
+
+    assert it(np.arange(6)).window_sum(2).collect() == [1, 3, 5, 7, 9]
+    reversed_sums = it(np.arange(6)).window_sum(2).rev().collect()
+    assert reversed_sums == [9, 7, 5, 3, 1]
+    assert all(type(total) is int for total in reversed_sums)
+    assert it(np.arange(6.0)).window_mean(2, variance=True).rev().next() == (
+        4.5, 0.25
+    )
+
+    # Windows are converted to Python numbers lazily, a chunk at a time
+    sums = it(np.arange(10 ** 6)).window_sum(2)
+    assert sums.take(3).collect() == [1, 3, 5]
+    assert sums.next() == 7
+
+
+def test_sample():
+    assert len(it(range(100)).sample(5)) == 5
+    assert sorted(it('abc').sample(5)) == ['a', 'b', 'c']
+    assert it('abc').sample(0) == []
+    assert it(range(100)).sample(3, seed=7) == it(range(100)).sample(3, seed=7)
+    assert len(set(it(range(100)).map(lambda x: x).sample(10))) == 10
+    assert sorted(it(iter('abc')).sample(3)) == ['a', 'b', 'c']
+    assert set(it(range(100)).filter(lambda x: x % 2).sample(10)) <= set(
+        range(1, 100, 2)
+    )
+
+    counts = [0] * 10
+    for seed in range(2000):
+        for i in it(iter(range(10))).sample(2, seed=seed):
+            counts[i] += 1
+    assert all(300 < count < 500 for count in counts)
+
+    with pytest.raises(ChemicalException):
+        it('abc').sample(-1)
+
+
+def test_sample_rate():
+    assert it(range(10)).sample_rate(1.0).collect() == [*range(10)]
+    assert it(range(10)).sample_rate(0.0).collect() == []
+    assert it(iter(range(10))).sample_rate(1).collect() == [*range(10)]
+    assert 800 < it(range(10000)).sample_rate(0.1).count() < 1200
+    assert 800 < it(iter(range(10000))).sample_rate(0.1).count() < 1200
+    assert it(range(100)).sample_rate(0.3, seed=1).collect() == (
+        it(range(100)).sample_rate(0.3, seed=1).collect()
+    )
+
+    kept = it(range(100)).map(lambda x: x).sample_rate(0.5).collect()
+    assert kept == sorted(kept)
+
+    assert it(range(10)).sample_rate(1).rev().collect() == [*range(9, -1, -1)]
+    kept = it(range(100)).sample_rate(0.5).rev().collect()
+    assert kept == sorted(kept, reverse=True)
+
+    with pytest.raises(ChemicalException):
+        it('abc').sample_rate(1.5)
+
+    with pytest.raises(ChemicalException):
+        a = it('abc').sample_rate(1)
+        a.next()
+        a.rev()
+
+    # The same elements are kept from either end
+    forward = it(range(10000)).sample_rate(0.5, seed=1).collect()
+    assert 4500 < len(forward) < 5500
+    assert forward == it(iter(range(10000))).sample_rate(0.5, seed=1).collect()
+    for probability in (0.001, 0.5):
+        forward = it(range(10000)).sample_rate(probability, seed=1).collect()
+        backward = it(range(10000)).sample_rate(probability, seed=1).rev()
+        assert backward.collect()[::-1] == forward
+        mapped = it(range(10000)).map(lambda x: x)
+        backward = mapped.sample_rate(probability, seed=1).rev()
+        assert backward.collect()[::-1] == forward
+    with pytest.raises(ChemicalException):
+        it(iter(range(10))).sample_rate(0.5).rev()
+
+    assert it('abc').sample_rate(0.5).size_hint() == (0, 3)
+    assert it('abc').sample_rate(0.5).rev().size_hint() == (0, 3)
+
+
+def test_count_distinct():
+    assert it('abacb').count_distinct() == 3
+    assert it('').count_distinct() == 0
+    assert it('abacb').count_distinct(approx=True) == 3
+    assert 9800 < it(range(10000)).count_distinct(approx=True) < 10200
+    assert 9800 < it(range(20000)).map(lambda x: x // 2).count_distinct(
+        approx=True
+    ) < 10200
+
+
+def test_quantiles():
+    assert it(range(101)).quantiles([0.5, 1]) == [50, 100]
+    assert it(range(101)).quantiles(0.5) == 50
+    assert it(range(101)).rev().quantiles(0) == 0
+
+    median, tail = it(range(100001)).quantiles([0.5, 0.99])
+    assert abs(median - 50000) < 2000
+    assert abs(tail - 99000) < 2000
+
+    with pytest.raises(ChemicalException):
+        it([]).quantiles(0.5)
+
+    with pytest.raises(ChemicalException):
+        it([1]).quantiles(2)
+
+
+def test_heavy_hitters():
+    assert it('abracadabra').heavy_hitters(1) == [('a', 5)]
+
+    stream = [i % 10 for i in range(1000)] + [7] * 500 + [3] * 200
+    assert [x for x, _ in it(stream).heavy_hitters(2)] == [7, 3]
+    assert it(stream).heavy_hitters(2)[0] == (7, 600)
+    assert len(it(range(100)).heavy_hitters(5)) == 5
+
+
+def test_merge():
+    assert it((1, 4, 7)).merge((2, 5), (3, 6)).collect() == [*range(1, 8)]
+    assert it((1, 4)).merge().collect() == [1, 4]
+    assert it('ad').merge('bc').rev().collect(str) == 'dcba'
+    assert it(('b', 'C')).merge(('a', 'D'), key=str.lower).collect() == [
+        'a', 'b', 'C', 'D'
+    ]
+    assert it([(1, 'x')]).merge([(1, 'y')], key=lambda p: p[0]).collect() == [
+        (1, 'x'), (1, 'y')
+    ]
+    assert it(iter((1, 3))).merge(iter((2,))).collect() == [1, 2, 3]
+
+    with pytest.raises(ChemicalException):
+        it(iter((1, 3))).merge((2,)).rev()
+
+    with pytest.raises(ChemicalException):
+        a = it('ad').merge('bc')
+        a.next()
+        a.rev()
+
+    assert it('ad').merge('bc', 'e').size_hint() == (5, 5)
+    assert it('ad').merge(iter('bc')).size_hint() == (2, None)
+    assert it('ad').merge('bc').rev().size_hint() == (4, 4)
+
+
+def test_union_sorted():
+    assert it((1, 2, 4)).union_sorted((2, 3), (4, 5)).collect() == [
+        1, 2, 3, 4, 5
+    ]
+    assert it((1, 1, 2)).union_sorted(()).collect() == [1, 2]
+    assert it((1, 2, 4)).union_sorted((2, 3)).rev().collect() == [4, 3, 2, 1]
+    assert it('aB').union_sorted('bc', key=str.lower).collect(str) == 'aBc'
+
+    assert it((1, 2)).union_sorted((2, 3)).size_hint() == (1, 4)
+
+
+def test_intersect():
+    assert it((1, 2, 3, 4)).intersect((2, 4, 6), (0, 2, 4)).collect() == [2, 4]
+    assert it((1, 2, 2, 3)).intersect((2, 2)).collect() == [2]
+    assert it((1, 2)).intersect(()).collect() == []
+    assert it((1, 2, 3, 4)).intersect((2, 4, 6)).rev().collect() == [4, 2]
+    assert it('aBc').intersect('bC', key=str.lower).collect(str) == 'Bc'
+
+    assert it((1, 2)).intersect((2, 3)).size_hint() == (0, 4)
+
+
+def test_difference():
+    assert it((1, 2, 3, 4)).difference((2,), (4, 5)).collect() == [1, 3]
+    assert it((1, 1, 2)).difference(()).collect() == [1, 2]
+    assert it(()).difference((1,)).collect() == []
+    assert it((1, 2, 3, 4)).difference((2,)).rev().collect() == [4, 3, 1]
+
+    assert it((1, 2)).difference((2, 3)).rev().size_hint() == (0, 4)
+
+
+def test_join():
+    names = [(1, 'ann'), (2, 'bob'), (4, 'dan')]
+    events = [(2, 'login'), (3, 'logout'), (1, 'login'), (2, 'logout')]
+    first = lambda e: e[0]
+
+    assert it(events).join(names, first).collect() == [
+        ((2, 'login'), (2, 'bob')),
+        ((1, 'login'), (1, 'ann')),
+        ((2, 'logout'), (2, 'bob')),
+    ]
+    assert it(events).join(names, first, how='left').collect() == [
+        ((2, 'login'), (2, 'bob')),
+        ((3, 'logout'), None),
+        ((1, 'login'), (1, 'ann')),
+        ((2, 'logout'), (2, 'bob')),
+    ]
+    assert it(events).join(names, first, how='right').collect() == [
+        ((2, 'login'), (2, 'bob')),
+        ((1, 'login'), (1, 'ann')),
+        ((2, 'logout'), (2, 'bob')),
+        (None, (4, 'dan')),
+    ]
+    assert it(events).join(names, first, how='outer').count() == 5
+    assert it('ab').join(['A', 'B'], str.lower, str.lower).collect() == [
+        ('a', 'A'), ('b', 'B')
+    ]
+
+    # The left side is known to be smaller, so it becomes the hash table
+    assert it(names).join(iter(events), first, how='outer').collect() == [
+        ((2, 'bob'), (2, 'login')),
+        (None, (3, 'logout')),
+        ((1, 'ann'), (1, 'login')),
+        ((2, 'bob'), (2, 'logout')),
+        ((4, 'dan'), None),
+    ]
+
+    with pytest.raises(ChemicalException):
+        it(events).join(names, first, how='sideways')
+
+    with pytest.raises(ChemicalException):
+        it(events).join(names, first).rev()
+
+    assert it(events).join(names, first).size_hint() == (0, None)
+    assert it(events).join(names, first, how='left').size_hint() == (4, None)
+
+
+def test_merge_join():
+    left = [(1, 'a'), (2, 'b'), (2, 'c'), (5, 'e')]
+    right = [(2, 'x'), (2, 'y'), (3, 'z')]
+    first = lambda e: e[0]
+
+    assert it(left).merge_join(right, first).collect() == [
+        ((2, 'b'), (2, 'x')), ((2, 'b'), (2, 'y')),
+        ((2, 'c'), (2, 'x')), ((2, 'c'), (2, 'y')),
+    ]
+    assert it(left).merge_join(right, first, how='left').collect() == [
+        ((1, 'a'), None),
+        ((2, 'b'), (2, 'x')), ((2, 'b'), (2, 'y')),
+        ((2, 'c'), (2, 'x')), ((2, 'c'), (2, 'y')),
+        ((5, 'e'), None),
+    ]
+    assert it(left).merge_join(right, first, how='right').last() == (
+        None, (3, 'z')
+    )
+    assert it(left).merge_join(right, first, how='outer').count() == 7
+    assert it(left).merge_join([], first, how='outer').count() == 4
+    assert it([]).merge_join(right, first, how='outer').count() == 3
+
+    with pytest.raises(ChemicalException):
+        it(left).merge_join(right, first, how='')
+
+
+def test_peekable_lookahead():
+    pulled = []
+    i = it('abcd').inspect(pulled.append).peekable()
+    assert pulled == []
+    assert i.next() == 'a'
+    assert pulled == ['a']
+    assert i.peek() == 'b'
+    assert pulled == ['a', 'b']
+
+    i = it([0, '', None, False]).peekable()
+    assert i.peek() == 0
+    assert i.next() == 0
+    assert i.peek() == ''
+    assert i.next() == ''
+    assert i.next() is None
+    assert i.peek() is False
+    assert i.next() is False
+    assert not i.has_next()
+
+    i = it('abcd').peekable()
+    assert i.peek_n(3) == ['a', 'b', 'c']
+    assert i.peek_n(10) == ['a', 'b', 'c', 'd']
+    assert i.peek_nth(0) == 'a'
+    assert i.peek_nth(3) == 'd'
+    with pytest.raises(NothingToPeek):
+        i.peek_nth(4)
+    assert i.collect(str) == 'abcd'
+    assert it('').peekable().peek_n(2) == []
+    assert it('ab').peekable().peek_n(0) == []
+    assert it('').peekable().peek_n(0) == []
+    with pytest.raises(ChemicalException):
+        it('ab').peekable().peek_nth(-1)
+    with pytest.raises(ChemicalException):
+        it('ab').peekable().peek_n(-1)
+
+    i = it('aab').peekable()
+    assert i.next_if(lambda x: x == 'a') == 'a'
+    assert i.next_if(lambda x: x == 'a') == 'a'
+    assert i.next_if(lambda x: x == 'a') is None
+    assert i.next_if(lambda x: x == 'a', 'nope') == 'nope'
+    assert i.next() == 'b'
+    assert i.next_if(lambda x: True) is None
+
+    i = it('bc').peekable()
+    assert i.peek() == 'b'
+    i.putback('a')
+    assert i.peek() == 'a'
+    assert i.collect(str) == 'abc'
+
+    i = it('abc').peekable()
+    assert i.peek_n(2) == ['a', 'b']
+    assert i.rev().collect(str) == 'cba'
+
+    c = it([0, 1]).current()
+    assert c.curr() == 0
+    assert c.next() == 0
+    assert c.curr() == 0
+    assert c.peek() == 1
+
+
+def test_irreversible_source():
+    source = lambda: (i for i in range(4))
+    assert it(source()).map(lambda x: x * 2).collect() == [0, 2, 4, 6]
+    assert it(source()).filter(lambda x: x % 2).collect() == [1, 3]
+    assert it(source()).take_while(lambda x: x < 2).collect() == [0, 1]
+    assert it(source()).enumerate().nth(2) == (1, 1)
+    assert it(source()).skip(3).collect() == [3]
+    assert it(source()).for_each(lambda x: ()).count() == 4
+
+    with pytest.raises(ChemicalException):
+        it(source()).map(str).rev()
+
+
+def test_prefetch():
+    assert it(range(100)).prefetch(4).collect() == list(range(100))
+    assert it(range(100)).prefetch(4, batch=7).collect() == list(range(100))
+    assert it(range(5)).prefetch(2).rev().collect() == [4, 3, 2, 1, 0]
+    assert it(range(5)).prefetch().size_hint() == (5, 5)
+    assert it([]).prefetch().collect() == []
+
+    # Class-based stages upstream must still apply before prefetching
+    assert it('abcd').skip(1).prefetch(2).collect() == ['b', 'c', 'd']
+    assert it('abcd').skip(1).prefetch(2, batch=2).collect() == ['b', 'c', 'd']
+    assert it([1, 2, 3]).window_sum(2).prefetch().collect() == [3, 5]
+    scanned = it([1, 2, 3, 4]).scan(0, lambda acc, x: acc(acc._ + x))
+    assert scanned.prefetch().collect() == [1, 3, 6, 10]
+
+    def failing():
+        yield 1
+        raise ValueError('boom')
+
+    itr = it(failing()).prefetch()
+    assert itr.next() == 1
+    with pytest.raises(ValueError):
+        itr.next()
+
+    def failing_midway():
+        yield 1
+        yield 2
+        raise ValueError('boom')
+
+    for batch in (1, 2, 3):
+        pulled = []
+        with pytest.raises(ValueError):
+            for item in it(failing_midway()).prefetch(batch=batch):
+                pulled.append(item)
+        assert pulled == [1, 2]
+
+    pulled = []
+    def source():
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    itr = it(source()).prefetch(2)
+    assert itr.take(3).collect() == [0, 1, 2]
+    del itr
+    import time, gc
+    gc.collect()
+    time.sleep(0.2)
+    # The producer stops after filling the buffer once the consumer is gone
+    assert len(pulled) < 10
+
+    with pytest.raises(ChemicalException):
+        it([1]).prefetch(0)
+
+
+def test_collect_typed():
+    from array import array
+
+    assert it(range(3)).collect(array('d')) == array('d', [0, 1, 2])
+    assert it(range(3)).collect(array('q', [7])) == array('q', [7, 0, 1, 2])
+    assert it(range(5)).filter(lambda x: x % 2).collect(array('b')) == array(
+        'b', [1, 3]
+    )
+    big = it(range(10000)).map(lambda x: x * 2).collect_array('q')
+    assert big.typecode == 'q' and len(big) == 10000 and big[-1] == 19998
+    assert it([]).collect_array('d') == array('d')
+
+    assert it([104, 105]).collect(bytes) == b'hi'
+    assert it([b'ab', b'cd']).collect(bytearray) == bytearray(b'abcd')
+
+    with pytest.raises(TypeError):
+        it(['a']).collect_array('d')
+
+
+def test_collect_numpy():
+    np = pytest.importorskip('numpy')
+
+    values = it(range(5)).map(lambda x: x * x).collect_numpy(np.int64)
+    assert values.dtype == np.int64 and values.tolist() == [0, 1, 4, 9, 16]
+    assert it(range(6)).filter(lambda x: x % 2).collect_numpy().tolist() == [
+        1.0, 3.0, 5.0
+    ]
+    assert it(np.arange(3)).collect_numpy(np.float32).dtype == np.float32
+
+    # Size hints that turn out wrong don't lose or invent elements
+    summed = it(range(3)).zip(range(3)).map(sum).collect_numpy(np.int64)
+    assert summed.tolist() == [0, 2, 4]
+    assert it(iter(range(3)), None, (5, 5)).collect_numpy().tolist() == [
+        0.0, 1.0, 2.0
+    ]
+    longer = it(iter(range(5000)), None, (2, 2)).collect_numpy(np.int64)
+    assert longer.tolist() == list(range(5000))
+
+
+def test_collect_columns():
+    from array import array
+    from chemical.columns import Columns
+
+    table = it('abc').enumerate().collect_columns(['index', 'letter'])
+    assert len(table) == 3
+    assert table[1] == (1, 'b') and table[-1] == (2, 'c')
+    assert table[:2] == [(0, 'a'), (1, 'b')]
+    assert table.column('index') == array('q', [0, 1, 2])
+    assert table.column(1) == ['a', 'b', 'c']
+    assert it(table).collect() == [(0, 'a'), (1, 'b'), (2, 'c')]
+    assert it(table).rev().next() == (2, 'c')
+    assert it(table).map(lambda r: r[0]).sum() == 3
+
+    mixed = it([(1, 0.5, True), (2.5, 1.5, False), (2 ** 70, 2.5, True)])
+    table = mixed.collect_columns()
+    assert table.column(0) == [1, 2.5, 2 ** 70]
+    assert table.column(1) == array('d', [0.5, 1.5, 2.5])
+    assert table.column(2) == [True, False, True]
+
+    big = it(range(10000)).map(lambda x: (x, -x)).collect_columns()
+    assert big.column(1)[-1] == -9999 and type(big.column(1)) is array
+    overflow = it(range(5000)).map(lambda x: (x if x < 4500 else 2 ** 70,))
+    assert overflow.collect_columns().column(0)[-1] == 2 ** 70
+
+    assert len(it([]).collect_columns()) == 0
+
+    with pytest.raises(ChemicalException):
+        it([(1, 2), (3,)]).collect_columns()
+
+    with pytest.raises(ChemicalException):
+        it([(1, 2)]).collect_columns(['a'])
+
+    with pytest.raises(ChemicalException):
+        table.column('missing')
+
+    with pytest.raises(ChemicalException):
+        Columns([[1], [1, 2]])
+
+    assert it([(1, 2, 3), (4, 5, 6)]).unzip(3) == ([1, 4], [2, 5], [3, 6])
+    assert it([]).unzip() == ([], [])
+
+
+def test_islice():
+    assert it(range(10)).islice(2, 5).collect() == [2, 3, 4]
+    assert it(range(10)).islice(8).collect() == [8, 9]
+    assert it(range(10)).islice(2, 5).rev().collect() == [4, 3, 2]
+    assert it(range(10)).islice(8, 50).rev().collect() == [9, 8]
+    assert it(range(10)).islice(2, 5).size_hint() == (3, 3)
+    assert it(i for i in range(3)).islice(1, 4).size_hint() == (0, 3)
+    assert it(i for i in range(3)).islice(1, 4).collect() == [1, 2]
+
+    scanned = it([1, 2, 3, 4]).scan(0, lambda acc, x: acc(acc._ + x))
+    assert scanned.islice(0, 3).collect() == [1, 3, 6]
+    assert it(range(10)).skip(2).islice(1, 3).collect() == [3, 4]
+    assert it(range(10)).skip(2).islice(1, 3).rev().collect() == [4, 3]
+
+    with pytest.raises(ChemicalException):
+        it(range(3)).islice(-1)
+
+
+def test_partition_lazy():
+    evens, odds = it(range(6)).partition_lazy(lambda x: x % 2 == 0)
+    assert evens.next() == 0
+    assert odds.collect() == [1, 3, 5]
+    assert evens.collect() == [2, 4]
+    assert evens.size_hint() == (0, 6)
+
+    # Reaching 50 on the right means buffering 0..49 for the left
+    left, right = it(range(100)).partition_lazy(lambda x: x < 50, buffer=50)
+    assert right.next() == 50
+    assert left.buffered()[0] == 50
+    assert left.collect() == list(range(50))
+
+    with pytest.raises(ChemicalException):
+        it(range(100)).partition_lazy(lambda x: x < 50, buffer=10)[1].next()
+
+    with pytest.raises(ChemicalException):
+        it(range(3)).partition_lazy(bool, buffer=0)
+
+
+def test_shard():
+    import threading
+
+    shards = it(range(1000)).shard(4, key=lambda x: x % 10)
+    assert len(shards) == 4
+    results = [shard.collect() for shard in shards]
+    assert sorted(it(results).flatten().collect()) == list(range(1000))
+    for result in results:
+        assert result == sorted(result)
+        assert len({x % 10 for x in result} & {
+            x % 10 for other in results if other is not result for x in other
+        }) == 0
+
+    # Each shard consumed by its own thread, with small blocking buffers
+    shards = it(range(10000)).shard(3, buffer=8, block=True)
+    results = [None] * 3
+
+    def consume(index):
+        results[index] = shards[index].collect()
+
+    threads = [threading.Thread(target=consume, args=[i]) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert sorted(it(results).flatten().collect()) == list(range(10000))
+
+    with pytest.raises(ChemicalException):
+        it(range(3)).shard(0)
+
+
+def test_shared():
+    import threading
+
+    for batch in (1, 7, 64):
+        shared = it(range(20000)).map(lambda x: x * 2).shared(batch=batch)
+        results = [[] for _ in range(8)]
+
+        def worker(index):
+            for item in shared:
+                results[index].append(item)
+
+        threads = [
+            threading.Thread(target=worker, args=[i]) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(it(results).flatten().collect()) == list(
+            range(0, 40000, 2)
+        )
+        for result in results:
+            assert result == sorted(result)
+
+    assert it(range(5)).sync(batch=2).collect() == [0, 1, 2, 3, 4]
+    assert it(range(5)).shared().rev().collect() == [4, 3, 2, 1, 0]
+    assert it(range(5)).shared().size_hint() == (5, 5)
+
+    with pytest.raises(ChemicalException):
+        it([]).shared(batch=0)
+
+
+def test_next_back():
+    itr = it(range(5)).map(lambda x: x * 10)
+    assert itr.next_back() == 40
+    assert itr.next() == 0
+    assert itr.next_back() == 30
+    assert itr.collect() == [10, 20]
+
+    itr = it(range(10)).filter(lambda x: x % 3 == 0).map(str)
+    assert itr.next_back() == '9'
+    assert itr.next() == '0'
+    assert itr.next_back() == '6'
+    assert itr.collect() == ['3']
+
+    itr = it(range(6)).skip(2)
+    assert itr.next_back() == 5
+    assert itr.collect() == [2, 3, 4]
+
+    itr = it('ab').map(str.upper)
+    assert [itr.next_back(), itr.next_back()] == ['B', 'A']
+    with pytest.raises(StopIteration):
+        itr.next_back()
+    assert itr.collect() == []
+
+    seen = []
+    itr = it(range(3)).inspect(seen.append)
+    assert itr.next_back() == 2
+    assert seen == [2]
+
+    # Stages chained afterwards don't see the elements taken from the back
+    itr = it(range(5))
+    assert itr.next_back() == 4
+    assert itr.map(lambda x: x * 2).collect() == [0, 2, 4, 6]
+    itr = it(range(5)).map(lambda x: x * 10)
+    assert itr.next_back() == 40
+    assert itr.map(str).filter(bool).collect() == ['0', '10', '20', '30']
+
+    with pytest.raises(ChemicalException):
+        it(iter(range(5))).map(abs).next_back()
+    with pytest.raises(ChemicalException):
+        it(range(5)).take(3).next_back()
+
+
+def test_last_and_nth_from_back():
+    calls = []
+    def double(x):
+        calls.append(x)
+        return x * 2
+
+    assert it(range(1000)).map(double).last() == 1998
+    assert calls == [999]
+    assert it(range(1000)).map(double).nth(-3) == 1994
+    assert it([]).map(double).last() is None
+    assert it(range(10)).filter(lambda x: x < 5).nth(-2) == 3
+
+    seen = []
+    assert it(range(4)).inspect(seen.append).last() == 3
+    assert seen == [0, 1, 2, 3]
@@ -0,0 +1,269 @@
+import csv
+import json
+import pytest
+from chemical import it, ChemicalException
+
+
+@pytest.fixture
+def jsonl(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    with open(path, 'w') as f:
+        for i in range(1000):
+            f.write(json.dumps({'id': i, 'user': f'user{i % 7}'}) + '\n')
+        f.write('\n  \n{"id": -1}')
+    return str(path)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'scores.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'score', 'note'])
+        for i in range(500):
+            note = 'two\nlines, "quoted"' if i % 3 else ''
+            writer.writerow([f'n{i}', i, note])
+        f.write('\r\n')
+    return str(path)
+
+
+def test_from_jsonl(jsonl):
+    with open(jsonl) as f:
+        expected = [json.loads(line) for line in f if line.strip()]
+
+    assert it.from_jsonl(jsonl).collect() == expected
+    assert it.from_jsonl(jsonl, block_size=7).collect() == expected
+    records = it.from_jsonl(jsonl, processes=3, block_size=500)
+    assert records.collect() == expected
+
+    users = it.from_jsonl(jsonl, fields=['user', 'id'], processes=2)
+    assert users.take(2).collect() == [('user0', 0), ('user1', 1)]
+    assert it.from_jsonl(jsonl, fields=['user']).last() == (None,)
+
+    with pytest.raises(ChemicalException):
+        it.from_jsonl(jsonl, processes=0)
+    with pytest.raises(ChemicalException):
+        it.from_jsonl(jsonl, block_size=0)
+
+
+def test_from_csv(csv_file):
+    with open(csv_file, newline='') as f:
+        expected = [row for row in csv.reader(f) if row]
+
+    assert it.from_csv(csv_file, header=False).collect() == expected
+    assert it.from_csv(csv_file, block_size=16).collect() == expected[1:]
+    assert it.from_csv(
+        csv_file, processes=2, block_size=256
+    ).collect() == expected[1:]
+
+    scores = it.from_csv(csv_file, fields=['score', 0], processes=2)
+    assert scores.take(2).collect() == [('0', 'n0'), ('1', 'n1')]
+    assert it.from_csv(csv_file, fields=['note']).nth(2) == (
+        'two\nlines, "quoted"',
+    )
+    assert it.from_csv(csv_file, fields=[2], header=False).next() == ('note',)
+
+    with pytest.raises(ChemicalException):
+        it.from_csv(csv_file, fields=['missing'])
+    with pytest.raises(ChemicalException):
+        it.from_csv(csv_file, fields=['name'], header=False)
+
+
+def test_from_csv_long_quoted_record(tmp_path):
+    import time
+
+    path = tmp_path / 'long.csv'
+    note = 'a "quoted" line\n' * 5000
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerows([['id', 'note'], ['1', note], ['2', 'short']])
+
+    start = time.perf_counter()
+    rows = it.from_csv(str(path), block_size=64).collect()
+    assert time.perf_counter() - start < 2
+    assert rows == [['1', note], ['2', 'short']]
+    assert it.from_csv(str(path), block_size=7, processes=2).collect() == rows
+
+
+def test_from_csv_dialect(tmp_path):
+    path = tmp_path / 'data.tsv'
+    path.write_text("a\tb\n1\t'x\ty'\n")
+    rows = it.from_csv(str(path), delimiter='\t', quotechar="'")
+    assert rows.collect() == [['1', 'x\ty']]
+
+
+def test_write_lines(tmp_path):
+    import bz2, gzip, io
+
+    path = str(tmp_path / 'out.txt')
+    assert it(['a', 'b']).write_lines(path) == (2, 4)
+    assert open(path).read() == 'a\nb\n'
+
+    lines = it(range(1000)).map(str)
+    written = lines.write_lines(path, batch=7, fsync_every=50)
+    assert written.records == 1000
+    assert open(path).read().split() == list(map(str, range(1000)))
+
+    assert it([b'x', memoryview(b'yz')]).write_lines(path) == (2, 5)
+    assert open(path, 'rb').read() == b'x\nyz\n'
+
+    assert it([]).write_lines(path) == (0, 0)
+    assert open(path).read() == ''
+
+    gz = str(tmp_path / 'out.txt.gz')
+    it('abc').write_lines(gz, atomic=True)
+    assert gzip.open(gz).read() == b'a\nb\nc\n'
+    it('ab').write_lines(path, compression='bz2')
+    assert bz2.open(path).read() == b'a\nb\n'
+    it('ab').write_lines(gz, compression=None)
+    assert open(gz).read() == 'a\nb\n'
+
+    out = io.BytesIO()
+    assert it(['q']).write_lines(out).records == 1
+    assert out.getvalue() == b'q\n'
+
+    with pytest.raises(ChemicalException):
+        it('ab').write_lines(io.BytesIO(), atomic=True)
+    with pytest.raises(ChemicalException):
+        it('ab').write_lines(path, compression='zip')
+    with pytest.raises(ChemicalException):
+        it('ab').write_lines(path, batch=0)
+
+
+def test_write_lines_atomic(tmp_path):
+    path = tmp_path / 'out.txt'
+    path.write_text('old\n')
+
+    def fail(x):
+        if x == 500:
+            raise ValueError(x)
+        return str(x)
+
+    with pytest.raises(ValueError):
+        it(range(1000)).map(fail).write_lines(str(path), batch=10, atomic=True)
+    assert path.read_text() == 'old\n'
+    assert [p.name for p in tmp_path.iterdir()] == ['out.txt']
+
+    it(['new']).write_lines(path, atomic=True)
+    assert path.read_text() == 'new\n'
+
+
+def test_write_lines_atomic_mode(tmp_path):
+    import os, stat
+
+    path = tmp_path / 'out.txt'
+    path.write_text('old\n')
+    os.chmod(path, 0o644)
+    it(['new']).write_lines(str(path), atomic=True)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+    os.chmod(path, 0o640)
+    it(['new']).to_jsonl(str(path), atomic=True)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+    umask = os.umask(0o022)
+    try:
+        fresh = tmp_path / 'fresh.txt'
+        it(['new']).write_lines(str(fresh), atomic=True)
+        assert stat.S_IMODE(os.stat(fresh).st_mode) == 0o644
+        os.umask(0o027)
+        other = tmp_path / 'other.txt'
+        it(['new']).write_lines(str(other), atomic=True)
+        assert stat.S_IMODE(os.stat(other).st_mode) == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_to_jsonl_and_csv(tmp_path):
+    import lzma
+
+    path = str(tmp_path / 'out.jsonl.xz')
+    records = [{'b': 1, 'a': [2]}, 'three', None]
+    assert it(records).to_jsonl(path, sort_keys=True).records == 3
+    assert lzma.open(path).read() == b'{"a": [2], "b": 1}\n"three"\nnull\n'
+
+    path = str(tmp_path / 'out.jsonl')
+    it(records).to_jsonl(path, batch=2)
+    assert it.from_jsonl(path).collect() == records
+
+    path = str(tmp_path / 'out.csv')
+    rows = [(1, 'a'), (2, 'b,"c"')]
+    assert it(rows).to_csv(path, header=['id', 'name']).records == 2
+    assert it.from_csv(path).collect() == [['1', 'a'], ['2', 'b,"c"']]
+
+    it(rows).to_csv(path, delimiter=';', lineterminator='\n')
+    assert open(path).read() == '1;a\n2;"b,""c"""\n'
+
+
+@pytest.fixture
+def log_lines():
+    return [f'{i} GET /page/{i % 13} é' for i in range(20000)]
+
+
+def write_members(path, data, compress, size):
+    with open(path, 'wb') as f:
+        for start in range(0, len(data), size):
+            f.write(compress(data[start:start + size]))
+    return str(path)
+
+
+def test_from_compressed(tmp_path, log_lines):
+    import bz2, gzip, lzma
+
+    data = ('\n'.join(log_lines) + '\n').encode()
+    files = [
+        write_members(tmp_path / 'log.gz', data, gzip.compress, 30000),
+        write_members(tmp_path / 'log.bz2', data, bz2.compress, 70000),
+        write_members(tmp_path / 'log.xz', data, lzma.compress, 100000),
+        write_members(tmp_path / 'log', data, lambda block: block, 1 << 20),
+    ]
+
+    for path in files:
+        assert it.from_compressed(path).collect() == log_lines
+        assert it.from_compressed(
+            path, processes=3, block_size=5000
+        ).collect() == log_lines
+
+    lines = it.from_compressed(files[0], encoding=None)
+    assert lines.next() == log_lines[0].encode()
+
+    with open(tmp_path / 'padded.gz', 'wb') as f:
+        f.write(gzip.compress(b'a\r\nb') + b'\0' * 8)
+    assert it.from_compressed(tmp_path / 'padded.gz').collect() == ['a', 'b']
+
+
+def test_from_compressed_lookalike_headers(tmp_path):
+    import gzip, os
+
+    # Stored members contain their data as is, including bytes that look like
+    # the header of another member
+    parts = [(b'\x1f\x8b\x08' + os.urandom(29)) * 100 for _ in range(20)]
+    path = tmp_path / 'tricky.gz'
+    with open(path, 'wb') as f:
+        for part in parts:
+            f.write(gzip.compress(part, compresslevel=0))
+
+    for block_size in (1, 1000, 10 ** 6):
+        lines = it.from_compressed(
+            path, processes=2, block_size=block_size, encoding=None
+        )
+        expected = it.from_compressed(path, encoding=None).collect()
+        assert lines.collect() == expected
+
+
+def test_from_compressed_errors(tmp_path):
+    import gzip
+
+    truncated = tmp_path / 'truncated.gz'
+    truncated.write_bytes(gzip.compress(b'a\nb\n' * 100)[:-4])
+    corrupt = tmp_path / 'corrupt.gz'
+    data = bytearray(gzip.compress(b'a\nb\n' * 100))
+    data[20] ^= 0xff
+    corrupt.write_bytes(bytes(data))
+    trailing = tmp_path / 'trailing.gz'
+    trailing.write_bytes(gzip.compress(b'a\n') + b'junk')
+
+    for path in (truncated, corrupt, trailing):
+        for processes in (1, 2):
+            with pytest.raises(ChemicalException):
+                it.from_compressed(path, processes=processes).collect()
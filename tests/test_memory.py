@@ -0,0 +1,67 @@
+import pytest
+from chemical import it, ChemicalException
+from chemical.memory import MemoryLimitExceeded, estimate
+
+
+def test_buffered():
+    assert it(range(10)).map(str).buffered() == (0, 0)
+
+    taken = it(range(100)).take(40)
+    elements, nbytes = taken.buffered()
+    assert elements == 40 and nbytes > 40 * 8
+
+    cycled = it(range(5)).cycle()
+    assert cycled.take(7).collect() == [0, 1, 2, 3, 4, 0, 1]
+    assert cycled.buffered()[0] == 5
+
+    peek = it('abcdef').peekable()
+    peek.peek_nth(3)
+    assert peek.buffered()[0] == 4
+
+    unique = it('abcabc').unique()
+    unique.collect()
+    assert unique.buffered()[0] == 3
+    assert it('abc').unique(approx=True, capacity=100).buffered()[0] == 0
+
+    assert it([[1, 2], [3]]).flatten().buffered()[0] == 2
+    assert it(range(20)).window_sum(4).buffered()[0] == 0
+
+    assert estimate([]) == (0, estimate([])[1])
+
+
+def test_memory_limit():
+    itr = it(range(1000)).map(str).take(500).memory_limit(None, every=10)
+    assert itr.count() == 500
+    summary = itr.summary()
+    assert [(name, elements) for name, elements, _ in summary] == [
+        ('2:take', 500)
+    ]
+    assert itr.peak >= summary[0][2]
+    assert '2:take' in itr.report()
+
+    with pytest.raises(MemoryLimitExceeded) as error:
+        it(range(1000)).take(500).memory_limit(1024)
+    assert error.value.stage == '1:take'
+    assert error.value.elements == 500
+    assert 'take' in str(error.value)
+
+    # Growing buffers are caught while the pipeline runs
+    itr = it(range(10 ** 6)).map(lambda x: x % 50000).unique().memory_limit(
+        100000, every=100
+    )
+    with pytest.raises(MemoryLimitExceeded) as error:
+        itr.count()
+    assert error.value.stage == '2:unique'
+    assert isinstance(error.value, ChemicalException)
+
+    with pytest.raises(ChemicalException):
+        it([]).memory_limit(10, every=0)
+
+
+def test_is_sorted_and_flatten_stream():
+    assert it(i for i in (1, 2, 2, 3)).is_sorted()
+    assert not it(i for i in (1, 3, 2)).is_sorted()
+    assert it([]).is_sorted()
+
+    assert it(iter([[1, 2], iter([3])])).flatten().size_hint() == (0, None)
+    assert it(iter([[1, 2], iter([3])])).flatten().collect() == [1, 2, 3]
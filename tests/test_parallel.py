@@ -0,0 +1,48 @@
+import pytest
+from array import array
+from chemical import it, ChemicalException
+from chemical.plan import X
+
+pytest.importorskip('multiprocessing.shared_memory')
+
+
+def square(x):
+    return x * x
+
+
+def test_par_map():
+    values = array('q', range(1000))
+    doubled = it(values).par_map(X * 2, processes=3).collect()
+    assert doubled == [x * 2 for x in range(1000)]
+
+    halves = it(range(4)).par_map(X / 2, 'd', processes=2).collect()
+    assert halves == [0, 0.5, 1, 1.5]
+    assert it(array('d', [1.5])).par_map(square).collect() == [2.25]
+    assert it(array('d')).par_map(square, processes=2).collect() == []
+
+    # Results stay compact and reversible
+    assert it(values).par_map(X + 1, processes=2).rev().next() == 1000
+
+    with pytest.raises(ChemicalException):
+        it([1, 2, 3]).par_map(square)
+
+
+def test_par_filter_and_sum():
+    values = array('i', range(101))
+    odds = it(values).par_filter(X % 2 == 1, processes=4).collect()
+    assert odds == list(range(1, 101, 2))
+
+    assert it(values).par_sum(processes=3) == 5050
+    assert it(values).par_sum(square, processes=2) == sum(
+        x * x for x in range(101)
+    )
+    assert it(range(10)).par_sum(typecode='q', processes=2) == 45
+
+
+def test_par_numpy():
+    np = pytest.importorskip('numpy')
+
+    values = np.arange(100, dtype=np.float64)
+    result = it(values).par_map(X * 3, processes=2)
+    assert result.collect_numpy().tolist() == (values * 3).tolist()
+    assert it(values[::2]).par_sum(processes=2) == values[::2].sum()
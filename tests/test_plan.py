@@ -0,0 +1,104 @@
+import pickle, pytest
+from chemical import it, ChemicalException, TraitException
+from chemical.plan import Plan, X, call
+
+
+def read_partition(name):
+    return {'a': [1, 2, 3], 'b': [4, 5, 6]}[name]
+
+
+def test_expr():
+    assert (X * 2 + 1)(3) == 7
+    assert (1 - X)(3) == -2
+    assert (X['k'] > 1)({'k': 2})
+    assert ((X > 1) & (X < 5))(3)
+    assert not (~(X == 3))(3)
+    assert (-X)(4) == -4
+    assert X.real(5) == 5
+    assert call(str.split, X, ',')('a,b') == ['a', 'b']
+    assert call(int, X, base=2)('101') == 5
+    assert repr(X * 2 + 1) == '((X * 2) + 1)'
+
+    with pytest.raises(ChemicalException):
+        bool(X > 1)
+
+    expr = pickle.loads(pickle.dumps(call(len, X[0]) == 3))
+    assert expr(['abc'])
+
+
+def test_plan():
+    plan = Plan().map(X * 2).filter(X > 10)
+    assert plan.run(range(10)).collect() == [12, 14, 16, 18]
+    assert plan.sum().run(range(10)) == 60
+    assert repr(pickle.loads(plan.dumps())) == repr(plan)
+    assert Plan.loads(plan.dumps()).run([6]).collect() == [12]
+    assert repr(plan) == 'Plan(it(...).map((X * 2)).filter((X > 10)))'
+
+    with pytest.raises(TraitException):
+        Plan().not_a_trait
+
+    with pytest.raises(ChemicalException):
+        Plan().sum().map(X).run([1])
+
+    with pytest.raises(ChemicalException):
+        Plan().map(lambda x: x).dumps()
+
+    sourced = Plan(source=read_partition).map(X + 1)
+    assert sourced.run('b').collect() == [5, 6, 7]
+
+
+def test_plan_map_partitions():
+    plan = Plan(source=read_partition).map(X * 10)
+    assert plan.map_partitions(['a', 'b'], processes=2) == [
+        [10, 20, 30], [40, 50, 60]
+    ]
+    assert plan.sum().map_partitions(['a', 'b'], processes=2) == [60, 150]
+
+
+def test_plan_optimize():
+    calls = []
+    def double(x):
+        calls.append(x)
+        return x * 2
+
+    plan = Plan().map(X + 1).map(double).skip(5).take(3)
+    optimized = plan.optimize()
+    assert [name for name, _, _ in optimized.steps] == ['islice', 'map']
+    assert optimized.run(range(100)).collect() == [12, 14, 16]
+    assert len(calls) == 3
+    assert plan.run(range(100)).collect() == [12, 14, 16]
+
+    plan = Plan().filter(X > 2).filter(X % 2 == 0).rev().rev().map(str)
+    optimized = plan.optimize()
+    assert [name for name, _, _ in optimized.steps] == ['filter', 'map']
+    assert optimized.run(range(10)).collect() == ['4', '6', '8']
+    assert pickle.loads(optimized.dumps()).run([4]).collect() == ['4']
+
+    calls.clear()
+    assert Plan().map(double).count().optimize().run(range(5)) == 5
+    assert not calls
+
+    # Class-based stages ahead of the rewrite still apply
+    plan = Plan().step_by(2).skip(1).take(2)
+    assert plan.optimize().steps[-1][0] == 'islice'
+    assert plan.optimize().run(range(10)).collect() == [2, 4]
+    assert plan.run(range(10)).collect() == [2, 4]
+    plan = Plan().window_sum(2).skip(1).take(2)
+    assert plan.optimize().run(range(5)).collect() == [3, 5]
+    assert plan.run(range(5)).collect() == [3, 5]
+
+    # Side effects stay exactly where they were written
+    plan = Plan().map(double).inspect(print).take(2)
+    assert plan.optimize().steps == plan.steps
+    plan = Plan().map(double).for_each(print).count()
+    assert plan.optimize().steps == plan.steps
+
+
+def test_plan_explain(capsys):
+    Plan().map(X + 1).map(X * 2).explain()
+    out = capsys.readouterr().out.splitlines()
+    assert out == [
+        'Original:  Plan(it(...).map((X + 1)).map((X * 2)))',
+        'Optimized: Plan(it(...).map(compose((X + 1), (X * 2))))',
+        '  applied: map(f).map(g) -> map(compose(f, g))',
+    ]
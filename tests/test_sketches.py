@@ -0,0 +1,102 @@
+import pickle
+import pytest
+from chemical import ChemicalException
+from chemical.sketches import (
+    BloomFilter, HyperLogLog, KLLSketch, CountMinSketch, HeavyHitters
+)
+
+
+def test_bloom_filter():
+    seen = BloomFilter(1000, 0.01)
+    assert seen.add('a')
+    assert not seen.add('a')
+    assert 'a' in seen
+    assert 'b' not in seen
+
+    for i in range(1000):
+        seen.add(i)
+    assert all(i in seen for i in range(1000))
+    false_positives = sum(i in seen for i in range(1000, 11000))
+    assert false_positives < 300
+
+    other = BloomFilter(1000, 0.01)
+    other.add('z')
+    assert 'z' in seen.merge(other)
+    assert 'z' in pickle.loads(pickle.dumps(seen))
+
+    with pytest.raises(ChemicalException):
+        seen.merge(BloomFilter(10))
+
+    with pytest.raises(ChemicalException):
+        BloomFilter(0)
+
+    assert BloomFilter(10 ** 6, 0.01).nbytes < 1.3 * 10 ** 6
+
+
+def test_hyperloglog():
+    distinct = HyperLogLog().update(range(1000)).update(range(500))
+    assert 980 < distinct.count() < 1020
+    assert HyperLogLog().count() == 0
+    assert HyperLogLog(precision=4).nbytes == 16
+
+    left = HyperLogLog().update(range(0, 60000))
+    right = HyperLogLog().update(range(40000, 100000))
+    shipped = pickle.loads(pickle.dumps(right))
+    assert 97000 < left.merge(shipped).count() < 103000
+
+    words = HyperLogLog().update(str(i) for i in range(5000))
+    assert 4850 < words.count() < 5150
+
+    with pytest.raises(ChemicalException):
+        HyperLogLog(precision=3)
+
+    with pytest.raises(ChemicalException):
+        HyperLogLog(10).merge(HyperLogLog(12))
+
+
+def test_kll_sketch():
+    sketch = KLLSketch(seed=1).update(range(100001))
+    assert sum(len(c) for c in sketch.compactors) < 3 * sketch.k + 100
+    for fraction in (0.1, 0.5, 0.9, 0.99):
+        assert abs(sketch.quantile(fraction) - fraction * 100000) < 2000
+
+    shards = [KLLSketch(seed=i).update(range(i, 100000, 4)) for i in range(4)]
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(pickle.loads(pickle.dumps(shard)))
+    assert merged.count == 100000
+    assert abs(merged.quantile(0.5) - 50000) < 2000
+
+    with pytest.raises(ChemicalException):
+        KLLSketch().quantile(0.5)
+
+    with pytest.raises(ChemicalException):
+        KLLSketch(k=2)
+
+
+def test_count_min_sketch():
+    counts = CountMinSketch().update('abracadabra')
+    assert counts.estimate('a') >= 5
+    assert counts.estimate('z') >= 0
+    assert counts.total == 11
+
+    other = CountMinSketch().update('aaa')
+    assert counts.merge(other).estimate('a') >= 8
+    assert counts.total == 14
+    assert CountMinSketch(100, 4).nbytes == 3200
+
+    with pytest.raises(ChemicalException):
+        counts.merge(CountMinSketch(10, 5))
+
+
+def test_heavy_hitters():
+    top = HeavyHitters(2).update('abracadabra')
+    assert [item for item, _ in top.top()] == ['a', 'b']
+
+    left = HeavyHitters(2).update('x' * 10 + 'y' * 5 + 'z' * 7)
+    right = HeavyHitters(2).update('y' * 10 + 'z' * 1)
+    assert [item for item, _ in left.merge(right).top()] == ['y', 'x']
+    assert left.top()[0] == ('y', 15)
+
+    with pytest.raises(ChemicalException):
+        HeavyHitters(0)
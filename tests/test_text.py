@@ -0,0 +1,101 @@
+import mmap
+import re
+import tempfile
+import pytest
+from chemical import it, ChemicalException
+
+
+def test_split():
+    assert it('a,b,,c').split(',').collect() == ['a', 'b', '', 'c']
+    assert it('a::b::').split('::').collect() == 'a::b::'.split('::')
+    assert it('').split(',').collect() == ['']
+    assert it('  to be  or ').split().collect() == ['to', 'be', 'or']
+
+    tokens = it(b'a b').split(b' ').collect()
+    assert all(type(token) is memoryview for token in tokens)
+    assert [bytes(token) for token in tokens] == [b'a', b'b']
+
+    data = bytearray(b'x y\tz')
+    assert it(data).split().map(bytes).collect() == [b'x', b'y', b'z']
+
+    with pytest.raises(ChemicalException):
+        it('abc').split('')
+    with pytest.raises(ChemicalException):
+        it('abc').split(b',')
+    with pytest.raises(ChemicalException):
+        it(b'abc').split(',')
+
+
+def test_split_stream():
+    assert it(['a,b', 'c,', 'd']).split(',').collect() == ['a', 'bc', 'd']
+    assert it(['a:', ':b:', ':']).split('::').collect() == ['a', 'b', '']
+    assert it(iter('hello world  foo\nbar')).split().collect() == [
+        'hello', 'world', 'foo', 'bar'
+    ]
+    assert it([b'ab c', b'd']).split().collect() == [b'ab', b'cd']
+    assert it(iter(b'a,b')).split(b',').collect() == [b'a', b'b']
+    assert it([]).split(',').collect() == []
+
+    text = ' '.join(map(str, range(1000)))
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert it(chunks).split().collect() == text.split()
+    assert it(chunks).split(' ').collect() == text.split(' ')
+
+
+def test_split_lines():
+    assert it('a\r\nb\n').split_lines().collect() == ['a', 'b']
+    assert it('a\n\nb').split_lines().collect() == ['a', '', 'b']
+    assert it('a\nb').split_lines(True).collect() == ['a\n', 'b']
+    assert it('').split_lines().collect() == []
+
+    lines = it(memoryview(b'ab\r\ncd\n')).split_lines()
+    assert lines.map(bytes).collect() == [b'ab', b'cd']
+
+    assert it(['ab\r', '\ncd\r', '\n']).split_lines().collect() == ['ab', 'cd']
+    assert it(['a\nb', 'c\n']).split_lines(True).collect() == ['a\n', 'bc\n']
+
+    with tempfile.TemporaryFile() as f:
+        f.write(b'one\ntwo\nthree\n')
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            lines = it(data).split_lines().collect()
+            expected = [b'one', b'two', b'three']
+            assert [bytes(line) for line in lines] == expected
+            for line in lines:
+                line.release()
+
+
+def test_regex_tokens():
+    words = it('one, two; three').regex_tokens(r'\w+')
+    assert words.collect() == ['one', 'two', 'three']
+
+    assert it('A b').regex_tokens('[a-z]', re.I).collect() == ['A', 'b']
+    numbers = it('a1b22').regex_tokens(re.compile(r'\d+'))
+    assert numbers.collect() == ['1', '22']
+
+    numbers = it([b'12 3', b'4 56']).regex_tokens(rb'\d+')
+    assert numbers.map(int).collect() == [12, 34, 56]
+    assert it(['fo', 'o bar fo', 'o']).regex_tokens('foo').collect() == [
+        'foo', 'foo'
+    ]
+
+    with pytest.raises(ChemicalException):
+        it('abc').regex_tokens(re.compile('a'), re.I)
+
+
+def test_stream_long_tokens():
+    import time
+
+    chunks = ['x' * 4096] * 3000 + ['!, y']
+    text = ''.join(chunks)
+
+    start = time.perf_counter()
+    assert it(chunks).split(', ').collect() == text.split(', ')
+    assert it(chunks).split_lines().collect() == [text]
+    tokens = it(chunks).regex_tokens('x+|y').collect()
+    assert tokens == re.findall('x+|y', text)
+    assert it(chunks).regex_tokens('z').collect() == []
+    assert time.perf_counter() - start < 3
+
+    lines = [f'{i}\r\n' for i in range(10000)]
+    assert it(lines).split_lines().collect() == [str(i) for i in range(10000)]
@@ -1,4 +1,5 @@
-from chemical import it, trait
+import pytest
+from chemical import it, trait, ChemicalException
 
 
 @trait
@@ -29,3 +30,158 @@ trait('hello')(lambda self: list(self))
 
 def test_hello():
     assert it('abc').hello() == ['a', 'b', 'c']
+
+
+def run_python(*statements, flags=()):
+    import subprocess, sys
+    return subprocess.run(
+        [sys.executable, *flags, '-c', '; '.join(statements)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True
+    )
+
+
+def test_lazy_trait_modules():
+    result = run_python(
+        'import sys, chemical',
+        'print("chemical.iterators" in sys.modules)',
+        'chemical.it([1]).map(str)',
+        'print("chemical.iterators" in sys.modules)',
+        'print("chemical.aggregators" in sys.modules)',
+    )
+    assert result.stdout.split() == ['False', 'True', 'False']
+
+    # Every trait a built-in module registers must be listed as provided by it
+    result = run_python(
+        'import chemical',
+        'names = chemical.it.traits.names()',
+        'import chemical.aggregators, chemical.iterators',
+        'print(sorted(set(chemical.it.traits) - names))',
+    )
+    assert result.stdout.strip() == '[]'
+
+    # Traits registered by hand are not replaced when a module loads later
+    result = run_python(
+        'from chemical import it, trait',
+        'trait("map")(lambda self, f: "mine")',
+        'it([1]).filter(bool).collect()',
+        'print(it([1]).map(str))',
+    )
+    assert result.stdout.strip() == 'mine'
+
+    import chemical
+    assert chemical.Peekable is it.traits['peekable']
+    assert 'window_sum' in dir(it([]))
+
+    # Dunder lookups don't load the trait modules
+    result = run_python(
+        'import sys, chemical',
+        'hasattr(chemical, "__wrapped__")',
+        'print("chemical.iterators" in sys.modules)',
+    )
+    assert result.stdout.strip() == 'False'
+
+
+def test_star_import():
+    namespace = {}
+    exec('from chemical import *', namespace)
+    for name in ('it', 'trait', 'Ref', 'Peekable', 'Skip', 'Inspect', 'scan'):
+        assert name in namespace
+    assert namespace['take'](namespace['it']('abc'), 2).collect() == ['a', 'b']
+
+
+def test_trait_entry_points(monkeypatch):
+    import chemical
+
+    class Entry:
+        def __init__(self, name, value):
+            self.name, self.value = name, value
+
+        def load(self):
+            return self.value
+
+    shout = lambda self: [str(i).upper() for i in self]
+    monkeypatch.setattr(
+        chemical, '_entry_points', lambda group: [Entry('shout', shout)]
+    )
+
+    registry = chemical.Traits()
+    assert 'shout' in registry.names()
+    assert 'whisper' not in registry
+    assert registry['shout'] is shout
+    assert registry.get('whisper') is None
+
+
+def test_import_time_budget():
+    budget = 50000  # Microseconds
+
+    best = None
+    for _ in range(3):
+        lines = run_python('import chemical', flags=['-X', 'importtime'])
+        line = [
+            l for l in lines.stderr.splitlines() if l.endswith('| chemical')
+        ][0]
+        elapsed = int(line.split('|')[1])
+        best = elapsed if best is None else min(best, elapsed)
+
+    assert best < budget, f'import chemical took {best}us'
+
+
+@trait.stage
+def double(items):
+    for i in items:
+        yield i * 2
+
+
+@trait.stage('pairs', size=lambda lo, up: (lo // 2, up and up // 2))
+def make_pairs(items):
+    return zip(items, items)
+
+
+@trait.stage(size='unknown', reverse=False, batch=4)
+def scaled(batches, factor):
+    for batch in batches:
+        assert len(batch) <= 4
+        yield [i * factor for i in batch]
+
+
+def test_stage():
+    from chemical import TraitException
+
+    assert it(range(3)).double().collect() == [0, 2, 4]
+    assert it(range(3)).double().rev().collect() == [4, 2, 0]
+    assert it(range(3)).double().size_hint() == (3, 3)
+    assert it(range(3)).skip(1).double().collect() == [2, 4]
+
+    assert it(range(5)).pairs().collect() == [(0, 1), (2, 3)]
+    assert it(range(5)).pairs().size_hint() == (2, 2)
+
+    assert it(range(10)).scaled(10).collect() == list(range(0, 100, 10))
+    assert it(range(10)).scaled(10).size_hint() == (0, None)
+    with pytest.raises(ChemicalException):
+        it(range(10)).scaled(10).rev()
+
+    assert it(range(3)).filter(lambda x: x).size_hint() == (0, 3)
+    assert it(range(3)).map(str).stages()[0].size_hint() == (3, 3)
+
+    # Stages over an iterator that keeps its own bookkeeping pull through it
+    started = it(range(4))
+    assert started.next() == 0
+    assert started.double().collect() == [2, 4, 6]
+    cycled = it('ab').cycle()
+    assert cycled.map(str.upper).take(3).collect() == ['A', 'B', 'A']
+    assert cycled.buffered()[0] == 2
+
+    with pytest.raises(TraitException):
+        trait.stage(size='sometimes')
+
+
+def test_inspect_class():
+    import chemical
+
+    seen = []
+    inspected = chemical.Inspect(it('abc'), seen.append)
+    assert isinstance(inspected, it)
+    assert inspected.collect(str) == 'abc' and seen == ['a', 'b', 'c']
+    assert chemical.Inspect('abc', seen.append).rev().collect(str) == 'cba'
+    assert chemical.Inspect('abc', print).size_hint() == (3, 3)